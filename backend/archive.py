@@ -0,0 +1,139 @@
+"""
+Columnar (Arrow IPC) payroll archive.
+
+scripts/archive_data.py writes one uncompressed Arrow IPC file per year next
+to the CSV archive: name, department and title are dictionary-encoded with
+sorted dictionaries (so codes double as sort keys) and money is int64
+cents. Files are memory-mapped on read, so the numeric and dictionary-code
+columns are used in place with no parsing.
+"""
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: only needed for the columnar archive
+    pa = None
+
+from backend.engine import MONEY_COLUMNS
+
+ARCHIVE_DIR = Path(__file__).parent.parent / "data" / "archive"
+
+DICTIONARY_COLUMNS = ['name', 'department', 'title']
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is required for the columnar archive (pip install pyarrow)")
+
+
+def arrow_path(year: int, archive_dir: Path = ARCHIVE_DIR) -> Path:
+    return Path(archive_dir) / f"boston_payroll_{year}.arrow"
+
+
+def archived_years(archive_dir: Path = ARCHIVE_DIR) -> List[int]:
+    """Years that have an Arrow file in the archive."""
+    years = []
+    for path in Path(archive_dir).glob("boston_payroll_*.arrow"):
+        years.append(int(path.stem.rsplit("_", 1)[-1]))
+    return sorted(years)
+
+
+def _dictionary_array(values: pd.Series):
+    codes, uniques = pd.factorize(values, sort=True)
+    return pa.DictionaryArray.from_arrays(
+        pa.array(codes, type=pa.int32(), mask=codes < 0),
+        pa.array(uniques, type=pa.string())
+    )
+
+
+def write_year(frame: pd.DataFrame, path: Path) -> int:
+    """Write one year (id, year, text columns, money in cents) as Arrow IPC."""
+    _require_pyarrow()
+    arrays = {
+        'id': pa.array(frame['id'], type=pa.int64()),
+        'year': pa.array(frame['year'], type=pa.int32()),
+        'name': _dictionary_array(frame['name']),
+        'department': _dictionary_array(frame['department']),
+        'title': _dictionary_array(frame['title']),
+    }
+    for col in MONEY_COLUMNS:
+        arrays[col] = pa.array(frame[col], type=pa.int64())
+    arrays['zip_code'] = pa.array(frame['zip_code'], type=pa.string())
+
+    table = pa.table(arrays)
+    with pa.OSFile(str(path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return table.num_rows
+
+
+def sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def manifest_checksums(archive_dir: Path = ARCHIVE_DIR) -> Dict[str, str]:
+    """File name -> sha256 from manifest.txt."""
+    manifest = Path(archive_dir) / "manifest.txt"
+    if not manifest.exists():
+        return {}
+    pattern = re.compile(r'^\s+(\S+)\s.*sha256=([0-9a-f]{64})')
+    checksums = {}
+    for line in manifest.read_text().splitlines():
+        match = pattern.match(line)
+        if match:
+            checksums[match.group(1)] = match.group(2)
+    return checksums
+
+
+def read_year(year: int, archive_dir: Path = ARCHIVE_DIR, verify: bool = False):
+    """Memory-map one year's Arrow file. verify=True checks the manifest sha256."""
+    _require_pyarrow()
+    path = arrow_path(year, archive_dir)
+    if verify:
+        expected = manifest_checksums(archive_dir).get(path.name)
+        if expected is None:
+            raise ValueError(f"No checksum for {path.name} in manifest")
+        if sha256(path) != expected:
+            raise ValueError(f"Checksum mismatch for {path.name}")
+
+    with pa.memory_map(str(path), 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def column_numpy(table, name: str):
+    """A column as NumPy, zero-copy when it is one chunk with no nulls."""
+    column = table.column(name)
+    array = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+    return array.to_numpy(zero_copy_only=False)
+
+
+def dictionary_numpy(table, name: str):
+    """(codes, dictionary) for a dictionary column; NULL codes become -1."""
+    column = table.column(name)
+    array = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+    indices = array.indices
+    if indices.null_count:
+        indices = indices.fill_null(-1)
+    return indices.to_numpy(zero_copy_only=False), array.dictionary.to_numpy(zero_copy_only=False)
+
+
+def to_frame(table, money_as_cents: bool = False) -> pd.DataFrame:
+    """Archive table as a loader-ready DataFrame (dollars unless money_as_cents)."""
+    frame = table.to_pandas()
+    for col in DICTIONARY_COLUMNS:
+        frame[col] = frame[col].astype(object).where(frame[col].notna(), '')
+    if not money_as_cents:
+        for col in MONEY_COLUMNS:
+            frame[col] = frame[col] / 100
+    frame['zip_code'] = frame['zip_code'].fillna('')
+    return frame
+
@@ -0,0 +1,34 @@
+import asyncpg
+from contextlib import asynccontextmanager
+from backend.config import (
+    DATABASE_URL, ASYNC_POOL_MIN, ASYNC_POOL_MAX, DB_POOL_TIMEOUT, DB_STATEMENT_TIMEOUT_MS
+)
+
+# asyncpg pool used by the async endpoints (backend.async_queries)
+async_pool = None
+
+async def init_async_pool():
+    """Initialize the asyncpg connection pool."""
+    global async_pool
+    if async_pool is None:
+        async_pool = await asyncpg.create_pool(
+            dsn=DATABASE_URL,
+            min_size=ASYNC_POOL_MIN,
+            max_size=ASYNC_POOL_MAX,
+            server_settings={'statement_timeout': str(DB_STATEMENT_TIMEOUT_MS)}
+        )
+    return async_pool
+
+async def close_async_pool():
+    """Close the pool (application shutdown)."""
+    global async_pool
+    if async_pool is not None:
+        await async_pool.close()
+        async_pool = None
+
+@asynccontextmanager
+async def get_async_connection():
+    """Async context manager for database connections."""
+    pool = await init_async_pool()
+    async with pool.acquire(timeout=DB_POOL_TIMEOUT) as conn:
+        yield conn
@@ -0,0 +1,271 @@
+"""
+Async (asyncpg) mirror of the read queries in backend.queries.
+
+Same arguments and return shapes, so the endpoints can await them without
+holding a worker thread per request. SQL fragments and result shaping are
+shared with backend.queries; independent aggregates run concurrently on
+separate pooled connections with asyncio.gather. When the in-memory engine
+is loaded the calls go to it, as in backend.queries. Engine scans and any
+other synchronous work that can block (psycopg2 fallbacks, version checks,
+loading the lookup tables) run in a worker thread, never on the event loop.
+"""
+import asyncio
+import re
+import time
+from decimal import Decimal
+from typing import Optional, List, Dict, Any
+
+from backend.async_database import get_async_connection
+from backend.database import get_pool_stats
+from backend import engine
+from backend import metrics
+from backend import distribution
+from backend import cache
+from backend import lookups
+from backend import queries
+from backend.queries import (
+    VALID_SORT_COLUMNS,
+    VALID_EARNINGS_TYPES,
+    MONEY_SORT_COLUMNS,
+    BREAKDOWN_COLUMNS,
+    _filter_signature,
+    encode_cursor,
+    decode_cursor,
+    _seek_clause,
+    _employee_filters,
+    _employee_page_sql,
+    _cursor_value,
+    _breakdown_response,
+    _dashboard_response,
+    DEPARTMENTS_SQL,
+    TOP_DEPARTMENT_SQL,
+    _dashboard_sql,
+    _stats_sql,
+    _median_sql,
+    _stats_response,
+    _breakdown_sql,
+    MONEY_COLUMNS,
+    YEAR_DEPARTMENT_SUMS_SQL,
+    _trend_sums,
+    _cache_trend_sums,
+    _cached_trend_medians,
+    _cache_trend_medians,
+    _trend_median_sql,
+    _trends_response,
+    _history_sql,
+    _history_response,
+)
+
+_PLACEHOLDER = re.compile(r'%s')
+
+
+def _numbered(sql: str) -> str:
+    """Rewrite psycopg2 %s placeholders as asyncpg $1, $2, ..."""
+    counter = iter(range(1, 10000))
+    return _PLACEHOLDER.sub(lambda _: f"${next(counter)}", sql)
+
+
+async def _blocking(func, *args):
+    """Run a synchronous call in a worker thread (keeps the request's metrics context)."""
+    return await asyncio.to_thread(func, *args)
+
+
+async def _lookups_ready():
+    # lookups.id_of loads the tables on first use; do that off the event loop
+    if not lookups.is_loaded():
+        await _blocking(lookups.load)
+
+
+async def _fetch(sql: str, params: list) -> List[Dict[str, Any]]:
+    async with get_async_connection() as conn:
+        start = time.perf_counter()
+        rows = await conn.fetch(_numbered(sql), *params)
+        metrics.record_query(time.perf_counter() - start, len(rows), sql, params)
+        with metrics.phase('fetch'):
+            return [dict(row) for row in rows]
+
+
+async def _fetchrow(sql: str, params: list) -> Optional[Dict[str, Any]]:
+    async with get_async_connection() as conn:
+        start = time.perf_counter()
+        row = await conn.fetchrow(_numbered(sql), *params)
+        metrics.record_query(time.perf_counter() - start, int(row is not None), sql, params)
+        return dict(row) if row is not None else None
+
+
+async def get_employees(
+    year: int = 2024,
+    department: Optional[str] = None,
+    search: Optional[str] = None,
+    earnings_type: Optional[str] = None,
+    sort_by: str = "total_gross",
+    sort_order: str = "desc",
+    limit: int = 50,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    reuse_total: bool = True,
+    money_format: str = 'decimal'
+) -> tuple[List[Dict[str, Any]], int, Optional[str]]:
+    """Async backend.queries.get_employees; the count and page run concurrently."""
+    if engine.is_loaded():
+        return await _blocking(
+            queries.get_employees,
+            year, department, search, earnings_type, sort_by, sort_order,
+            limit, offset, cursor, reuse_total, money_format
+        )
+    await _lookups_ready()
+
+    if sort_by not in VALID_SORT_COLUMNS:
+        sort_by = 'total_gross'
+    if sort_order not in ['asc', 'desc']:
+        sort_order = 'desc'
+    if limit > 30000:
+        limit = 30000
+    if earnings_type not in VALID_EARNINGS_TYPES:
+        earnings_type = None
+
+    signature = _filter_signature(year, department, search, earnings_type)
+    seek = decode_cursor(cursor, sort_by, sort_order, signature) if cursor else None
+
+    where_sql, params = _employee_filters(year, department, search, earnings_type)
+    data_where, data_params = where_sql, list(params)
+    if seek:
+        value = seek['value']
+        if sort_by in MONEY_SORT_COLUMNS:
+            value = Decimal(value)
+        seek_sql, seek_params = _seek_clause(sort_by, sort_order, value, seek['id'])
+        data_where += f" AND {seek_sql}"
+        data_params.extend(seek_params)
+        offset = 0
+
+    data_sql = _employee_page_sql(data_where, sort_by, sort_order, money_format)
+    page = _fetch(data_sql, data_params + [limit + 1, offset])
+
+    if seek and reuse_total and seek['total'] is not None:
+        data, total = await page, seek['total']
+    else:
+        count = _fetchrow(f"SELECT COUNT(*) FROM payroll_earnings WHERE {where_sql}", params)
+        data, count_row = await asyncio.gather(page, count)
+        total = count_row['count']
+
+    has_more = len(data) > limit
+    data = data[:limit]
+    next_cursor = None
+    if has_more and data:
+        last = data[-1]
+        next_cursor = encode_cursor(sort_by, sort_order, _cursor_value(last, sort_by, money_format),
+                                    last['id'], signature, total)
+    return data, total, next_cursor
+
+
+async def get_departments(year: int = 2024) -> List[Dict[str, Any]]:
+    """Async backend.queries.get_departments."""
+    if engine.is_loaded():
+        return await _blocking(engine.get_departments, year)
+
+    return await _fetch(DEPARTMENTS_SQL, [year])
+
+
+async def _median(year: int, department: Optional[str]):
+    if distribution.is_loaded():
+        return distribution.median(year, department)
+    row = await _fetchrow(*_median_sql(year, department))
+    return row['median']
+
+
+async def get_stats(year: int = 2024, department: Optional[str] = None) -> Dict[str, Any]:
+    """Async backend.queries.get_stats; totals, median and top department run concurrently."""
+    if engine.is_loaded():
+        return await _blocking(engine.get_stats, year, department)
+    await _lookups_ready()
+
+    totals = _fetch(*_stats_sql(year, department))
+    if department:
+        rows, median = await asyncio.gather(totals, _median(year, department))
+        top_dept = None
+    else:
+        rows, median, top_dept = await asyncio.gather(
+            totals, _median(year, department), _fetchrow(TOP_DEPARTMENT_SQL, [year])
+        )
+    return _stats_response(year, department, rows, median, top_dept)
+
+
+async def get_earnings_breakdown(year: int = 2024, department: Optional[str] = None) -> Dict[str, Any]:
+    """Async backend.queries.get_earnings_breakdown."""
+    if engine.is_loaded():
+        return _breakdown_response(year, await _blocking(engine.get_earnings_breakdown, year, department))
+    await _lookups_ready()
+
+    row = await _fetchrow(*_breakdown_sql(year, department))
+    return _breakdown_response(year, row or {col: None for col in BREAKDOWN_COLUMNS})
+
+
+async def get_dashboard(year: int = 2024, department: Optional[str] = None) -> Dict[str, Any]:
+    """Async backend.queries.get_dashboard (one statement, as there)."""
+    if engine.is_loaded():
+        return await _blocking(queries.get_dashboard, year, department)
+    await _lookups_ready()
+
+    rows = await _fetch(*_dashboard_sql(year, department))
+    return _dashboard_response(year, department, rows)
+
+
+async def get_trends(department: Optional[str] = None, metric: str = 'total_gross') -> Dict[str, Any]:
+    """Async backend.queries.get_trends (shares its per-version cache)."""
+    if engine.is_loaded():
+        return await _blocking(queries.get_trends, department, metric)
+    if metric not in MONEY_COLUMNS:
+        raise ValueError(f"metric must be one of {', '.join(MONEY_COLUMNS)}")
+    await _lookups_ready()
+
+    version = await _blocking(cache.current_version)
+    rows = _trend_sums.get(version)
+    if rows is None:
+        rows = await _fetch(YEAR_DEPARTMENT_SUMS_SQL, [])
+        _cache_trend_sums(version, rows)
+
+    medians = None
+    if not distribution.is_loaded():
+        medians = _cached_trend_medians(version, metric, department)
+        if medians is None:
+            medians = {row['year']: row['median'] for row in await _fetch(*_trend_median_sql(metric, department))}
+            _cache_trend_medians(version, metric, department, medians)
+    return _trends_response(rows, department, metric, medians)
+
+
+async def get_available_years() -> List[int]:
+    """Async backend.queries.get_available_years."""
+    if engine.is_loaded():
+        return engine.get_available_years()
+
+    rows = await _fetch("SELECT DISTINCT year FROM payroll_earnings ORDER BY year DESC", [])
+    return [row['year'] for row in rows]
+
+
+async def get_health_check() -> Dict[str, Any]:
+    """Async backend.queries.get_health_check."""
+    try:
+        total_row, years = await asyncio.gather(
+            _fetchrow("SELECT COUNT(*) FROM payroll_earnings", []),
+            get_available_years(),
+        )
+        return {
+            'status': 'healthy',
+            'database': 'connected',
+            'total_records': total_row['count'],
+            'years_available': years,
+            'pool': get_pool_stats()
+        }
+    except Exception as e:
+        return {
+            'status': 'unhealthy',
+            'database': 'error',
+            'error': str(e),
+            'total_records': 0,
+            'years_available': []
+        }
+
+
+async def get_employee_history(key: str) -> Optional[Dict[str, Any]]:
+    """Async backend.queries.get_employee_history."""
+    return _history_response(await _fetch(*_history_sql(key)))
@@ -0,0 +1,169 @@
+"""
+Versioned response cache for the read API.
+
+Responses are keyed on path plus normalized query parameters and tagged
+with the dataset version that the loaders bump in payroll_metadata, which
+also makes a strong ETag: the same URL at the same version always has the
+same body. The version is re-read at most every DATASET_VERSION_POLL
+seconds; when it changes the reload hooks run in a background thread, and
+the cache is emptied and the new version served once they succeed.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, NamedTuple, Optional, Iterable, Tuple
+from urllib.parse import urlencode
+
+from backend.config import (
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_BYTES,
+    DATASET_VERSION_POLL,
+)
+from backend.database import get_dataset_version
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+    media_type: str
+    # The handler's own headers (e.g. Content-Disposition)
+    headers: Tuple[Tuple[str, str], ...] = ()
+
+
+class ResponseCache:
+    """Thread-safe LRU with a per-entry TTL, bounded in entries and body bytes.
+
+    Bodies larger than max_entry_bytes (default maxbytes / 8), such as big
+    employee pages, are not cached, so one can't evict everything else.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 300, maxbytes: int = 64 * 1024 * 1024,
+                 max_entry_bytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.max_entry_bytes = maxbytes // 8 if max_entry_bytes is None else max_entry_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Tuple[float, CachedResponse]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                    self.nbytes -= len(entry[1].body)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: CachedResponse):
+        if len(value.body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= len(old[1].body)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self.nbytes += len(value.body)
+            while len(self._entries) > self.maxsize or self.nbytes > self.maxbytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= len(evicted.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+responses = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_BYTES)
+
+_version: Optional[str] = None
+_checked_at = 0.0
+_version_lock = threading.Lock()
+_reload_hooks: List[Callable[[], None]] = []
+_reloading = False
+
+
+def on_version_change(hook: Callable[[], None]):
+    """Register a callable to run (once) after the dataset version changes."""
+    _reload_hooks.append(hook)
+
+
+def _reload(version: str):
+    """Run the reload hooks for version, then switch to it (background thread)."""
+    global _version, _reloading
+    try:
+        for hook in _reload_hooks:
+            hook()
+    except Exception as e:
+        # Retried on the next version check
+        print(f"[ERROR] Reload for dataset version {version} failed; still serving {_version}: {e}")
+    else:
+        with _version_lock:
+            previous, _version = _version, version
+        responses.clear()
+        print(f"[OK] Dataset version {previous} -> {version}; response cache cleared")
+    finally:
+        _reloading = False
+
+
+def current_version() -> str:
+    """Dataset version, polled from the database at most every DATASET_VERSION_POLL s.
+
+    A new version is reloaded in a background thread; requests keep getting
+    the previous version (and its cached responses) until the reload hooks
+    have all succeeded.
+    """
+    global _version, _checked_at, _reloading
+    if _version is not None and time.monotonic() - _checked_at < DATASET_VERSION_POLL:
+        return _version
+
+    with _version_lock:
+        if _version is not None and time.monotonic() - _checked_at < DATASET_VERSION_POLL:
+            return _version
+        try:
+            version = get_dataset_version()
+        except Exception as e:
+            # Keep serving the last known version if the database is unreachable
+            print(f"[WARN] Dataset version check failed: {e}")
+            version = _version or '0'
+        _checked_at = time.monotonic()
+
+        if _version is None:
+            _version = version
+        elif version != _version and not _reloading:
+            _reloading = True
+            threading.Thread(target=_reload, args=(version,), name="dataset-reload", daemon=True).start()
+        return _version
+
+
+def is_current(version: str) -> bool:
+    """Whether version is still the one served, with no reload under way.
+
+    A response built while a reload runs may already reflect the new data,
+    so it is neither cached nor tagged with the version read before it.
+    """
+    return version == _version and not _reloading
+
+
+def cache_key(path: str, params: Iterable[Tuple[str, str]]) -> str:
+    """Path plus sorted query parameters, ignoring empty values."""
+    normalized = sorted((k, v) for k, v in params if v != '')
+    # Re-encoded, so a value containing '&' or '=' can't pose as more parameters
+    return path + '?' + urlencode(normalized)
+
+
+def make_etag(version: str, key: str) -> str:
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return f'"v{version}-{digest}"'
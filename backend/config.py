@@ -6,3 +6,51 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is required")
+
+# Query engine: "postgres" (default) or "memory" to serve reads from
+# in-process NumPy columns loaded at startup (see backend/engine.py)
+QUERY_ENGINE = os.getenv("QUERY_ENGINE", "postgres").lower()
+
+# Where the memory engine loads from: "database" (default) or "archive" for
+# the memory-mapped Arrow files in data/archive (read-only cold start)
+ENGINE_SOURCE = os.getenv("ENGINE_SOURCE", "database").lower()
+
+# Response cache for the read API (see backend/cache.py)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+# Total body bytes the cache may hold; bodies over 1/8 of it are not cached
+RESPONSE_CACHE_BYTES = int(os.getenv("RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024)))
+# Seconds between dataset-version checks; a new version empties the cache
+DATASET_VERSION_POLL = float(os.getenv("DATASET_VERSION_POLL", "5"))
+
+# asyncpg pool for the async endpoints (see backend/async_database.py)
+ASYNC_POOL_MIN = int(os.getenv("ASYNC_POOL_MIN", "2"))
+ASYNC_POOL_MAX = int(os.getenv("ASYNC_POOL_MAX", "10"))
+
+# psycopg2 connection pool (see backend/database.py)
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Idle seconds after which a connection is pinged before reuse
+DB_POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", "30"))
+# Per-connection statement_timeout in ms (0 disables); loaders lift it per transaction
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+
+# Create payroll_earnings partitioned by year (LIST on year, one table per
+# year); see backend/partitions.py and scripts/migrate_partitions.py
+PARTITION_BY_YEAR = os.getenv("PARTITION_BY_YEAR", "false").lower() in ("1", "true", "yes")
+
+# Create payroll_earnings with money as DECIMAL(12,2) dollars ("decimal") or
+# BIGINT cents ("cents"); see backend/money.py and scripts/migrate_money.py
+MONEY_STORAGE = os.getenv("MONEY_STORAGE", "decimal").lower()
+
+# Slow-query log (see backend/slowlog.py): queries over SLOW_QUERY_MS (0 disables)
+# are logged, and a sample re-run under EXPLAIN (ANALYZE, BUFFERS)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "1.0"))
+SLOW_QUERY_EXPLAIN_PER_MINUTE = int(os.getenv("SLOW_QUERY_EXPLAIN_PER_MINUTE", "6"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "100"))
+
+# Shared secret for /api/debug/* (sent as X-Debug-Token); unset disables them
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN")
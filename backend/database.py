@@ -1,23 +1,201 @@
+import threading
+import time
 import psycopg2
+import psycopg2.errors
 from psycopg2 import pool
 from psycopg2.extras import RealDictCursor
+from backend.metrics import TimedCursor
 from contextlib import contextmanager
-from backend.config import DATABASE_URL
+from typing import Any, Dict, List, Tuple
+from backend.config import (
+    DATABASE_URL,
+    DB_POOL_MIN,
+    DB_POOL_MAX,
+    DB_POOL_TIMEOUT,
+    DB_POOL_PING_AFTER,
+    DB_STATEMENT_TIMEOUT_MS,
+    PARTITION_BY_YEAR,
+    MONEY_STORAGE
+)
+
+class PoolTimeout(pool.PoolError):
+    """No connection was returned to the pool within the checkout timeout."""
+
+class ConnectionPool:
+    """Thread-safe psycopg2 pool with blocking checkout and usage stats.
+
+    When every connection is in use, getconn waits (up to timeout seconds)
+    for one to be returned instead of raising. Idle connections unused for
+    ping_after seconds are checked with SELECT 1 before being handed out.
+    Each connection runs with the given statement_timeout.
+    """
+
+    def __init__(self, dsn: str, minconn: int, maxconn: int, timeout: float,
+                 ping_after: float, statement_timeout_ms: int):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.statement_timeout_ms = statement_timeout_ms
+
+        self._idle: List[Tuple[Any, float]] = []
+        self._size = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+        self._checkouts = 0
+        self._exhausted = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _connect(self):
+        options = f"-c statement_timeout={self.statement_timeout_ms}" if self.statement_timeout_ms else None
+        # Timed cursors by default so each request's queries show up in /metrics
+        return psycopg2.connect(self.dsn, options=options, cursor_factory=TimedCursor)
+
+    def _alive(self, conn, last_used: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn=None):
+        if conn is not None and not conn.closed:
+            conn.close()
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def prewarm(self):
+        """Open connections up to minconn so the first requests skip connecting."""
+        while True:
+            with self._cond:
+                if self._size >= self.minconn:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                self._discard()
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def getconn(self, timeout: float = None):
+        """Check out a connection, waiting up to timeout seconds. Raises PoolTimeout."""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        waited = False
+
+        while True:
+            with self._cond:
+                while not self._idle and self._size >= self.maxconn:
+                    waited = True
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"No database connection free after {timeout:.1f}s "
+                            f"({self.maxconn} in use)"
+                        )
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                else:
+                    conn, last_used = None, None
+                    self._size += 1
+
+            # Connect or ping outside the lock
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    self._discard()
+                    raise
+            elif not self._alive(conn, last_used):
+                self._discard(conn)
+                continue
+
+            wait = time.monotonic() - start
+            with self._cond:
+                self._in_use += 1
+                self._checkouts += 1
+                self._exhausted += waited
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+            return conn
+
+    def putconn(self, conn, close: bool = False):
+        """Return a connection; close=True (or a closed connection) discards it."""
+        with self._cond:
+            self._in_use -= 1
+        if close or conn.closed:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, _ in idle:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'size': self._size,
+                'max_size': self.maxconn,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'checkouts': self._checkouts,
+                'exhausted': self._exhausted,
+                'timeouts': self._timeouts,
+                'avg_wait_ms': round(self._wait_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                'max_wait_ms': round(self._wait_max * 1000, 3),
+            }
 
 # Connection pool
 connection_pool = None
+_pool_lock = threading.Lock()
 
 def init_pool():
     """Initialize connection pool."""
     global connection_pool
     if connection_pool is None:
-        connection_pool = psycopg2.pool.SimpleConnectionPool(
-            minconn=1,
-            maxconn=10,
-            dsn=DATABASE_URL
-        )
+        with _pool_lock:
+            if connection_pool is None:
+                connection_pool = ConnectionPool(
+                    dsn=DATABASE_URL,
+                    minconn=DB_POOL_MIN,
+                    maxconn=DB_POOL_MAX,
+                    timeout=DB_POOL_TIMEOUT,
+                    ping_after=DB_POOL_PING_AFTER,
+                    statement_timeout_ms=DB_STATEMENT_TIMEOUT_MS
+                )
     return connection_pool
 
+def prewarm_pool():
+    """Open DB_POOL_MIN connections up front (application startup)."""
+    init_pool().prewarm()
+
+def get_pool_stats() -> Dict[str, Any]:
+    return init_pool().stats()
+
 @contextmanager
 def get_db_connection():
     """Context manager for database connections."""
@@ -27,61 +205,390 @@ def get_db_connection():
         yield conn
         conn.commit()
     except Exception as e:
-        conn.rollback()
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            pass  # connection is broken; putconn discards it
         raise e
     finally:
         pool.putconn(conn)
 
-def create_schema():
-    """Create payroll_earnings table and indexes."""
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            # Create table
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS payroll_earnings (
-                    id SERIAL PRIMARY KEY,
-
-                    -- Year identifier
-                    year INTEGER NOT NULL,
-
-                    -- Employee info
-                    name VARCHAR(255) NOT NULL,
-                    department VARCHAR(255),
-                    title VARCHAR(255),
-
-                    -- Earnings breakdown (in dollars, can be negative for corrections)
-                    regular DECIMAL(12,2) DEFAULT 0,
-                    retro DECIMAL(12,2) DEFAULT 0,
-                    other DECIMAL(12,2) DEFAULT 0,
-                    overtime DECIMAL(12,2) DEFAULT 0,
-                    injured DECIMAL(12,2) DEFAULT 0,
-                    detail DECIMAL(12,2) DEFAULT 0,
-                    quinn_education DECIMAL(12,2) DEFAULT 0,
-                    total_gross DECIMAL(12,2) DEFAULT 0,
-
-                    -- Location
-                    zip_code VARCHAR(10),
-
-                    -- Metadata
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-                    -- Composite unique constraint
-                    UNIQUE(year, name, department, title)
-                );
-            """)
+# Dataset version: bumped by every loader in the same transaction as its
+# writes, so readers (the response cache) know when results can change
+METADATA_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS payroll_metadata (
+        key VARCHAR(64) PRIMARY KEY,
+        value TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# person_key is a fixed-length hex digest (backend/linkage.py)
+PERSON_KEY_LENGTH = 16
+PERSON_KEY_COLUMN_SQL = "ALTER TABLE payroll_earnings ADD COLUMN IF NOT EXISTS person_key VARCHAR(16)"
+PERSON_KEY_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_payroll_person ON payroll_earnings(person_key, year)"
+
+# Content hash of each row (backend/fingerprints.py); NULL until a loader sets it
+ROW_HASH_COLUMN_SQL = "ALTER TABLE payroll_earnings ADD COLUMN IF NOT EXISTS row_hash BIGINT"
+
+def ensure_row_hash_column(cur):
+    """Add row_hash to a payroll_earnings created before it existed.
+
+    Checks the catalog first, so a load only takes the ALTER's exclusive
+    lock (held until it commits) on the one run that adds the column.
+    """
+    cur.execute("""
+        SELECT EXISTS (SELECT 1 FROM information_schema.columns
+                       WHERE table_name = 'payroll_earnings' AND column_name = 'row_hash')
+    """)
+    if not cur.fetchone()[0]:
+        cur.execute(ROW_HASH_COLUMN_SQL)
+
+def bump_dataset_version(cur) -> str:
+    """Increment the dataset version on the caller's cursor; returns the new value."""
+    cur.execute(METADATA_TABLE_SQL)
+    cur.execute("""
+        INSERT INTO payroll_metadata (key, value) VALUES ('dataset_version', '1')
+        ON CONFLICT (key) DO UPDATE SET
+            value = (payroll_metadata.value::bigint + 1)::text,
+            updated_at = CURRENT_TIMESTAMP
+        RETURNING value
+    """)
+    return cur.fetchone()[0]
+
+# Earnings columns, stored as DECIMAL(12,2) dollars or BIGINT cents
+# (MONEY_STORAGE; see backend/money.py and scripts/migrate_money.py)
+MONEY_COLUMNS = [
+    'regular', 'retro', 'other', 'overtime', 'injured', 'detail',
+    'quinn_education', 'total_gross',
+]
+MONEY_TYPES = {'decimal': 'DECIMAL(12,2)', 'cents': 'BIGINT'}
+
+def get_money_storage(cur, table: str = 'payroll_earnings') -> str:
+    """'cents' if table stores money as BIGINT cents, else 'decimal'."""
+    cur.execute("""
+        SELECT data_type FROM information_schema.columns
+        WHERE table_name = %s AND column_name = 'total_gross'
+    """, [table])
+    row = cur.fetchone()
+    return 'cents' if row and row[0] == 'bigint' else 'decimal'
+
+# Dictionary tables for the department and title strings, which repeat on
+# every row; payroll_earnings stores their small integer ids. Ids are
+# assigned in name order by backend.lookups, not by a sequence.
+LOOKUP_TABLES_SQL = """
+    CREATE TABLE IF NOT EXISTS payroll_departments (
+        department_id SMALLINT PRIMARY KEY,
+        department VARCHAR(255) NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS payroll_titles (
+        title_id INTEGER PRIMARY KEY,
+        title VARCHAR(255) NOT NULL UNIQUE
+    )
+"""
+
+# Lookup tables as first created, before the payroll_ prefix: old name ->
+# (new name, encoded column)
+LEGACY_LOOKUP_TABLES = {
+    'departments': ('payroll_departments', 'department'),
+    'titles': ('payroll_titles', 'title'),
+}
+
+def create_lookup_tables(cur):
+    """Create the lookup tables, renaming ones created under their old names."""
+    for old, (new, column) in LEGACY_LOOKUP_TABLES.items():
+        # Only ours: a departments table with department_id, and no new one yet
+        cur.execute("""
+            SELECT to_regclass(%s) IS NULL AND EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = %s AND column_name = %s
+            )
+        """, [new, old, f"{column}_id"])
+        if cur.fetchone()[0]:
+            cur.execute(f"ALTER TABLE {old} RENAME TO {new}")
+            cur.execute(f"ALTER TABLE {new} RENAME CONSTRAINT {old}_pkey TO {new}_pkey")
+            cur.execute(f"ALTER TABLE {new} RENAME CONSTRAINT {old}_{column}_key TO {new}_{column}_key")
+            print(f"[OK] Renamed lookup table {old} to {new}")
+    cur.execute(LOOKUP_TABLES_SQL)
 
-            # Create indexes
-            indexes = [
-                "CREATE INDEX IF NOT EXISTS idx_payroll_year ON payroll_earnings(year)",
-                "CREATE INDEX IF NOT EXISTS idx_payroll_department ON payroll_earnings(department)",
-                "CREATE INDEX IF NOT EXISTS idx_payroll_total_gross ON payroll_earnings(total_gross DESC)",
-                "CREATE INDEX IF NOT EXISTS idx_payroll_name_search ON payroll_earnings(name varchar_pattern_ops)",
-                "CREATE INDEX IF NOT EXISTS idx_payroll_year_dept ON payroll_earnings(year, department)",
-            ]
+# payroll_earnings with department and title decoded, for reads that return
+# them. Filters and sort keys stay on the table's own columns where they can,
+# so the LEFT JOINs only decode the rows a query returns (and are dropped by
+# the planner when neither name is selected).
+PAYROLL_NAMED = "payroll_earnings_named"
+PAYROLL_NAMED_SQL = f"""
+    CREATE OR REPLACE VIEW {PAYROLL_NAMED} AS
+    SELECT
+        p.id, p.year, p.name,
+        p.department_id, d.department,
+        p.title_id, t.title,
+        p.regular, p.retro, p.other, p.overtime, p.injured, p.detail,
+        p.quinn_education, p.total_gross, p.zip_code, p.person_key, p.created_at
+    FROM payroll_earnings p
+    LEFT JOIN payroll_departments d ON d.department_id = p.department_id
+    LEFT JOIN payroll_titles t ON t.title_id = p.title_id
+"""
 
-            for index_sql in indexes:
-                cur.execute(index_sql)
+def create_named_view(cur):
+    cur.execute(PAYROLL_NAMED_SQL)
 
+# Per-(year, department) counts and sums, plus one is_year_total rollup row
+# per year, for the aggregate endpoints. Grouped on department_id, with names
+# joined to the grouped rows. Refreshed by the loaders inside their write
+# transaction (see refresh_summary). Money is in dollars on either storage
+# layout; over BIGINT cents the sums are integer math, divided once per group
+# into the same DECIMAL(12,2) values.
+SUMMARY_VIEW = "payroll_dept_year_summary"
+
+def summary_view_sql(money_storage: str = 'decimal') -> str:
+    if money_storage == 'cents':
+        def total(col):
+            return f"SUM({col}) * 0.01"
+
+        def mean(col):
+            # AVG over DECIMAL(12,2) is its 2-place sum / count
+            return f"{total(col)} / NULLIF(COUNT({col}), 0)"
+    else:
+        def total(col):
+            return f"SUM({col})"
+
+        def mean(col):
+            return f"AVG({col})"
+
+    sums = ",\n".join(f"            {total(col)} AS {col}" for col in MONEY_COLUMNS)
+    return f"""
+    CREATE MATERIALIZED VIEW IF NOT EXISTS {SUMMARY_VIEW} AS
+    SELECT
+        s.year,
+        d.department,
+        s.is_year_total,
+        s.employee_count,
+        s.regular, s.retro, s.other, s.overtime, s.injured, s.detail,
+        s.quinn_education, s.total_gross,
+        s.avg_total_gross,
+        s.avg_overtime
+    FROM (
+        SELECT
+            year,
+            department_id,
+            GROUPING(department_id) = 1 AS is_year_total,
+            COUNT(*) AS employee_count,
+{sums},
+            {mean('total_gross')} AS avg_total_gross,
+            {mean('overtime')} AS avg_overtime
+        FROM payroll_earnings
+        GROUP BY GROUPING SETS ((year, department_id), (year))
+    ) s
+    LEFT JOIN payroll_departments d ON d.department_id = s.department_id
+"""
+
+# REFRESH ... CONCURRENTLY needs a unique index on plain columns
+SUMMARY_INDEX_SQL = f"""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_payroll_summary_key
+    ON {SUMMARY_VIEW} (year, department, is_year_total)
+"""
+
+def create_summary(cur):
+    """Create and populate the summary view if missing."""
+    cur.execute(summary_view_sql(get_money_storage(cur)))
+    cur.execute(SUMMARY_INDEX_SQL)
+
+def refresh_summary(cur):
+    """Recompute the summary view on the caller's cursor.
+
+    CONCURRENTLY diffs into the view rather than rebuilding it, so readers
+    are never blocked. Run it in the loader's transaction before
+    bump_dataset_version, so a new version never serves old aggregates.
+    """
+    create_summary(cur)
+    cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {SUMMARY_VIEW}")
+
+def get_dataset_version() -> str:
+    """Current dataset version ('0' before any versioned load)."""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT value FROM payroll_metadata WHERE key = 'dataset_version'")
+                row = cur.fetchone()
+    except psycopg2.errors.UndefinedTable:
+        return '0'
+    return row[0] if row else '0'
+
+# Table body shared by the plain and the year-partitioned layouts; {money}
+# is the earnings column type (MONEY_TYPES)
+PAYROLL_COLUMNS_SQL = """
+    -- Year identifier
+    year INTEGER NOT NULL,
+
+    -- Employee info
+    name VARCHAR(255) NOT NULL,
+    department_id SMALLINT REFERENCES payroll_departments ON UPDATE CASCADE,
+    title_id INTEGER REFERENCES payroll_titles ON UPDATE CASCADE,
+
+    -- Earnings breakdown (dollars or cents, can be negative for corrections)
+    regular {money} DEFAULT 0,
+    retro {money} DEFAULT 0,
+    other {money} DEFAULT 0,
+    overtime {money} DEFAULT 0,
+    injured {money} DEFAULT 0,
+    detail {money} DEFAULT 0,
+    quinn_education {money} DEFAULT 0,
+    total_gross {money} DEFAULT 0,
+
+    -- Location
+    zip_code VARCHAR(10),
+
+    -- Same person across years (backend/linkage.py)
+    person_key VARCHAR(16),
+
+    -- Content hash, so reloads skip unchanged rows (backend/fingerprints.py)
+    row_hash BIGINT,
+
+    -- Metadata
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    -- Composite unique constraint
+    UNIQUE(year, name, department_id, title_id)
+"""
+
+# Secondary indexes: name -> definition. On a partitioned table each is
+# created per partition.
+# idx_payroll_person serves history lookups (person_key = %s).
+PAYROLL_INDEXES = {
+    'idx_payroll_person': "(person_key, year)",
+}
+# Not read by any query in scripts/index_advisor.py's workload, so dropped
+# from existing tables by create_payroll_table: the single-column and
+# (year, department) indexes are prefixes of EMPLOYEE_PAGE_INDEXES, name
+# search is a substring ILIKE that a varchar_pattern_ops index can't serve,
+# and earnings-type pages read the total_gross page indexes and filter.
+RETIRED_INDEXES = [
+    'idx_payroll_year', 'idx_payroll_department', 'idx_payroll_total_gross', 'idx_payroll_year_dept',
+    'idx_payroll_name_search',
+    *[f'idx_payroll_{col}_paid'
+      for col in ['regular', 'overtime', 'detail', 'retro', 'other', 'injured', 'quinn_education']],
+]
+# /api/employees pages: WHERE year [AND department] ORDER BY sort_col, id
+# LIMIT n reads the first n rows of one of these in order (either direction),
+# with no sort step. Sort columns are those in
+# backend.queries.VALID_SORT_COLUMNS; department and title sort on their
+# ids, which are in name order (backend.lookups).
+EMPLOYEE_PAGE_INDEXES = {
+    'idx_payroll_year_dept_id': "(year, department_id, id)",
+    **{f'idx_payroll_year_{col}': f"(year, {col}, id)"
+       for col in ['name', 'title_id', 'total_gross', 'overtime', 'regular']},
+    **{f'idx_payroll_year_dept_{col}': f"(year, department_id, {col}, id)"
+       for col in ['name', 'title_id', 'total_gross', 'overtime', 'regular']},
+}
+
+# Titles are searched in the (small) payroll_titles table, so only name needs one
+TRIGRAM_INDEXES = {
+    'idx_payroll_name_trgm': "USING gin (name gin_trgm_ops)",
+}
+
+def create_payroll_table(cur, table: str = 'payroll_earnings', partitioned: bool = False,
+                         index_suffix: str = '', money_storage: str = 'decimal'):
+    """Create a payroll table and its indexes on cur (no-op parts if they exist).
+
+    The payroll_departments and payroll_titles tables it references are
+    created first (create_lookup_tables).
+    money_storage ('decimal' or 'cents') sets the earnings column type.
+
+    partitioned creates it PARTITION BY LIST (year) with PRIMARY KEY (id, year),
+    since a partitioned table's keys must include the partition column.
+    Partitions are added per year by backend.partitions.
+    """
+    create_lookup_tables(cur)
+    columns_sql = PAYROLL_COLUMNS_SQL.format(money=MONEY_TYPES[money_storage])
+    if partitioned:
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id SERIAL,
+                {columns_sql},
+                PRIMARY KEY (id, year)
+            ) PARTITION BY LIST (year)
+        """)
+    else:
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id SERIAL PRIMARY KEY,
+                {columns_sql}
+            )
+        """)
+
+    # Tables created before person_key and row_hash existed
+    cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS person_key VARCHAR(16)")
+    cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS row_hash BIGINT")
+
+    for name in RETIRED_INDEXES:
+        cur.execute(f"DROP INDEX IF EXISTS {name}{index_suffix}")
+    for name, definition in PAYROLL_INDEXES.items():
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name}{index_suffix} ON {table} {definition}")
+    for name, definition in EMPLOYEE_PAGE_INDEXES.items():
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name}{index_suffix} ON {table} {definition}")
+
+    # Trigram indexes serve the substring (ILIKE '%x%') search on
+    # name. pg_trgm may be unavailable on some hosts, so
+    # fall back to sequential scans rather than failing the schema.
+    cur.execute("SAVEPOINT trgm")
+    try:
+        cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, definition in TRIGRAM_INDEXES.items():
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {name}{index_suffix} ON {table} {definition}")
+        cur.execute("RELEASE SAVEPOINT trgm")
+    except psycopg2.Error as e:
+        cur.execute("ROLLBACK TO SAVEPOINT trgm")
+        print(f"[WARN] Trigram search indexes not created: {e.pgerror or e}")
+
+def create_schema_on(cur, partitioned: bool = None, money_storage: str = None) -> bool:
+    """Create payroll_earnings, its lookup tables, indexes and views on cur.
+
+    partitioned (default PARTITION_BY_YEAR) creates a new table partitioned
+    by year, and money_storage (default MONEY_STORAGE) one with money in
+    'decimal' dollars or 'cents'; an existing table keeps its layout (see
+    scripts/migrate_partitions.py and scripts/migrate_money.py). Returns
+    False, creating nothing, if the table still stores department and title
+    as text.
+    """
+    if partitioned is None:
+        partitioned = PARTITION_BY_YEAR
+    if money_storage is None:
+        money_storage = MONEY_STORAGE
+    cur.execute("""
+        SELECT to_regclass('payroll_earnings') IS NOT NULL,
+               EXISTS (SELECT 1 FROM pg_partitioned_table
+                       WHERE partrelid = to_regclass('payroll_earnings')),
+               EXISTS (SELECT 1 FROM information_schema.columns
+                       WHERE table_name = 'payroll_earnings' AND column_name = 'department')
+    """)
+    existed, existing_partitioned, text_columns = cur.fetchone()
+    if text_columns:
+        print("[WARN] payroll_earnings stores department and title as text; "
+              "run scripts/migrate_lookups.py to convert it")
+        return False
+    if existed and partitioned and not existing_partitioned:
+        print("[WARN] payroll_earnings exists and is not partitioned; "
+              "run scripts/migrate_partitions.py to convert it")
+    if existed:
+        partitioned = existing_partitioned
+        existing_storage = get_money_storage(cur)
+        if existing_storage != money_storage:
+            print(f"[WARN] payroll_earnings stores money as {existing_storage}; "
+                  f"run scripts/migrate_money.py --to {money_storage} to convert it")
+        money_storage = existing_storage
+
+    create_payroll_table(cur, partitioned=partitioned, money_storage=money_storage)
+    create_named_view(cur)
+    create_summary(cur)
+    cur.execute(METADATA_TABLE_SQL)
+    return True
+
+def create_schema(partitioned: bool = None, money_storage: str = None):
+    """Create payroll_earnings table and indexes (see create_schema_on)."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            if not create_schema_on(cur, partitioned, money_storage):
+                return
             print("[OK] Schema created successfully")
 
             # Verify table exists
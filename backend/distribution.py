@@ -0,0 +1,155 @@
+"""
+Precomputed salary distributions.
+
+At load time every (year, department, earnings component) gets its values as
+a sorted array of integer cents, with department None meaning the whole
+year. A percentile is then an index lookup plus one interpolation, the same
+as PERCENTILE_CONT, and a histogram is one binary search per bin edge. Nothing
+sorts at request time.
+
+Built from the in-memory engine when it is loaded, otherwise with one scan of
+payroll_earnings. Rebuilt when the dataset version changes. About 20 MB for
+six years.
+"""
+import threading
+from typing import Optional, List, Dict, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.database import get_db_connection, PAYROLL_NAMED
+from backend.engine import MONEY_COLUMNS
+from backend import engine
+from backend import money
+
+Key = Tuple[int, Optional[str], str]
+
+_arrays: Dict[Key, np.ndarray] = {}
+_load_lock = threading.Lock()
+
+
+def _add_column(arrays: Dict[Key, np.ndarray], year: int, column: str, values: np.ndarray,
+                department_codes: np.ndarray, departments: np.ndarray):
+    """Sorted arrays for one column of one year, overall and per department (code -1 = NULL)."""
+    arrays[(year, None, column)] = np.sort(values)
+
+    # Sort by (department, value) once, then slice per department
+    order = np.lexsort((values, department_codes))
+    sorted_codes = department_codes[order]
+    sorted_values = values[order]
+    bounds = np.searchsorted(sorted_codes, np.arange(len(departments) + 1))
+    for code, name in enumerate(departments):
+        start, end = bounds[code], bounds[code + 1]
+        if end > start:
+            arrays[(year, name, column)] = sorted_values[start:end]
+
+
+def _from_engine() -> Dict[Key, np.ndarray]:
+    arrays = {}
+    for year in engine.get_available_years():
+        table = engine.get_table(year)
+        for col in MONEY_COLUMNS:
+            _add_column(arrays, year, col, table.money[col], table.department_codes, table.departments)
+    return arrays
+
+
+def _from_database() -> Dict[Key, np.ndarray]:
+    money_sql = ", ".join(f"{money.cents_sql(col)} AS {col}" for col in MONEY_COLUMNS)
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT year, department, {money_sql} FROM {PAYROLL_NAMED}")
+            frame = pd.DataFrame(cur.fetchall(), columns=[desc[0] for desc in cur.description])
+
+    arrays = {}
+    for year, year_frame in frame.groupby('year', sort=True):
+        codes, departments = pd.factorize(year_frame['department'], sort=True)
+        departments = np.asarray(departments, dtype=object)
+        for col in MONEY_COLUMNS:
+            # PERCENTILE_CONT ignores NULLs
+            present = year_frame[col].notna().to_numpy()
+            values = year_frame[col].to_numpy()[present].astype(np.int64)
+            _add_column(arrays, int(year), col, values, codes[present].astype(np.int64), departments)
+    return arrays
+
+
+def load() -> int:
+    """(Re)build every distribution; returns the number of arrays."""
+    with _load_lock:
+        global _arrays
+        arrays = _from_engine() if engine.is_loaded() else _from_database()
+        # Swap in one assignment so readers never see a partial build
+        _arrays = arrays
+        print(f"[OK] Distributions built for {len(arrays):,} (year, department, component) groups")
+        return len(arrays)
+
+
+def is_loaded() -> bool:
+    return bool(_arrays)
+
+
+def get(year: int, department: Optional[str] = None, component: str = 'total_gross') -> Optional[np.ndarray]:
+    """Sorted cents for the group, or None when it has no rows."""
+    return _arrays.get((year, department or None, component))
+
+
+def percentile(values: np.ndarray, p: float) -> Optional[float]:
+    """PERCENTILE_CONT(p) in dollars, p in [0, 1]."""
+    if values is None or not len(values):
+        return None
+    position = p * (len(values) - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, len(values) - 1)
+    # Same arithmetic as Postgres on float8 dollars, so results match exactly
+    low, high = int(values[lower]) / 100, int(values[upper]) / 100
+    return float(low + (high - low) * (position - lower))
+
+
+def median(year: int, department: Optional[str] = None) -> Optional[float]:
+    """Median total_gross, as PERCENTILE_CONT(0.5) in get_stats."""
+    return percentile(get(year, department), 0.5)
+
+
+def histogram(values: np.ndarray, bins: int) -> List[Dict[str, Any]]:
+    """Equal-width bins from min to max; the last bin includes max."""
+    if values is None or not len(values):
+        return []
+    edges = np.linspace(values[0], values[-1], bins + 1)
+    positions = np.searchsorted(values, edges, side='left')
+    positions[-1] = len(values)
+    return [
+        {'lower': round(float(edges[i]) / 100, 2), 'upper': round(float(edges[i + 1]) / 100, 2),
+         'count': int(positions[i + 1] - positions[i])}
+        for i in range(bins)
+    ]
+
+
+def get_distribution(
+    year: int,
+    department: Optional[str] = None,
+    component: str = 'total_gross',
+    percentiles: Optional[List[float]] = None,
+    bins: int = 20
+) -> Dict[str, Any]:
+    """Percentiles (0-100) and histogram for one group."""
+    if component not in MONEY_COLUMNS:
+        raise ValueError(f"component must be one of {', '.join(MONEY_COLUMNS)}")
+    if percentiles is None:
+        percentiles = [10, 25, 50, 75, 90]
+    if any(p < 0 or p > 100 for p in percentiles):
+        raise ValueError("percentiles must be between 0 and 100")
+
+    values = get(year, department, component)
+    count = 0 if values is None else len(values)
+    return {
+        'year': year,
+        'department': department,
+        'component': component,
+        'count': count,
+        'min': int(values[0]) / 100 if count else None,
+        'max': int(values[-1]) / 100 if count else None,
+        'mean': round(int(values.sum()) / count / 100, 2) if count else None,
+        'percentiles': [
+            {'percentile': p, 'value': percentile(values, p / 100)} for p in percentiles
+        ] if count else [],
+        'histogram': histogram(values, bins),
+    }
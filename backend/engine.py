@@ -0,0 +1,589 @@
+"""
+In-memory columnar query engine.
+
+Loads every year of payroll_earnings into NumPy columns at startup so the
+query functions in backend.queries can answer filters, sorts, pagination and
+aggregates in-process. Department and title are dictionary-encoded, money is
+held as integer cents, and each sortable column gets a pre-sorted permutation
+index. Text columns sort in the database's collation (see set_collation), so
+pages and keyset cursors match the SQL path. Enabled with
+QUERY_ENGINE=memory; ENGINE_SOURCE=archive loads from the Arrow files in
+data/archive instead of the database.
+"""
+import threading
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional, List, Dict, Any, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+from backend.database import get_db_connection, PAYROLL_NAMED, MONEY_COLUMNS
+from backend import money
+
+_tables: Dict[int, 'YearTable'] = {}
+_load_lock = threading.Lock()
+
+
+def cents_to_decimal(cents: int) -> Decimal:
+    """Convert integer cents to a 2-place Decimal (same as DECIMAL(12,2))."""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def cents_to_text(cents: np.ndarray) -> List[str]:
+    """Render integer cents as DECIMAL(12,2) text, e.g. -1250 -> '-12.50'."""
+    return [
+        f"-{-c // 100}.{-c % 100:02d}" if c < 0 else f"{c // 100}.{c % 100:02d}"
+        for c in np.asarray(cents, dtype=np.int64).tolist()
+    ]
+
+
+def _encode(values: pd.Series):
+    """Dictionary-encode a text column. NULLs get code -1."""
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes.astype(np.int32), np.asarray(uniques, dtype=object)
+
+
+class YearTable:
+    """Columnar snapshot of one year of payroll_earnings."""
+
+    def __init__(
+        self,
+        year: int,
+        ids: np.ndarray,
+        names: np.ndarray,
+        zip_codes: np.ndarray,
+        department_codes: np.ndarray,
+        departments: np.ndarray,
+        title_codes: np.ndarray,
+        titles: np.ndarray,
+        money: Dict[str, np.ndarray],
+        name_codes: Optional[np.ndarray] = None
+    ):
+        """Columns must be in id order; dictionaries sorted, NULL codes -1."""
+        self.year = year
+        self.size = len(ids)
+
+        self.ids = ids
+        self.names = names
+        self.zip_codes = zip_codes
+        self.department_codes, self.departments = department_codes, departments
+        self.title_codes, self.titles = title_codes, titles
+        self.money = money
+        self._search_names = None
+        self._search_titles = None
+
+        if name_codes is None:
+            name_codes = pd.factorize(self.names, sort=True)[0]
+        self._sort_keys = {
+            'name': name_codes,
+            'department': self._nulls_last(self.department_codes, len(self.departments)),
+            'title': self._nulls_last(self.title_codes, len(self.titles)),
+        }
+        self._permutations: Dict[str, np.ndarray] = {}
+        self._ranks: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_frame(cls, year: int, frame: pd.DataFrame) -> 'YearTable':
+        """Build from a DataFrame with money in integer cents."""
+        zip_codes = frame['zip_code'].astype(object)
+        department_codes, departments = _encode(frame['department'])
+        title_codes, titles = _encode(frame['title'])
+        return cls(
+            year,
+            ids=frame['id'].to_numpy(dtype=np.int64),
+            names=frame['name'].to_numpy(dtype=object),
+            zip_codes=zip_codes.where(zip_codes.notna(), None).to_numpy(dtype=object),
+            department_codes=department_codes,
+            departments=departments,
+            title_codes=title_codes,
+            titles=titles,
+            money={col: frame[col].fillna(0).to_numpy(dtype=np.int64) for col in MONEY_COLUMNS},
+        )
+
+    @classmethod
+    def from_arrow(cls, year: int, table) -> 'YearTable':
+        """Build from a memory-mapped archive table (see backend.archive).
+
+        Money and dictionary codes (including the name sort key) are views
+        over the mapped file; only the string columns are materialized.
+        """
+        from backend import archive
+
+        name_codes, names = archive.dictionary_numpy(table, 'name')
+        department_codes, departments = archive.dictionary_numpy(table, 'department')
+        title_codes, titles = archive.dictionary_numpy(table, 'title')
+        return cls(
+            year,
+            ids=archive.column_numpy(table, 'id'),
+            names=names[name_codes],
+            name_codes=name_codes,
+            zip_codes=archive.column_numpy(table, 'zip_code'),
+            department_codes=department_codes,
+            departments=departments,
+            title_codes=title_codes,
+            titles=titles,
+            money={col: archive.column_numpy(table, col) for col in MONEY_COLUMNS},
+        )
+
+    @staticmethod
+    def _nulls_last(codes: np.ndarray, size: int) -> np.ndarray:
+        # Postgres sorts NULLs after every value in ascending order
+        return np.where(codes < 0, size, codes)
+
+    def set_collation(self, order: pd.Index):
+        """Sort name, department and title by their position in order.
+
+        order holds every distinct value in the database's sort order (see
+        _collation_order); the default keys follow Python's codepoint order,
+        which differs for mixed case and accents.
+        """
+        department_ranks = order.get_indexer(self.departments)
+        title_ranks = order.get_indexer(self.titles)
+        self._sort_keys = {
+            'name': order.get_indexer(self.names),
+            'department': np.where(self.department_codes < 0, len(order),
+                                   department_ranks[self.department_codes]),
+            'title': np.where(self.title_codes < 0, len(order), title_ranks[self.title_codes]),
+        }
+        self._permutations.clear()
+        self._ranks.clear()
+
+    def permutation(self, column: str) -> np.ndarray:
+        """Row order for ascending sort on column, ties broken by id."""
+        perm = self._permutations.get(column)
+        if perm is None:
+            key = self._sort_keys.get(column)
+            if key is None:
+                key = self.money[column]
+            perm = np.lexsort((self.ids, key))
+            self._permutations[column] = perm
+        return perm
+
+    def rank(self, column: str, row: int) -> int:
+        """Position of a row in the ascending permutation for column."""
+        ranks = self._ranks.get(column)
+        if ranks is None:
+            perm = self.permutation(column)
+            ranks = np.empty_like(perm)
+            ranks[perm] = np.arange(len(perm))
+            self._ranks[column] = ranks
+        return int(ranks[row])
+
+    def row_index(self, row_id: int) -> int:
+        """Row number for an id (ids are loaded in ascending order), or -1."""
+        idx = np.searchsorted(self.ids, row_id)
+        if idx < self.size and self.ids[idx] == row_id:
+            return int(idx)
+        return -1
+
+    def department_code(self, department: str) -> int:
+        """Dictionary code for a department name, or -1 if absent."""
+        idx = np.searchsorted(self.departments, department)
+        if idx < len(self.departments) and self.departments[idx] == department:
+            return int(idx)
+        return -1
+
+    def department_mask(self, department: str) -> np.ndarray:
+        code = self.department_code(department)
+        if code < 0:
+            return np.zeros(self.size, dtype=bool)
+        return self.department_codes == code
+
+    def mask(
+        self,
+        department: Optional[str] = None,
+        search: Optional[str] = None,
+        earnings_type: Optional[str] = None
+    ) -> Optional[np.ndarray]:
+        """Boolean row mask for the filters, or None when unfiltered."""
+        mask = None
+
+        if department:
+            mask = self.department_mask(department)
+
+        if search:
+            if self._search_names is None:
+                # Lower-cased search columns (fixed-width unicode for np.char),
+                # built on first search to keep loads fast
+                self._search_titles = np.char.lower(
+                    np.array(['' if t is None else t for t in self.titles], dtype=str)
+                )
+                self._search_names = np.char.lower(self.names.astype(str))
+            needle = search.lower()
+            matches = np.char.find(self._search_names, needle) >= 0
+            title_codes = np.flatnonzero(np.char.find(self._search_titles, needle) >= 0)
+            if len(title_codes):
+                matches |= np.isin(self.title_codes, title_codes)
+            mask = matches if mask is None else mask & matches
+
+        if earnings_type:
+            positive = self.money[earnings_type] > 0
+            mask = positive if mask is None else mask & positive
+
+        return mask
+
+    def rows(self, index: Iterable[int], money_format: str = 'decimal') -> List[Dict[str, Any]]:
+        """Materialize rows as dicts shaped like the SQL result.
+
+        money_format 'text' renders money as '123.45' strings and 'cents' as
+        integer cents instead of Decimals.
+        """
+        departments = self.departments
+        titles = self.titles
+        index = np.asarray(index, dtype=np.int64)
+        money = None
+        if money_format == 'text':
+            money = {col: cents_to_text(self.money[col][index]) for col in MONEY_COLUMNS}
+        elif money_format == 'cents':
+            money = {col: self.money[col][index].tolist() for col in MONEY_COLUMNS}
+        result = []
+        for j, i in enumerate(index.tolist()):
+            dept_code = self.department_codes[i]
+            title_code = self.title_codes[i]
+            row = {
+                'id': int(self.ids[i]),
+                'year': self.year,
+                'name': self.names[i],
+                'department': departments[dept_code] if dept_code >= 0 else None,
+                'title': titles[title_code] if title_code >= 0 else None,
+            }
+            if money is None:
+                for col in MONEY_COLUMNS:
+                    row[col] = cents_to_decimal(self.money[col][i])
+            else:
+                for col in MONEY_COLUMNS:
+                    row[col] = money[col][j]
+            row['zip_code'] = self.zip_codes[i]
+            result.append(row)
+        return result
+
+
+def _fetch_frame() -> pd.DataFrame:
+    """Read the whole table with money converted to integer cents."""
+    money_sql = ",\n".join(f"{money.cents_sql(col)} AS {col}" for col in MONEY_COLUMNS)
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT
+                    id, year, name, department, title, zip_code,
+                    {money_sql}
+                FROM {PAYROLL_NAMED}
+                ORDER BY year, id
+            """)
+            columns = [desc[0] for desc in cur.description]
+            return pd.DataFrame(cur.fetchall(), columns=columns)
+
+
+def _collation_order(tables: Dict[int, YearTable]) -> Optional[pd.Index]:
+    """Every distinct name, department and title, sorted by the database.
+
+    None (codepoint order is kept) if the database can't be reached, e.g.
+    when serving from the archive without one.
+    """
+    values = pd.unique(np.concatenate([
+        np.concatenate([table.names, table.departments, table.titles]) for table in tables.values()
+    ]))
+    values = [value for value in values if value is not None]
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT value FROM unnest(%s::text[]) value ORDER BY value", [values])
+                return pd.Index([row[0] for row in cur.fetchall()])
+    except psycopg2.Error as e:
+        print(f"[WARN] Query engine sorts text in codepoint order, not the database's: {e}")
+        return None
+
+
+def _swap(tables: Dict[int, YearTable], sort_columns: Iterable[str]):
+    global _tables
+    order = _collation_order(tables)
+    for table in tables.values():
+        if order is not None:
+            table.set_collation(order)
+        for column in sort_columns:
+            table.permutation(column)
+    # Swap in one assignment so readers never see a partial load
+    _tables = tables
+
+
+def load(sort_columns: Iterable[str] = ()) -> Dict[int, YearTable]:
+    """(Re)load every year from the database and build sort indexes."""
+    with _load_lock:
+        frame = _fetch_frame()
+        tables = {}
+        for year, year_frame in frame.groupby('year', sort=True):
+            tables[int(year)] = YearTable.from_frame(int(year), year_frame.reset_index(drop=True))
+
+        _swap(tables, sort_columns)
+        print(f"[OK] Query engine loaded {len(frame):,} rows for years {sorted(tables)}")
+        return tables
+
+
+def load_from_archive(archive_dir=None, sort_columns: Iterable[str] = ()) -> Dict[int, YearTable]:
+    """(Re)load every year from the memory-mapped Arrow archive (no database)."""
+    from backend import archive
+
+    archive_dir = archive_dir or archive.ARCHIVE_DIR
+    with _load_lock:
+        tables = {
+            year: YearTable.from_arrow(year, archive.read_year(year, archive_dir))
+            for year in archive.archived_years(archive_dir)
+        }
+        if not tables:
+            raise FileNotFoundError(f"No Arrow archive files in {archive_dir}")
+
+        _swap(tables, sort_columns)
+        rows = sum(table.size for table in tables.values())
+        print(f"[OK] Query engine mapped {rows:,} rows from archive for years {sorted(tables)}")
+        return tables
+
+
+def is_loaded() -> bool:
+    return bool(_tables)
+
+
+def get_table(year: int) -> Optional[YearTable]:
+    return _tables.get(year)
+
+
+def get_available_years() -> List[int]:
+    return sorted(_tables, reverse=True)
+
+
+def get_total_records() -> int:
+    return sum(table.size for table in _tables.values())
+
+
+def get_employees(
+    year: int,
+    department: Optional[str],
+    search: Optional[str],
+    earnings_type: Optional[str],
+    sort_by: str,
+    sort_order: str,
+    limit: int,
+    offset: int,
+    after_id: Optional[int] = None,
+    money_format: str = 'decimal'
+) -> tuple[List[Dict[str, Any]], int, bool]:
+    """Filter, sort and paginate one year. Arguments must be pre-validated.
+
+    With after_id the page starts right after that row in the sort order
+    (cursor pagination) and offset is ignored. Returns (rows, total, has_more).
+    """
+    table = _tables.get(year)
+    if table is None:
+        return [], 0, False
+
+    perm = table.permutation(sort_by)
+    if sort_order == 'desc':
+        perm = perm[::-1]
+
+    if after_id is not None:
+        row = table.row_index(after_id)
+        if row < 0:
+            raise ValueError("Cursor is no longer valid; restart from the first page")
+        position = table.rank(sort_by, row)
+        if sort_order == 'desc':
+            position = table.size - 1 - position
+        perm = perm[position + 1:]
+        offset = 0
+
+    mask = table.mask(department, search, earnings_type)
+    if mask is None:
+        total = table.size
+    else:
+        perm = perm[mask[perm]]
+        total = int(mask.sum())
+
+    end = offset + limit
+    return table.rows(perm[offset:end], money_format), total, len(perm) > end
+
+
+def stream_employees(
+    year: int,
+    department: Optional[str],
+    search: Optional[str],
+    earnings_type: Optional[str],
+    batch_size: int,
+    money_format: str = 'decimal'
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield every matching row ordered by name, batch_size rows at a time."""
+    table = _tables.get(year)
+    if table is None:
+        return
+
+    perm = table.permutation('name')
+    mask = table.mask(department, search, earnings_type)
+    if mask is not None:
+        perm = perm[mask[perm]]
+
+    for start in range(0, len(perm), batch_size):
+        yield table.rows(perm[start:start + batch_size], money_format)
+
+
+def _department_sums(table: YearTable, values: np.ndarray) -> np.ndarray:
+    return np.bincount(
+        table.department_codes[table.department_codes >= 0],
+        weights=values[table.department_codes >= 0],
+        minlength=len(table.departments)
+    ).round().astype(np.int64)
+
+
+def _round_avg(total_cents: int, count: int) -> Decimal:
+    """ROUND(AVG(x), 0) for a column summed in cents."""
+    return (Decimal(int(total_cents)) / count / 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+
+
+def get_departments(year: int) -> List[Dict[str, Any]]:
+    """Department aggregations (named departments only)."""
+    table = _tables.get(year)
+    if table is None:
+        return []
+
+    valid = table.department_codes >= 0
+    counts = np.bincount(table.department_codes[valid], minlength=len(table.departments))
+    totals = _department_sums(table, table.money['total_gross'])
+    overtime = _department_sums(table, table.money['overtime'])
+    detail = _department_sums(table, table.money['detail'])
+
+    departments = []
+    for code in np.argsort(-totals, kind='stable'):
+        name = table.departments[code]
+        count = int(counts[code])
+        if not name or not count:
+            continue
+        departments.append({
+            'name': name,
+            'employee_count': count,
+            'total_earnings': cents_to_decimal(totals[code]),
+            'avg_earnings': _round_avg(totals[code], count),
+            'avg_overtime': _round_avg(overtime[code], count),
+            'total_overtime': cents_to_decimal(overtime[code]),
+            'total_detail': cents_to_decimal(detail[code]),
+        })
+    return departments
+
+
+def get_year_department_sums() -> List[Dict[str, Any]]:
+    """COUNT and SUM of every money column per (year, department), NULL department included."""
+    rows = []
+    for year in sorted(_tables):
+        table = _tables[year]
+        # Shift codes so NULL (-1) gets its own bucket at 0
+        codes = table.department_codes + 1
+        size = len(table.departments) + 1
+        counts = np.bincount(codes, minlength=size)
+        sums = {
+            col: np.bincount(codes, weights=table.money[col], minlength=size).round().astype(np.int64)
+            for col in MONEY_COLUMNS
+        }
+        for code in np.flatnonzero(counts):
+            row = {
+                'year': year,
+                'department': table.departments[code - 1] if code else None,
+                'employee_count': int(counts[code]),
+            }
+            for col in MONEY_COLUMNS:
+                row[col] = cents_to_decimal(sums[col][code])
+            rows.append(row)
+    return rows
+
+
+def _median(table: YearTable, department: Optional[str], gross: np.ndarray) -> Decimal:
+    """Median total_gross from backend.distribution, or computed when it is not built."""
+    from backend import distribution
+
+    if distribution.is_loaded():
+        return money.round_cents(distribution.median(table.year, department))
+    return money.round_cents(float(np.median(gross)) / 100)
+
+
+def _summarize(table: Optional[YearTable], department: Optional[str]) -> Dict[str, Any]:
+    """Count, sums and average of one year (optionally one department)."""
+    if table is None:
+        return {'total_employees': 0}
+
+    index = None
+    if department:
+        index = table.department_mask(department)
+
+    def column(name):
+        values = table.money[name]
+        return values if index is None else values[index]
+
+    gross = column('total_gross')
+    count = len(gross)
+    if not count:
+        return {'total_employees': 0}
+
+    total = int(gross.sum())
+    return {
+        'total_employees': count,
+        'total_payroll': cents_to_decimal(total),
+        'avg_salary': Decimal(total) / count / 100,
+        'median_salary': _median(table, department, gross),
+        'total_overtime': cents_to_decimal(column('overtime').sum()),
+        'total_detail': cents_to_decimal(column('detail').sum()),
+    }
+
+
+def get_stats(year: int, department: Optional[str] = None) -> Dict[str, Any]:
+    """Summary statistics shaped like backend.queries.get_stats."""
+    summary = _summarize(_tables.get(year), department)
+    stats = {
+        'total_employees': summary['total_employees'],
+        'total_payroll': summary.get('total_payroll'),
+        'avg_salary': summary.get('avg_salary'),
+        'median_salary': summary.get('median_salary'),
+        'total_overtime': summary.get('total_overtime'),
+        'total_detail': summary.get('total_detail'),
+    }
+
+    prior = _summarize(_tables.get(year - 1), department)
+    if prior['total_employees']:
+        stats['prior_year_employees'] = prior['total_employees']
+        stats['prior_year_payroll'] = prior['total_payroll']
+        stats['prior_year_avg_salary'] = prior['avg_salary']
+        stats['prior_year_overtime'] = prior['total_overtime']
+    else:
+        stats['prior_year_employees'] = None
+        stats['prior_year_payroll'] = None
+        stats['prior_year_avg_salary'] = None
+        stats['prior_year_overtime'] = None
+
+    if not department:
+        departments = get_departments(year)
+        if departments:
+            stats['top_department'] = departments[0]['name']
+            stats['top_department_total'] = departments[0]['total_earnings']
+        else:
+            stats['top_department'] = None
+            stats['top_department_total'] = 0
+    else:
+        stats['top_department'] = department
+        stats['top_department_total'] = stats['total_payroll']
+
+    stats['year'] = year
+    return stats
+
+
+def get_earnings_breakdown(year: int, department: Optional[str] = None) -> Dict[str, Any]:
+    """Per-component sums, same keys as the SQL breakdown."""
+    table = _tables.get(year)
+    keys = ['regular', 'overtime', 'detail', 'retro', 'other', 'injured', 'quinn_education']
+    if table is None:
+        return {key: None for key in keys}
+
+    index = None
+    if department:
+        index = table.department_mask(department)
+        if not index.any():
+            return {key: None for key in keys}
+
+    breakdown = {}
+    for key in keys:
+        values = table.money[key]
+        breakdown[key] = cents_to_decimal((values if index is None else values[index]).sum())
+    return breakdown
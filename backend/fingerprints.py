@@ -0,0 +1,49 @@
+"""
+Row fingerprints for incremental reloads.
+
+Every payroll_earnings row stores row_hash, a 64-bit hash of its content:
+year, name, department, title, the eight earnings columns in integer cents,
+and zip_code. Loaders hash each source frame (vectorized, with pandas'
+hash_pandas_object) and compare against the hashes already stored for the
+year, so a republished file that matches the table writes nothing, and a
+changed one writes only its new and changed rows (scripts/load_data.py).
+
+The hash is over names, not department_id/title_id, and over cents in
+either money layout, so respreading lookup ids or converting the money
+columns leaves it valid.
+"""
+import numpy as np
+import pandas as pd
+
+from backend.database import MONEY_COLUMNS
+
+KEY_COLUMNS = ['year', 'name', 'department', 'title']
+
+
+def _canonical(df: pd.DataFrame, columns) -> pd.DataFrame:
+    # Missing text (None/NaN) hashes differently from ''
+    frame = pd.DataFrame(index=df.index)
+    for col in columns:
+        frame[col] = df[col].astype('int64' if col == 'year' else object)
+    return frame
+
+
+def _hash(frame: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy().view(np.int64)
+
+
+def row_hashes(df: pd.DataFrame, money_as_cents: bool = False) -> np.ndarray:
+    """int64 content hash of each row of a loader frame (names, not ids).
+
+    Money in df is in dollars, or integer cents with money_as_cents.
+    """
+    frame = _canonical(df, KEY_COLUMNS + ['zip_code'])
+    for col in MONEY_COLUMNS:
+        cents = df[col] if money_as_cents else (df[col].astype(float) * 100).round()
+        frame[col] = cents.astype('int64')
+    return _hash(frame)
+
+
+def key_hashes(df: pd.DataFrame) -> np.ndarray:
+    """int64 hash of each row's unique key (year, name, department, title)."""
+    return _hash(_canonical(df, KEY_COLUMNS))
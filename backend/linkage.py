@@ -0,0 +1,182 @@
+"""
+Cross-year employee linkage.
+
+payroll_earnings has no stable employee id; a row is only unique on (year,
+name, department, title). link_people assigns a person_key to every row:
+
+1. Blocking (vectorized): names are normalized to LAST,FIRST - accents,
+   punctuation, suffixes (Jr, III), middle names and junk such as "N/A"
+   or dates removed - and rows sharing that key form a block.
+2. Blocks with at most one row per year are one person, split only where
+   two rows have conflicting middle initials.
+3. Blocks with several rows in a year (common names) are resolved year by
+   year, attaching each row to the earlier chain it is most similar to:
+   same department, title word overlap, matching middle initial.
+
+The key is a hash of the first row of each chain, so it stays put across
+reloads unless that row changes. Run after loading (scripts/load_data.py
+does) or with python -m backend.linkage.
+"""
+import hashlib
+import io
+import unicodedata
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from backend.database import (
+    get_db_connection,
+    bump_dataset_version,
+    PERSON_KEY_LENGTH,
+    PERSON_KEY_COLUMN_SQL,
+    PERSON_KEY_INDEX_SQL,
+    PAYROLL_NAMED,
+)
+
+SUFFIXES = {'JR', 'SR', 'II', 'III', 'IV', 'V'}
+
+# Minimum similarity to continue a chain inside an ambiguous block
+LINK_THRESHOLD = 0.5
+
+
+def _strip_accents(value: str) -> str:
+    return unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii')
+
+
+def normalize_names(names: pd.Series) -> pd.DataFrame:
+    """Block key (LAST,FIRST) and middle initial for each raw name."""
+    cleaned = (
+        names.fillna('').map(_strip_accents).str.upper()
+        .str.replace(r'\([^)]*\)', ' ', regex=True)      # (Melody)
+        .str.replace(r'\bN/A\b|[0-9/]+', ' ', regex=True)  # N/A, 09/09/1991
+    )
+    parts = cleaned.str.split(',', n=1, expand=True).reindex(columns=[0, 1])
+    last_tokens = parts[0].fillna('').str.replace(r"[.'\-]", '', regex=True).str.split()
+    last = last_tokens.map(lambda tokens: ''.join(t for t in tokens if t not in SUFFIXES))
+    given = parts[1].fillna('').str.replace(r"[.'\-]", ' ', regex=True).str.split()
+    given = given.map(lambda tokens: [t for t in tokens if t not in SUFFIXES])
+    first = given.map(lambda tokens: tokens[0] if tokens else '')
+    middle = given.map(lambda tokens: tokens[1][0] if len(tokens) > 1 else '')
+    return pd.DataFrame({'block': last + ',' + first, 'middle': middle}, index=names.index)
+
+
+def _title_words(title: Optional[str]) -> set:
+    return set(''.join(c if c.isalnum() else ' ' for c in (title or '').upper()).split())
+
+
+def similarity(a: Dict, b: Dict) -> float:
+    """How likely two rows in one block (different years) are the same person."""
+    if a['middle'] and b['middle'] and a['middle'] != b['middle']:
+        return 0.0
+    score = 1.0 if a['department'] and a['department'] == b['department'] else 0.0
+    words_a, words_b = _title_words(a['title']), _title_words(b['title'])
+    if words_a and words_b:
+        score += len(words_a & words_b) / len(words_a | words_b)
+    if a['middle'] and a['middle'] == b['middle']:
+        score += 0.5
+    return score
+
+
+def _resolve_block(rows: List[Dict]) -> List[int]:
+    """Chain number for each row of an ambiguous block (rows sorted by year)."""
+    chains = []  # latest row of each chain
+    assigned = [0] * len(rows)
+    by_year: Dict[int, List[int]] = {}
+    for i, row in enumerate(rows):
+        by_year.setdefault(row['year'], []).append(i)
+
+    for year in sorted(by_year):
+        candidates = sorted(
+            ((similarity(chain, rows[i]), c, i)
+             for c, chain in enumerate(chains) if chain['year'] < year
+             for i in by_year[year]),
+            key=lambda item: -item[0]
+        )
+        used_chains, placed = set(), set()
+        for score, c, i in candidates:
+            if score < LINK_THRESHOLD:
+                break
+            if c in used_chains or i in placed:
+                continue
+            used_chains.add(c)
+            placed.add(i)
+            assigned[i] = c
+            chains[c] = rows[i]
+        for i in by_year[year]:
+            if i not in placed:
+                assigned[i] = len(chains)
+                chains.append(rows[i])
+    return assigned
+
+
+def assign_person_keys(frame: pd.DataFrame) -> pd.Series:
+    """person_key for each row of a frame with id, year, name, department, title."""
+    frame = pd.concat([frame, normalize_names(frame['name'])], axis=1)
+    frame = frame.sort_values(['block', 'year', 'id']).reset_index(drop=True)
+
+    ambiguous = frame.duplicated(['block', 'year'], keep=False)
+    ambiguous = frame['block'].isin(frame.loc[ambiguous, 'block'])
+
+    # Unambiguous blocks: one chain, broken where a middle initial conflicts
+    # with the last one seen (blank initials don't reset it, so A, '', B
+    # breaks). A break starts at a non-empty initial, so the last one seen
+    # in the block is always in the current chain.
+    simple = frame[~ambiguous]
+    initials = simple['middle'].where(simple['middle'] != '')
+    previous = initials.groupby(simple['block']).shift().groupby(simple['block']).ffill().fillna('')
+    breaks = (simple['middle'] != '') & (previous != '') & (simple['middle'] != previous)
+    chain = breaks.groupby(simple['block']).cumsum()
+    frame.loc[~ambiguous, 'chain'] = chain
+
+    for block, rows in frame[ambiguous].groupby('block', sort=False):
+        records = rows[['year', 'middle', 'department', 'title']].to_dict('records')
+        frame.loc[rows.index, 'chain'] = _resolve_block(records)
+
+    # Key each chain by its earliest row (rows are in block, year, id order)
+    seeds = (frame['block'] + '|' + frame['year'].astype(str) + '|' + frame['name'].fillna('')
+             + '|' + frame['department'].fillna('') + '|' + frame['title'].fillna(''))
+    first = frame.groupby(['block', 'chain'], sort=False)['id'].transform(lambda ids: ids.index[0])
+    seeds = seeds.to_numpy()[first.to_numpy()]
+    keys = {seed: hashlib.sha1(seed.encode('utf-8')).hexdigest()[:PERSON_KEY_LENGTH] for seed in set(seeds)}
+    return pd.Series([keys[seed] for seed in seeds], index=frame['id'].to_numpy(), name='person_key')
+
+
+def link_people(cur) -> int:
+    """Recompute person_key for the whole table on cur; returns rows changed."""
+    cur.execute(PERSON_KEY_COLUMN_SQL)
+    cur.execute(PERSON_KEY_INDEX_SQL)
+    cur.execute(f"SELECT id, year, name, department, title FROM {PAYROLL_NAMED}")
+    frame = pd.DataFrame(cur.fetchall(), columns=['id', 'year', 'name', 'department', 'title'])
+    if frame.empty:
+        return 0
+    keys = assign_person_keys(frame)
+
+    cur.execute("CREATE TEMP TABLE person_keys (id INTEGER, person_key VARCHAR(16)) ON COMMIT DROP")
+    buffer = io.StringIO()
+    keys.to_csv(buffer, header=False)
+    buffer.seek(0)
+    cur.copy_expert("COPY person_keys (id, person_key) FROM STDIN WITH (FORMAT csv)", buffer)
+    cur.execute("""
+        UPDATE payroll_earnings p
+        SET person_key = k.person_key
+        FROM person_keys k
+        WHERE p.id = k.id AND p.person_key IS DISTINCT FROM k.person_key
+    """)
+    changed = cur.rowcount
+    print(f"[OK] Linked {len(frame):,} rows into {keys.nunique():,} people ({changed:,} keys changed)")
+    return changed
+
+
+def link() -> int:
+    """Run link_people in its own transaction, bumping the dataset version on change."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SET LOCAL statement_timeout = 0")
+            changed = link_people(cur)
+            if changed:
+                bump_dataset_version(cur)
+    return changed
+
+
+if __name__ == "__main__":
+    link()
@@ -0,0 +1,174 @@
+"""
+Dictionary encoding of department and title.
+
+payroll_earnings stores department_id and title_id, small integer keys into
+the payroll_departments and payroll_titles tables
+(backend.database.LOOKUP_TABLES_SQL), instead of repeating the strings on
+every row. That shrinks the table, its unique key and the department
+indexes, and makes grouping and filtering on department compare integers.
+
+Ids are order-preserving: id order is the database's sort order of the
+names, so ORDER BY department_id / title_id sorts by name and the page
+indexes on the ids serve name-sorted pages without decoding. New names get
+ids in the gap between their neighbours; when a gap is used up every id of
+that table is respread, and ON UPDATE CASCADE carries the change into
+payroll_earnings (rare: gaps start at ~80 for departments and ~900,000 for
+titles).
+
+Loaders encode each frame before writing it: every distinct name in the
+frame is looked up once (new ones are added) and the codes are mapped back
+onto the rows with numpy. Reads that return names select from
+payroll_earnings_named, which joins them back on. Queries filter and seek
+on ids from id_of, an in-process copy of the lookup tables, so the planner
+sees the constant and picks the matching page index.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.database import get_db_connection
+
+# Encoded column -> lookup table (whose key is <column>_id)
+LOOKUPS = {'department': 'payroll_departments', 'title': 'payroll_titles'}
+
+# Largest id of each key type (SMALLINT, INTEGER)
+MAX_IDS = {'department': 2 ** 15 - 1, 'title': 2 ** 31 - 1}
+
+# column -> {name: id}, read once per dataset version (see load); replaced
+# whole, so readers never see it half filled
+_ids: Dict[str, Dict[str, int]] = {}
+
+
+def _spread(rows: List[Tuple[str, Optional[int]]], max_id: int) -> Optional[List[int]]:
+    """Ids for (name, id or None) rows in name order, keeping existing ids.
+
+    New names are spaced evenly in the gap between their neighbours' ids;
+    None if some gap is too small.
+    """
+    ids = [row[1] for row in rows]
+    i = 0
+    while i < len(ids):
+        if ids[i] is not None:
+            i += 1
+            continue
+        end = i
+        while end < len(ids) and ids[end] is None:
+            end += 1
+        low = ids[i - 1] if i else 0
+        high = ids[end] if end < len(ids) else max_id + 1
+        count = end - i
+        if high - low <= count:
+            return None
+        for k in range(count):
+            ids[i + k] = low + (high - low) * (k + 1) // (count + 1)
+        i = end
+    return ids
+
+
+def _add_names(cur, column: str, names: List[str]):
+    """Insert names into column's lookup table, keeping id order equal to name order."""
+    table, key = LOOKUPS[column], f"{column}_id"
+    # One allocator at a time; readers are not blocked
+    cur.execute(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE")
+    cur.execute(f"""
+        SELECT name, id FROM (
+            SELECT {column} AS name, {key} AS id FROM {table}
+            UNION ALL
+            SELECT n, NULL FROM unnest(%s::text[]) n
+            WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {column} = n)
+        ) names
+        ORDER BY name
+    """, [names])
+    rows = cur.fetchall()
+
+    ids = _spread(rows, MAX_IDS[column])
+    if ids is None:
+        # Respread every id; negated first so no new id collides with an old one
+        ids = _spread([(name, None) for name, _ in rows], MAX_IDS[column])
+        moves = [(old, new) for (_, old), new in zip(rows, ids) if old is not None and old != new]
+        cur.execute(f"""
+            UPDATE {table} SET {key} = -m.new
+            FROM unnest(%s::int[], %s::int[]) m(old, new)
+            WHERE {key} = m.old
+        """, [[old for old, _ in moves], [new for _, new in moves]])
+        cur.execute(f"UPDATE {table} SET {key} = -{key} WHERE {key} < 0")
+        print(f"[OK] Respread {len(moves):,} {table} ids")
+
+    new_rows = [(name, new) for (name, old), new in zip(rows, ids) if old is None]
+    cur.execute(f"""
+        INSERT INTO {table} ({column}, {key})
+        SELECT * FROM unnest(%s::text[], %s::int[])
+    """, [[name for name, _ in new_rows], [new for _, new in new_rows]])
+
+
+def lookup_ids(cur, column: str, names: Iterable[str]) -> Dict[str, int]:
+    """{name: id} for names in column's lookup table, adding any that are missing."""
+    table = LOOKUPS[column]
+    names = list(names)
+    select_sql = f"SELECT {column}, {column}_id FROM {table} WHERE {column} = ANY(%s)"
+    cur.execute(select_sql, [names])
+    ids = dict(cur.fetchall())
+    missing = [name for name in names if name not in ids]
+    if missing:
+        _add_names(cur, column, missing)
+        cur.execute(select_sql, [names])
+        ids = dict(cur.fetchall())
+    return ids
+
+
+def load():
+    """Read the lookup tables into the in-process copies id_of serves from.
+
+    The API calls this at startup and whenever the dataset version changes;
+    loaders bump the version when they add names or respread ids.
+    """
+    global _ids
+    ids = {}
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            for column, table in LOOKUPS.items():
+                cur.execute(f"SELECT {column}, {column}_id FROM {table}")
+                ids[column] = dict(cur.fetchall())
+    _ids = ids
+    print(f"[OK] Loaded {len(ids['department']):,} departments, {len(ids['title']):,} titles")
+
+
+def is_loaded() -> bool:
+    """Whether load has run (id_of would otherwise query the database)."""
+    return bool(_ids)
+
+
+def id_of(column: str, name: str) -> Optional[int]:
+    """Id of name in column's lookup table, or None if it has none."""
+    if not _ids:
+        load()
+    return _ids[column].get(name)
+
+
+def encode_frame(cur, frame: pd.DataFrame) -> pd.DataFrame:
+    """Copy of frame with department and title replaced by department_id and title_id.
+
+    Missing names (None/NaN) become NULL ids.
+    """
+    frame = frame.copy()
+    for column in LOOKUPS:
+        codes, names = pd.factorize(frame[column])
+        ids = lookup_ids(cur, column, names)
+        # Code -1 (missing) indexes the trailing placeholder, then is masked
+        id_array = np.array([ids[name] for name in names] + [0], dtype=np.int64)
+        encoded = pd.array(id_array[codes], dtype='Int64')
+        encoded[codes < 0] = pd.NA
+        position = frame.columns.get_loc(column)
+        frame = frame.drop(columns=[column])
+        frame.insert(position, f"{column}_id", encoded)
+    return frame
+
+
+def is_encoded(cur, table: str = 'payroll_earnings') -> bool:
+    """Whether table stores department_id and title_id (not the text columns)."""
+    cur.execute("""
+        SELECT EXISTS (SELECT 1 FROM information_schema.columns
+                       WHERE table_name = %s AND column_name = 'department_id')
+    """, [table])
+    return cur.fetchone()[0]
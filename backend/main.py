@@ -1,34 +1,152 @@
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, Response, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
 from typing import Optional
 import io
 import csv
+import time
 
 from backend.models import (
     EmployeeListResponse,
+    EmployeeHistoryResponse,
     DepartmentsResponse,
     Stats,
     EarningsBreakdown,
     YearsResponse,
-    HealthResponse
+    HealthResponse,
+    SuggestResponse,
+    DashboardResponse,
+    DistributionResponse,
+    TrendsResponse
 )
-from backend.queries import (
+from backend.queries import stream_employees, init_engine, EMPLOYEE_COLUMNS
+from backend.async_queries import (
     get_employees,
     get_departments,
     get_stats,
     get_earnings_breakdown,
+    get_dashboard,
     get_available_years,
-    get_health_check
+    get_health_check,
+    get_trends,
+    get_employee_history
+)
+from backend.async_database import init_async_pool, close_async_pool
+from backend.database import prewarm_pool
+from backend.search import get_suggestions, clear as clear_search_indexes
+from backend import cache
+from backend import distribution
+from backend import lookups
+from backend import money
+from backend import metrics
+from backend import slowlog
+from backend.config import DEBUG_TOKEN
+from backend.serialization import (
+    employee_list_json,
+    employee_columnar_json,
+    employee_arrow,
+    arrow_stream_chunks,
+    negotiate,
+    JSON,
+    COLUMNAR_JSON,
+    ARROW_STREAM,
+    CSV,
+    EMPLOYEE_LIST_TYPES,
+    EXPORT_TYPES
 )
 
 app = FastAPI(
     title="Boston Payroll API",
     description="API for Boston city employee earnings data (2020-2025)",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=metrics.TimedJSONResponse
 )
+# Time endpoints and response model handling for Server-Timing and /metrics
+app.router.route_class = metrics.TimedRoute
+
+# Read endpoints not served from the response cache
+UNCACHED_PATHS = {"/api/health", "/api/export", "/api/debug/slow-queries"}
+
+@app.middleware("http")
+async def response_cache(request: Request, call_next):
+    """Serve repeat GETs from memory and answer If-None-Match with 304."""
+    path = request.url.path
+    if request.method != "GET" or not path.startswith("/api/") or path in UNCACHED_PATHS:
+        return await call_next(request)
+
+    version = await run_in_threadpool(cache.current_version)
+    params = request.query_params.multi_items()
+    media_type = negotiate(request.headers.get("accept"), EMPLOYEE_LIST_TYPES)
+    if media_type != JSON:
+        params.append(("_accept", media_type))
+    key = cache.cache_key(path, params)
+    etag = cache.make_etag(version, key)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        timings = metrics.current()
+        if timings is not None:
+            timings.cache = "not-modified"
+        return Response(status_code=304, headers=headers)
+
+    cached = cache.responses.get(key)
+    if cached is not None and cached.etag == etag:
+        timings = metrics.current()
+        if timings is not None:
+            timings.cache = "hit"
+        return Response(cached.body, media_type=cached.media_type, headers={**dict(cached.headers), **headers})
+
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    media_type = response.media_type or response.headers.get("content-type", "application/json")
+    # Keep the handler's headers; the rebuilt Response sets its own length and type
+    original = tuple((name, value) for name, value in response.headers.items()
+                     if name not in ("content-length", "content-type"))
+    if not cache.is_current(version):
+        # The dataset changed (or is being reloaded) while this ran
+        del headers["ETag"]
+        return Response(body, media_type=media_type, headers={**dict(original), **headers})
+    cache.responses.put(key, cache.CachedResponse(etag, body, media_type, original))
+    return Response(body, media_type=media_type, headers={**dict(original), **headers})
 
-# CORS middleware
+def _route_template(request: Request) -> str:
+    """Route path (e.g. /api/stats) to label metrics with, even for cache hits."""
+    route = request.scope.get("route")
+    if route is None:
+        for candidate in app.router.routes:
+            if candidate.matches(request.scope)[0] == Match.FULL:
+                route = candidate
+                break
+    return route.path if route is not None else "unmatched"
+
+@app.middleware("http")
+async def request_metrics(request: Request, call_next):
+    """Time every request into /metrics and report its phases in Server-Timing."""
+    if request.url.path == "/metrics":
+        return await call_next(request)
+
+    timings, token = metrics.start_request()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        total = time.perf_counter() - start
+        metrics.end_request(token)
+        metrics.registry.observe(_route_template(request), request.method, status, total, timings)
+
+    response.headers["Server-Timing"] = timings.server_timing(total)
+    response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
+# CORS middleware (added last so it wraps cached and 304 responses too)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Restrict in production
@@ -37,6 +155,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def startup():
+    """Open and prewarm both pools, then warm the in-memory query engine (no-op unless QUERY_ENGINE=memory)."""
+    await init_async_pool()
+    await run_in_threadpool(prewarm_pool)
+    await run_in_threadpool(lookups.load)
+    await run_in_threadpool(money.load)
+    await run_in_threadpool(init_engine)
+    await run_in_threadpool(distribution.load)
+    cache.on_version_change(_reload_data)
+    await run_in_threadpool(cache.current_version)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await close_async_pool()
+
+def _reload_data():
+    """Rebuild in-process data after a loader bumps the dataset version."""
+    lookups.load()
+    money.load()
+    init_engine()
+    distribution.load()
+    clear_search_indexes()
+
 @app.get("/")
 def root():
     """Root endpoint for health checks."""
@@ -47,13 +189,19 @@ def health_simple():
     """Simple health check endpoint for Render."""
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Request, database and pool metrics in Prometheus text format."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/health", response_model=HealthResponse)
-def health():
+async def health():
     """Health check endpoint."""
-    return get_health_check()
+    return await get_health_check()
 
 @app.get("/api/employees", response_model=EmployeeListResponse)
-def list_employees(
+async def list_employees(
+    request: Request,
     year: int = Query(default=2025, ge=2020, le=2025),
     department: Optional[str] = Query(default=None),
     search: Optional[str] = Query(default=None),
@@ -61,11 +209,19 @@ def list_employees(
     sort_by: str = Query(default="total_gross"),
     sort_order: str = Query(default="desc", pattern="^(asc|desc)$"),
     limit: int = Query(default=50, ge=1, le=30000),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    reuse_total: bool = Query(default=True, description="Reuse the total carried by the cursor instead of recounting")
 ):
-    """Get employees with filters and pagination."""
+    """Get employees with filters and pagination.
+
+    JSON rows by default; Accept: application/vnd.payroll.columnar+json or
+    application/vnd.apache.arrow.stream returns the same page as columns,
+    with money in integer cents and department/title dictionary-encoded.
+    """
+    media_type = negotiate(request.headers.get("accept"), EMPLOYEE_LIST_TYPES)
     try:
-        data, total = get_employees(
+        data, total, next_cursor = await get_employees(
             year=year,
             department=department,
             search=search,
@@ -73,26 +229,45 @@ def list_employees(
             sort_by=sort_by,
             sort_order=sort_order,
             limit=limit,
-            offset=offset
-        )
-
-        return EmployeeListResponse(
-            data=data,
-            total=total,
-            limit=limit,
             offset=offset,
-            year=year
+            cursor=cursor,
+            reuse_total=reuse_total,
+            money_format='text' if media_type == JSON else 'cents'
         )
+
+        with metrics.phase("serialize"):
+            if media_type == COLUMNAR_JSON:
+                body = employee_columnar_json(EMPLOYEE_COLUMNS, data, total, limit, offset, year, next_cursor)
+            elif media_type == ARROW_STREAM:
+                body = employee_arrow(EMPLOYEE_COLUMNS, data, total=total, limit=limit, offset=offset,
+                                      year=year, next_cursor=next_cursor)
+            else:
+                # Same schema as EmployeeListResponse, without per-row validation
+                body = employee_list_json(data, total, limit, offset, year, next_cursor)
+        return Response(body, media_type=media_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+@app.get("/api/employees/{key}/history", response_model=EmployeeHistoryResponse)
+async def employee_history(key: str):
+    """One person's rows across years; key is a person_key or any of their row ids."""
+    try:
+        history = await get_employee_history(key)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if history is None:
+        raise HTTPException(status_code=404, detail="No employee with that key")
+    return history
+
 @app.get("/api/departments", response_model=DepartmentsResponse)
-def list_departments(
+async def list_departments(
     year: int = Query(default=2025, ge=2020, le=2025)
 ):
     """Get department aggregations."""
     try:
-        departments = get_departments(year=year)
+        departments = await get_departments(year=year)
         return DepartmentsResponse(
             departments=departments,
             year=year
@@ -101,32 +276,92 @@ def list_departments(
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/api/stats", response_model=Stats)
-def get_statistics(
+async def get_statistics(
     year: int = Query(default=2025, ge=2020, le=2025),
     department: Optional[str] = Query(default=None)
 ):
     """Get summary statistics."""
     try:
-        return get_stats(year=year, department=department)
+        return await get_stats(year=year, department=department)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/api/earnings-breakdown", response_model=EarningsBreakdown)
-def earnings_breakdown(
+async def earnings_breakdown(
     year: int = Query(default=2025, ge=2020, le=2025),
     department: Optional[str] = Query(default=None)
 ):
     """Get earnings composition breakdown."""
     try:
-        return get_earnings_breakdown(year=year, department=department)
+        return await get_earnings_breakdown(year=year, department=department)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+@app.get("/api/dashboard", response_model=DashboardResponse)
+async def dashboard(
+    year: int = Query(default=2025, ge=2020, le=2025),
+    department: Optional[str] = Query(default=None)
+):
+    """Stats, department table and earnings breakdown in one request."""
+    try:
+        return await get_dashboard(year=year, department=department)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+@app.get("/api/trends", response_model=TrendsResponse)
+async def trends(
+    department: Optional[str] = Query(default=None),
+    metric: str = Query(default="total_gross", description="Earnings column, e.g. total_gross or overtime")
+):
+    """Per-year headcount, total, mean and median of metric, plus component sums, for every year."""
+    try:
+        return await get_trends(department=department, metric=metric)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+@app.get("/api/distribution", response_model=DistributionResponse)
+async def salary_distribution(
+    year: int = Query(default=2025, ge=2020, le=2025),
+    department: Optional[str] = Query(default=None),
+    component: str = Query(default="total_gross", description="Earnings column, e.g. total_gross or overtime"),
+    percentiles: str = Query(default="10,25,50,75,90", description="Comma-separated, 0-100"),
+    bins: int = Query(default=20, ge=1, le=200)
+):
+    """Percentiles and histogram of an earnings component, from precomputed distributions."""
+    if not distribution.is_loaded():
+        raise HTTPException(status_code=503, detail="Distributions are not loaded")
+    try:
+        points = [float(p) for p in percentiles.split(",") if p.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="percentiles must be comma-separated numbers")
+    try:
+        return distribution.get_distribution(year, department, component, points, bins)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/search/suggest", response_model=SuggestResponse)
+def search_suggest(
+    q: str = Query(min_length=1, max_length=100),
+    year: int = Query(default=2025, ge=2020, le=2025),
+    limit: int = Query(default=10, ge=1, le=50)
+):
+    """Typeahead suggestions for names and titles starting with q."""
+    try:
+        return SuggestResponse(
+            year=year,
+            query=q,
+            suggestions=get_suggestions(year, q, limit)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/api/years", response_model=YearsResponse)
-def list_years():
+async def list_years():
     """Get available years."""
     try:
-        years = get_available_years()
+        years = await get_available_years()
         return YearsResponse(
             years=years,
             default=years[0] if years else 2024
@@ -134,43 +369,65 @@ def list_years():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+@app.get("/api/debug/slow-queries", include_in_schema=False)
+def slow_queries(request: Request, limit: int = Query(default=20, ge=1, le=500)):
+    """Recent slow queries with their EXPLAIN (ANALYZE, BUFFERS) plans, newest first."""
+    if not DEBUG_TOKEN or request.headers.get("x-debug-token") != DEBUG_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {"stats": slowlog.stats(), "queries": slowlog.recent(limit)}
+
+def _csv_chunks(columns, batches):
+    """Render CSV one batch at a time so the response streams."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+def _attachment(year, extension):
+    return {"Content-Disposition": f"attachment; filename=boston_payroll_{year}.{extension}"}
+
 @app.get("/api/export")
 def export_employees(
+    request: Request,
     year: int = Query(default=2025, ge=2020, le=2025),
     department: Optional[str] = Query(default=None),
     search: Optional[str] = Query(default=None),
     earnings_type: Optional[str] = Query(default=None)
 ):
-    """Export filtered employees as CSV."""
+    """Export filtered employees as CSV, or columnar JSON / Arrow per the Accept header."""
+    media_type = negotiate(request.headers.get("accept"), EXPORT_TYPES)
     try:
-        # Get all matching records (no pagination)
-        data, _ = get_employees(
+        # All matching records, fetched in batches from a server-side cursor
+        batches = stream_employees(
             year=year,
             department=department,
             search=search,
             earnings_type=earnings_type,
-            sort_by="name",
-            sort_order="asc",
-            limit=30000,
-            offset=0
+            money_format='decimal' if media_type == CSV else 'cents'
         )
+        # First item is the header; pulling it runs the query so database
+        # errors still become a 500 rather than a truncated download
+        columns = next(batches)
 
-        # Create CSV in memory
-        output = io.StringIO()
-        if data:
-            fieldnames = list(data[0].keys())
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
-
-        # Return as streaming response
-        output.seek(0)
+        if media_type == COLUMNAR_JSON:
+            # One document (dictionaries span all rows), so not streamed
+            rows = [row for batch in batches for row in batch]
+            return Response(employee_columnar_json(columns, rows, total=len(rows), year=year),
+                            media_type=media_type, headers=_attachment(year, "json"))
+        if media_type == ARROW_STREAM:
+            return StreamingResponse(arrow_stream_chunks(columns, batches),
+                                     media_type=media_type, headers=_attachment(year, "arrows"))
         return StreamingResponse(
-            iter([output.getvalue()]),
+            _csv_chunks(columns, batches),
             media_type="text/csv",
-            headers={
-                "Content-Disposition": f"attachment; filename=boston_payroll_{year}.csv"
-            }
+            headers=_attachment(year, "csv")
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
@@ -0,0 +1,302 @@
+"""
+Per-request timing and Prometheus-text metrics for the API.
+
+Each request gets a RequestTimings in a context variable. The timed cursors
+add DB execute and row fetch time (and query/row counts) to it, TimedRoute
+times the endpoint and the response model handling around it, and
+TimedJSONResponse times JSON rendering. The middleware in backend.main turns
+the result into a Server-Timing header and folds it into the per-route
+counters and latency histograms served at /metrics.
+
+Phases of a request:
+    db        cursor.execute (asyncpg: the whole fetch)
+    fetch     building rows from the result (fetchone/fetchmany/fetchall)
+    app       the rest of the endpoint (query building, engine, shaping)
+    validate  response model validation and dumping (FastAPI)
+    serialize rendering the body (JSONResponse, orjson, Arrow)
+
+Queries run concurrently with asyncio.gather add up, so db can exceed the
+wall-clock time of the request.
+"""
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from psycopg2.extensions import cursor as _cursor
+from psycopg2.extras import RealDictCursor
+
+from backend import slowlog
+
+# Latency histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASES = ('db', 'fetch', 'app', 'validate', 'serialize')
+
+
+class RequestTimings:
+    """Seconds and counts accumulated while serving one request."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.queries = 0
+        self.rows = 0
+        self.cache: Optional[str] = None
+
+    def add(self, name: str, seconds: float):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def phases(self) -> Dict[str, float]:
+        """Split the recorded spans into PHASES (seconds)."""
+        s = self.seconds.get
+        db, fetch, serialize = s('db', 0.0), s('fetch', 0.0), s('serialize', 0.0)
+        handler, route, render = s('handler', 0.0), s('route', 0.0), s('render', 0.0)
+        return {
+            'db': db,
+            'fetch': fetch,
+            'app': max(handler - db - fetch - serialize, 0.0),
+            'validate': max(route - handler - render, 0.0),
+            'serialize': serialize + render,
+        }
+
+    def server_timing(self, total: float) -> str:
+        """Server-Timing header value, durations in milliseconds."""
+        if self.cache:
+            parts = [f'cache;desc="{self.cache}"']
+        else:
+            parts = [
+                f'{name};dur={seconds * 1000:.1f}' + (
+                    f';desc="{self.queries} queries, {self.rows} rows"' if name == 'db' else ''
+                )
+                for name, seconds in self.phases().items()
+            ]
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar('request_timings', default=None)
+
+
+def start_request() -> Tuple[RequestTimings, Any]:
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def phase(name: str):
+    """Add the time spent in the block to the current request."""
+    timings = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.add(name, time.perf_counter() - start)
+
+
+def record_query(seconds: float, rows: int = 0, sql: Optional[str] = None, params: Optional[list] = None):
+    """Account one query for drivers without a timed cursor (asyncpg).
+
+    sql/params (psycopg2 %s style) let a slow query be logged and explained.
+    """
+    timings = _current.get()
+    if timings is not None:
+        timings.add('db', seconds)
+        timings.queries += 1
+        timings.rows += rows
+        if sql is not None and slowlog.threshold() and seconds >= slowlog.threshold():
+            slowlog.observe(sql, params, seconds, source='asyncpg')
+
+
+class _TimedMixin:
+    def execute(self, query, vars=None):
+        timings = _current.get()
+        if timings is None:
+            return super().execute(query, vars)
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            elapsed = time.perf_counter() - start
+            timings.add('db', elapsed)
+            timings.queries += 1
+            # Named (server-side) cursors only DECLARE here; their time is in fetch
+            if slowlog.threshold() and elapsed >= slowlog.threshold() and self.name is None:
+                slowlog.observe(query, vars, elapsed)
+
+    def _timed_fetch(self, fetch, *args):
+        timings = _current.get()
+        if timings is None:
+            return fetch(*args)
+        start = time.perf_counter()
+        result = fetch(*args)
+        timings.add('fetch', time.perf_counter() - start)
+        if isinstance(result, list):
+            timings.rows += len(result)
+        elif result is not None:
+            timings.rows += 1
+        return result
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, *([] if size is None else [size]))
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+
+class TimedCursor(_TimedMixin, _cursor):
+    """Tuple cursor that reports to the current request (connection default)."""
+
+
+class TimedRealDictCursor(_TimedMixin, RealDictCursor):
+    """RealDictCursor that reports to the current request."""
+
+
+class TimedJSONResponse(JSONResponse):
+    """Default response class; times rendering as serialize."""
+
+    def render(self, content: Any) -> bytes:
+        with phase('render'):
+            return super().render(content)
+
+
+def _timed_endpoint(endpoint):
+    if asyncio.iscoroutinefunction(endpoint):
+        @wraps(endpoint)
+        async def timed(*args, **kwargs):
+            with phase('handler'):
+                return await endpoint(*args, **kwargs)
+    else:
+        @wraps(endpoint)
+        def timed(*args, **kwargs):
+            with phase('handler'):
+                return endpoint(*args, **kwargs)
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that times the endpoint and the whole route handler.
+
+    The difference (minus rendering) is FastAPI's response model work.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            with phase('route'):
+                return await handler(request)
+        return timed_handler
+
+
+class Registry:
+    """Per-route request counters, latency histograms and phase totals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], list] = {}
+        self.phase_seconds: Dict[Tuple[str, str], float] = {}
+        self.queries: Dict[str, int] = {}
+        self.rows: Dict[str, int] = {}
+        self.cache_hits: Dict[str, int] = {}
+
+    def observe(self, route: str, method: str, status: int, total: float, timings: RequestTimings):
+        with self._lock:
+            key = (route, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            histogram = self.latency.setdefault((route, method), [0] * len(BUCKETS) + [0.0, 0])
+            for i, bound in enumerate(BUCKETS):
+                if total <= bound:
+                    histogram[i] += 1
+            histogram[-2] += total
+            histogram[-1] += 1
+
+            if timings.cache:
+                self.cache_hits[route] = self.cache_hits.get(route, 0) + 1
+                return
+            for name, seconds in timings.phases().items():
+                self.phase_seconds[(route, name)] = self.phase_seconds.get((route, name), 0.0) + seconds
+            self.queries[route] = self.queries.get(route, 0) + timings.queries
+            self.rows[route] = self.rows.get(route, 0) + timings.rows
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            lines += [
+                '# HELP payroll_requests_total Requests served, by route and status.',
+                '# TYPE payroll_requests_total counter',
+            ]
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'payroll_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+
+            lines += [
+                '# HELP payroll_request_duration_seconds Request latency (time to response start).',
+                '# TYPE payroll_request_duration_seconds histogram',
+            ]
+            for (route, method), histogram in sorted(self.latency.items()):
+                labels = f'route="{route}",method="{method}"'
+                for bound, count in zip(BUCKETS, histogram):
+                    lines.append(f'payroll_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'payroll_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram[-1]}')
+                lines.append(f'payroll_request_duration_seconds_sum{{{labels}}} {histogram[-2]:.6f}')
+                lines.append(f'payroll_request_duration_seconds_count{{{labels}}} {histogram[-1]}')
+
+            lines += [
+                '# HELP payroll_request_phase_seconds_total Time spent per phase (db, fetch, app, validate, serialize).',
+                '# TYPE payroll_request_phase_seconds_total counter',
+            ]
+            for (route, name), seconds in sorted(self.phase_seconds.items()):
+                lines.append(f'payroll_request_phase_seconds_total{{route="{route}",phase="{name}"}} {seconds:.6f}')
+
+            for metric, help_text, values in [
+                ('payroll_db_queries_total', 'Database queries issued.', self.queries),
+                ('payroll_db_rows_total', 'Rows fetched from the database.', self.rows),
+                ('payroll_response_cache_hits_total', 'Requests answered from the response cache.', self.cache_hits),
+            ]:
+                lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+                for route, value in sorted(values.items()):
+                    lines.append(f'{metric}{{route="{route}"}} {value}')
+
+        slow = slowlog.stats()
+        lines += [
+            '# HELP payroll_slow_queries_total Queries over SLOW_QUERY_MS, by EXPLAIN outcome.',
+            '# TYPE payroll_slow_queries_total counter',
+        ]
+        for outcome in ['explained', 'sampled_out', 'rate_limited', 'failed']:
+            lines.append(f'payroll_slow_queries_total{{explain="{outcome}"}} {slow[outcome]}')
+
+        from backend.database import get_pool_stats
+        pool_stats = get_pool_stats()
+        if pool_stats:
+            lines += [
+                '# HELP payroll_db_pool Connection pool state (see /api/health).',
+                '# TYPE payroll_db_pool gauge',
+            ]
+            for name, value in pool_stats.items():
+                lines.append(f'payroll_db_pool{{stat="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 from decimal import Decimal
 
 class Employee(BaseModel):
@@ -27,6 +27,12 @@ class EmployeeListResponse(BaseModel):
     limit: int
     offset: int
     year: int
+    next_cursor: Optional[str] = None
+
+class EmployeeHistoryResponse(BaseModel):
+    person_key: str
+    name: str
+    years: List[Employee]
 
 class DepartmentStats(BaseModel):
     name: str
@@ -61,12 +67,73 @@ class EarningsBreakdown(BaseModel):
     breakdown: dict  # {regular: amount, overtime: amount, ...}
     percentages: dict  # {regular: %, overtime: %, ...}
 
+class DashboardResponse(BaseModel):
+    year: int
+    department: Optional[str]
+    stats: Stats
+    departments: List[DepartmentStats]
+    breakdown: EarningsBreakdown
+
+class Suggestion(BaseModel):
+    kind: str  # "name" or "title"
+    value: str
+
+class SuggestResponse(BaseModel):
+    year: int
+    query: str
+    suggestions: List[Suggestion]
+
+class PercentileValue(BaseModel):
+    percentile: float  # 0-100
+    value: float
+
+class HistogramBin(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+class DistributionResponse(BaseModel):
+    year: int
+    department: Optional[str]
+    component: str
+    count: int
+    min: Optional[float]
+    max: Optional[float]
+    mean: Optional[float]
+    percentiles: List[PercentileValue]
+    histogram: List[HistogramBin]
+
+class TrendPoint(BaseModel):
+    year: int
+    employee_count: int
+    total: Decimal
+    mean: Decimal
+    median: Optional[float]
+    components: Dict[str, Decimal]
+
+class TrendsResponse(BaseModel):
+    department: Optional[str]
+    metric: str
+    years: List[TrendPoint]
+
 class YearsResponse(BaseModel):
     years: List[int]
     default: int
 
+class PoolStats(BaseModel):
+    size: int
+    max_size: int
+    idle: int
+    in_use: int
+    checkouts: int
+    exhausted: int
+    timeouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
+
 class HealthResponse(BaseModel):
     status: str
     database: str
     total_records: int
     years_available: List[int]
+    pool: Optional[PoolStats] = None
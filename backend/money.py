@@ -0,0 +1,71 @@
+"""
+Money storage: DECIMAL(12,2) dollars or BIGINT cents.
+
+payroll_earnings stores the eight earnings columns as DECIMAL(12,2) dollars
+by default. Created with MONEY_STORAGE=cents, or converted by
+scripts/migrate_money.py, it stores them as BIGINT cents instead: sums,
+sorts, comparisons and percentiles run on 8-byte integers rather than
+numerics, and the cents readers (memory engine, distributions, columnar
+and Arrow responses, exports) select the columns as they are.
+
+Readers build their money expressions with the helpers here so the same
+queries run on either layout and return the same values; dollars are only
+formatted at the edge (DECIMAL(12,2) text or Decimal, as before). The layout
+is read from the catalog once and again whenever the dataset version
+changes (migrate_money.py bumps it).
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Optional
+
+from backend.database import get_db_connection, get_money_storage
+
+_cents: Optional[bool] = None
+
+
+def load():
+    """Read which layout payroll_earnings uses."""
+    global _cents
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            _cents = get_money_storage(cur) == 'cents'
+
+
+def in_cents() -> bool:
+    """Whether payroll_earnings stores money as BIGINT cents."""
+    if _cents is None:
+        load()
+    return _cents
+
+
+def cents_sql(col: str) -> str:
+    """col as integer cents."""
+    return col if in_cents() else f"ROUND({col} * 100)::bigint"
+
+
+def decimal_sql(col: str) -> str:
+    """col as DECIMAL(12,2) dollars (cents * 0.01 is exact, with 2 places)."""
+    return f"({col} * 0.01)" if in_cents() else col
+
+
+def dollars_sql(expr: str) -> str:
+    """An aggregate of stored money (SUM, PERCENTILE_CONT, ...) in dollars."""
+    return f"({expr}) / 100" if in_cents() else expr
+
+
+def round_cents(dollars: Optional[float]) -> Optional[Decimal]:
+    """A float dollar amount (a PERCENTILE_CONT median) as a 2-place Decimal.
+
+    Read to 15 significant digits first, as Postgres casts float8 to
+    numeric, so 60120.744999999995 (float arithmetic for 60120.745) rounds
+    half up to 60120.75.
+    """
+    if dollars is None:
+        return None
+    return Decimal(f"{dollars:.15g}").quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def to_stored(dollars: Any) -> Any:
+    """A dollar amount (Decimal, or text such as a cursor value) in the stored unit."""
+    if dollars is None or not in_cents():
+        return dollars
+    return int(Decimal(dollars).scaleb(2))
@@ -0,0 +1,124 @@
+"""
+Year partitions of payroll_earnings.
+
+With PARTITION_BY_YEAR (or after scripts/migrate_partitions.py) the table is
+PARTITION BY LIST (year), with one payroll_earnings_<year> table per year.
+Every read filters on year, so Postgres prunes to one partition. Each
+partition has its own indexes, so reloading a year leaves the others alone.
+
+A whole year is replaced by building payroll_earnings_<year>_load aside
+(create_load_table, index_like_parent) while readers keep using the live
+partition, then swap_in detaches and drops the old partition and attaches
+the new one. ATTACH would otherwise scan the table while holding its lock:
+to check the partition bound, and to validate the parent's foreign keys to
+payroll_departments and payroll_titles, which it copies onto the partition.
+index_like_parent therefore adds a CHECK (year = N), which lets ATTACH skip
+the bound scan, and the same foreign keys, added NOT VALID and then
+validated before the swap, which ATTACH adopts as they are. The indexes
+already match the parent's, so ATTACH only links them; the exclusive lock
+is held for catalog changes only.
+"""
+import re
+from typing import Optional
+
+PARENT = 'payroll_earnings'
+
+# "CREATE INDEX name ON ONLY public.payroll_earnings USING ..." from pg_get_indexdef
+_PARENT_INDEX = re.compile(r'^CREATE (UNIQUE )?INDEX \S+ ON ONLY \S+')
+
+
+def partition_name(year: int) -> str:
+    return f"{PARENT}_{int(year)}"
+
+
+def is_partitioned(cur, table: str = PARENT) -> bool:
+    cur.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+        [table]
+    )
+    return cur.fetchone()[0]
+
+
+def _exists(cur, table: str) -> bool:
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL", [table])
+    return cur.fetchone()[0]
+
+
+def ensure_year_partition(cur, year: int, parent: str = PARENT) -> Optional[str]:
+    """Create the partition for year if missing; None when parent is not partitioned."""
+    if not is_partitioned(cur, parent):
+        return None
+    name = partition_name(year)
+    # Checked first: CREATE ... PARTITION OF locks the parent even when it exists
+    if not _exists(cur, name):
+        cur.execute(f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES IN ({int(year)})")
+        print(f"[OK] Created partition {name}")
+    return name
+
+
+def create_load_table(cur, year: int) -> str:
+    """Empty standalone table shaped like the parent, to be filled and swapped in."""
+    table = f"{partition_name(year)}_load"
+    cur.execute(f"DROP TABLE IF EXISTS {table}")
+    cur.execute(f"CREATE TABLE {table} (LIKE {PARENT} INCLUDING DEFAULTS)")
+    return table
+
+
+def index_like_parent(cur, table: str, year: int):
+    """Give table the parent's keys, foreign keys and indexes plus CHECK (year = N), ready to attach."""
+    cur.execute("""
+        SELECT pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype IN ('p', 'u')
+        ORDER BY conname
+    """, [PARENT])
+    for (definition,) in cur.fetchall():
+        cur.execute(f"ALTER TABLE {table} ADD {definition}")
+
+    # NOT VALID takes only a brief lock on the lookup tables; VALIDATE then
+    # checks the rows without blocking their readers or writers
+    cur.execute("""
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f'
+        ORDER BY conname
+    """, [PARENT])
+    for conname, definition in cur.fetchall():
+        suffix = conname[len(PARENT):] if conname.startswith(PARENT) else f"_{conname}"
+        constraint = f"{table}{suffix}"
+        cur.execute(f"ALTER TABLE {table} ADD CONSTRAINT {constraint} {definition} NOT VALID")
+        cur.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}")
+
+    cur.execute("""
+        SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+        WHERE i.indrelid = %s::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+    """, [PARENT])
+    for (definition,) in cur.fetchall():
+        cur.execute(_PARENT_INDEX.sub(lambda m: f"CREATE {m.group(1) or ''}INDEX ON {table}", definition))
+
+    cur.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_year_check CHECK (year = {int(year)})")
+    # Statistics travel with the table, so the planner is ready at attach time
+    cur.execute(f"ANALYZE {table}")
+
+
+def swap_in(cur, table: str, year: int):
+    """Replace year's partition with table (built by index_like_parent) on cur."""
+    name = partition_name(year)
+    if _exists(cur, name):
+        cur.execute(f"ALTER TABLE {PARENT} DETACH PARTITION {name}")
+        cur.execute(f"DROP TABLE {name}")
+
+    cur.execute(f"ALTER TABLE {table} RENAME TO {name}")
+    cur.execute("""
+        SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass
+    """, [name])
+    for (index,) in cur.fetchall():
+        if index.startswith(table):
+            cur.execute(f"ALTER INDEX {index} RENAME TO {name}{index[len(table):]}")
+    cur.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'", [name])
+    for (constraint,) in cur.fetchall():
+        if constraint.startswith(table):
+            cur.execute(f"ALTER TABLE {name} RENAME CONSTRAINT {constraint} TO {name}{constraint[len(table):]}")
+
+    cur.execute(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES IN ({int(year)})")
+    cur.execute(f"ALTER TABLE {name} DROP CONSTRAINT {table}_year_check")
@@ -1,6 +1,117 @@
-from typing import Optional, List, Dict, Any
-from psycopg2.extras import RealDictCursor
-from backend.database import get_db_connection
+import base64
+import hashlib
+import json
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+from backend.metrics import TimedRealDictCursor
+from backend.config import QUERY_ENGINE, ENGINE_SOURCE
+from backend.database import get_db_connection, get_pool_stats, PAYROLL_NAMED, SUMMARY_VIEW, PERSON_KEY_LENGTH
+from backend import engine
+from backend import distribution
+from backend import cache
+from backend import lookups
+from backend import money
+
+VALID_SORT_COLUMNS = ['name', 'department', 'title', 'total_gross', 'overtime', 'regular']
+
+# Valid earnings type columns for filtering
+VALID_EARNINGS_TYPES = ['regular', 'overtime', 'detail', 'retro', 'other', 'injured', 'quinn_education']
+
+EMPLOYEE_COLUMNS = [
+    'id', 'year', 'name', 'department', 'title',
+    'regular', 'retro', 'other', 'overtime', 'injured', 'detail',
+    'quinn_education', 'total_gross', 'zip_code',
+]
+
+MONEY_COLUMNS = [
+    'regular', 'retro', 'other', 'overtime', 'injured', 'detail',
+    'quinn_education', 'total_gross',
+]
+
+BREAKDOWN_COLUMNS = ['regular', 'overtime', 'detail', 'retro', 'other', 'injured', 'quinn_education']
+
+# department and title are stored as ids (backend.lookups). Filters and
+# cursors resolve a name to its id up front, so the planner sees a constant
+# and the (year, department_id, ...) indexes apply; sorts use the ids, which
+# are in name order.
+SORT_KEYS = {'department': 'department_id', 'title': 'title_id'}
+
+# Sort columns that need special handling in cursor (seek) predicates
+MONEY_SORT_COLUMNS = ['total_gross', 'overtime', 'regular']
+NULLABLE_SORT_COLUMNS = ['department', 'title']
+
+def init_engine():
+    """Load the in-memory query engine when QUERY_ENGINE=memory."""
+    if QUERY_ENGINE != 'memory':
+        return
+    if ENGINE_SOURCE == 'archive':
+        engine.load_from_archive(sort_columns=VALID_SORT_COLUMNS)
+    else:
+        engine.load(sort_columns=VALID_SORT_COLUMNS)
+
+def _filter_signature(year, department, search, earnings_type) -> str:
+    """Short hash identifying a filter combination (bound into cursors)."""
+    raw = json.dumps([year, department or None, search or None, earnings_type or None])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, row_id: int,
+                  signature: str, total: int) -> str:
+    """Opaque token for the row after (value, id) in the given ordering."""
+    payload = {
+        's': sort_by,
+        'o': sort_order,
+        'k': [str(value) if isinstance(value, Decimal) else value, row_id],
+        'f': signature,
+        't': total,
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token: str, sort_by: str, sort_order: str, signature: str) -> Dict[str, Any]:
+    """Decode and check a cursor against the current request. Raises ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        value, row_id = payload['k']
+        cursor = {
+            'sort_by': payload['s'],
+            'sort_order': payload['o'],
+            'value': value,
+            'id': int(row_id),
+            'signature': payload['f'],
+            'total': payload.get('t'),
+        }
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if (cursor['sort_by'], cursor['sort_order'], cursor['signature']) != (sort_by, sort_order, signature):
+        raise ValueError("Cursor does not match the current filters or sort order")
+    return cursor
+
+def _seek_clause(sort_by: str, sort_order: str, value: Any, row_id: int) -> tuple[str, list]:
+    """Row-comparison predicate for rows after (value, id) in ORDER BY sort_by, id."""
+    op = '>' if sort_order == 'asc' else '<'
+    placeholder = '%s'
+    column = SORT_KEYS.get(sort_by, sort_by)
+    if sort_by in SORT_KEYS and value is not None:
+        value = lookups.id_of(sort_by, value)
+    elif sort_by in MONEY_SORT_COLUMNS:
+        # Cursors carry dollars whatever the storage
+        value = money.to_stored(value)
+        if not money.in_cents():
+            placeholder = '%s::numeric'
+
+    if sort_by not in NULLABLE_SORT_COLUMNS:
+        return f"({column}, id) {op} ({placeholder}, %s)", [value, row_id]
+
+    # NULLs sort last ascending and first descending
+    if value is None:
+        if sort_order == 'asc':
+            return f"({column} IS NULL AND id > %s)", [row_id]
+        return f"(({column} IS NULL AND id < %s) OR {column} IS NOT NULL)", [row_id]
+    if sort_order == 'asc':
+        return f"(({column}, id) > (%s, %s) OR {column} IS NULL)", [value, row_id]
+    return f"({column}, id) < (%s, %s)", [value, row_id]
 
 def get_employees(
     year: int = 2024,
@@ -10,13 +121,23 @@ def get_employees(
     sort_by: str = "total_gross",
     sort_order: str = "desc",
     limit: int = 50,
-    offset: int = 0
-) -> tuple[List[Dict[str, Any]], int]:
-    """Get employees with filters, sorting, and pagination."""
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    reuse_total: bool = True,
+    money_format: str = 'decimal'
+) -> tuple[List[Dict[str, Any]], int, Optional[str]]:
+    """Get employees with filters, sorting, and pagination.
+
+    Pages can be addressed by offset or by an opaque cursor from a previous
+    page's next_cursor. A cursor seeks past the last (sort value, id) it saw,
+    so deep pages cost the same as the first; offset is ignored with a cursor.
+    money_format 'text' returns money as '123.45' strings and 'cents' as
+    integer cents (see backend.serialization); the default is Decimal.
+    Returns (rows, total, next_cursor).
+    """
 
     # Validate inputs
-    valid_sort_columns = ['name', 'department', 'title', 'total_gross', 'overtime', 'regular']
-    if sort_by not in valid_sort_columns:
+    if sort_by not in VALID_SORT_COLUMNS:
         sort_by = 'total_gross'
 
     if sort_order not in ['asc', 'desc']:
@@ -25,206 +146,466 @@ def get_employees(
     if limit > 30000:
         limit = 30000
 
-    # Valid earnings type columns for filtering
-    valid_earnings_types = ['regular', 'overtime', 'detail', 'retro', 'other', 'injured', 'quinn_education']
-
+    if earnings_type not in VALID_EARNINGS_TYPES:
+        earnings_type = None
+
+    signature = _filter_signature(year, department, search, earnings_type)
+    seek = decode_cursor(cursor, sort_by, sort_order, signature) if cursor else None
+    cached_total = seek['total'] if seek and reuse_total else None
+
+    if engine.is_loaded():
+        data, total, has_more = engine.get_employees(
+            year, department, search, earnings_type,
+            sort_by, sort_order, limit, offset,
+            after_id=seek['id'] if seek else None,
+            money_format=money_format
+        )
+    else:
+        data, total, has_more = _query_employees(
+            year, department, search, earnings_type,
+            sort_by, sort_order, limit, offset, seek, cached_total, money_format
+        )
+
+    next_cursor = None
+    if has_more and data:
+        last = data[-1]
+        next_cursor = encode_cursor(sort_by, sort_order, _cursor_value(last, sort_by, money_format),
+                                    last['id'], signature, total)
+
+    return data, total, next_cursor
+
+def _cursor_value(row: Dict[str, Any], sort_by: str, money_format: str) -> Any:
+    """Sort value for a cursor; cents go back to dollars so cursors work in any format."""
+    value = row[sort_by]
+    if money_format == 'cents' and sort_by in MONEY_COLUMNS and value is not None:
+        return Decimal(value).scaleb(-2)
+    return value
+
+def _escape_like(text: str) -> str:
+    """Escape LIKE wildcards so user input matches literally."""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _employee_filters(year, department, search, earnings_type) -> tuple[str, list]:
+    """Build the WHERE clause shared by the employee list and export.
+
+    It uses payroll_earnings columns only, so it applies to the table (page
+    counts) and to payroll_earnings_named (pages) alike.
+    """
+    where_clauses = ["year = %s"]
+    params = [year]
+
+    if department:
+        where_clauses.append("department_id = %s")
+        params.append(lookups.id_of('department', department))
+
+    if search:
+        # name is served by its pg_trgm GIN index; titles are matched in the
+        # payroll_titles table (a few thousand rows) and then by title_id
+        where_clauses.append("(name ILIKE %s OR title_id IN (SELECT title_id FROM payroll_titles WHERE title ILIKE %s))")
+        search_param = f"%{_escape_like(search)}%"
+        params.extend([search_param, search_param])
+
+    # Filter by earnings type (employees with non-zero values in that category)
+    if earnings_type:
+        where_clauses.append(f"{earnings_type} > 0")
+
+    return " AND ".join(where_clauses), params
+
+def _money_select(col: str, money_format: str) -> str:
+    if money_format == 'cents':
+        return f"{money.cents_sql(col)} AS {col}"
+    if money_format == 'text':
+        return f"{money.decimal_sql(col)}::text AS {col}"
+    return f"{money.decimal_sql(col)} AS {col}"
+
+def _employee_select(money_format: str = 'decimal') -> str:
+    """Select list for employee rows with money as Decimal, text or cents."""
+    return ", ".join(
+        _money_select(col, money_format) if col in MONEY_COLUMNS else col
+        for col in EMPLOYEE_COLUMNS
+    )
+
+def _employee_page_sql(where_sql: str, sort_by: str, sort_order: str, money_format: str = 'decimal') -> str:
+    """One page of employees; takes LIMIT and OFFSET as the last two params.
+
+    ORDER BY sort_by, id matches the (year, [department_id,] sort_by, id)
+    page indexes (department and title by id), so the first rows are read
+    in order with no sort step and only those are decoded. It is qualified
+    so it sorts the column, not a ::text alias.
+    """
+    return f"""
+        SELECT
+            {_employee_select(money_format)}
+        FROM {PAYROLL_NAMED}
+        WHERE {where_sql}
+        ORDER BY {PAYROLL_NAMED}.{SORT_KEYS.get(sort_by, sort_by)} {sort_order}, id {sort_order}
+        LIMIT %s OFFSET %s
+    """
+
+def _query_employees(year, department, search, earnings_type, sort_by, sort_order,
+                     limit, offset, seek, cached_total, money_format='decimal'):
     with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            # Build WHERE clause
-            where_clauses = ["year = %s"]
-            params = [year]
-
-            if department:
-                where_clauses.append("department = %s")
-                params.append(department)
-
-            if search:
-                where_clauses.append("(name ILIKE %s OR title ILIKE %s)")
-                search_param = f"%{search}%"
-                params.extend([search_param, search_param])
-
-            # Filter by earnings type (employees with non-zero values in that category)
-            if earnings_type and earnings_type in valid_earnings_types:
-                where_clauses.append(f"{earnings_type} > 0")
+        with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
+            where_sql, params = _employee_filters(year, department, search, earnings_type)
 
-            where_sql = " AND ".join(where_clauses)
+            # Get total count (a cursor carries the total of its first page)
+            if cached_total is not None:
+                total = cached_total
+            else:
+                count_sql = f"SELECT COUNT(*) FROM payroll_earnings WHERE {where_sql}"
+                cur.execute(count_sql, params)
+                total = cur.fetchone()['count']
+
+            if seek:
+                seek_sql, seek_params = _seek_clause(sort_by, sort_order, seek['value'], seek['id'])
+                where_sql += f" AND {seek_sql}"
+                params.extend(seek_params)
+                offset = 0
+
+            # Get data (one extra row tells us whether another page exists)
+            params.extend([limit + 1, offset])
+            cur.execute(_employee_page_sql(where_sql, sort_by, sort_order, money_format), params)
+            data = cur.fetchall()
 
-            # Get total count
-            count_sql = f"SELECT COUNT(*) FROM payroll_earnings WHERE {where_sql}"
-            cur.execute(count_sql, params)
-            total = cur.fetchone()['count']
+            # RealDictRow is a dict; the fast paths hand rows over uncopied
+            rows = data[:limit] if money_format != 'decimal' else [dict(row) for row in data[:limit]]
+            return rows, total, len(data) > limit
 
-            # Get data
-            data_sql = f"""
+def stream_employees(
+    year: int = 2024,
+    department: Optional[str] = None,
+    search: Optional[str] = None,
+    earnings_type: Optional[str] = None,
+    batch_size: int = 2000,
+    money_format: str = 'decimal'
+) -> Iterator[Any]:
+    """Stream every matching employee, ordered by name.
+
+    Yields the column names first (by which point the query is running, so
+    errors surface before any response is sent), then lists of row tuples
+    fetched in batches from a server-side cursor. No row cap. money_format
+    is as for get_employees.
+    """
+    if earnings_type not in VALID_EARNINGS_TYPES:
+        earnings_type = None
+
+    if engine.is_loaded():
+        yield list(EMPLOYEE_COLUMNS)
+        for rows in engine.stream_employees(year, department, search, earnings_type,
+                                            batch_size, money_format):
+            yield [tuple(row[col] for col in EMPLOYEE_COLUMNS) for row in rows]
+        return
+
+    where_sql, params = _employee_filters(year, department, search, earnings_type)
+    with get_db_connection() as conn:
+        # Named cursor = server-side; rows arrive batch_size at a time
+        with conn.cursor(name='payroll_export') as cur:
+            cur.itersize = batch_size
+            cur.execute(f"""
                 SELECT
-                    id, year, name, department, title,
-                    regular, retro, other, overtime, injured, detail,
-                    quinn_education, total_gross, zip_code
-                FROM payroll_earnings
+                    {_employee_select(money_format)}
+                FROM {PAYROLL_NAMED}
                 WHERE {where_sql}
-                ORDER BY {sort_by} {sort_order}
-                LIMIT %s OFFSET %s
-            """
-            params.extend([limit, offset])
-            cur.execute(data_sql, params)
-            data = cur.fetchall()
-
-            return [dict(row) for row in data], total
+                ORDER BY {PAYROLL_NAMED}.name ASC, id ASC
+            """, params)
+
+            yield list(EMPLOYEE_COLUMNS)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+# Aggregates read payroll_dept_year_summary (backend.database): a few
+# hundred precomputed rows per year instead of every employee row
+DEPARTMENTS_SQL = f"""
+    SELECT
+        department as name,
+        employee_count,
+        total_gross as total_earnings,
+        ROUND(avg_total_gross, 0) as avg_earnings,
+        ROUND(avg_overtime, 0) as avg_overtime,
+        overtime as total_overtime,
+        detail as total_detail
+    FROM {SUMMARY_VIEW}
+    WHERE year = %s AND NOT is_year_total AND department IS NOT NULL AND department != ''
+    ORDER BY total_earnings DESC
+"""
+
+TOP_DEPARTMENT_SQL = f"""
+    SELECT department as name, total_gross as total
+    FROM {SUMMARY_VIEW}
+    WHERE year = %s AND NOT is_year_total AND department IS NOT NULL AND department != ''
+    ORDER BY total_gross DESC
+    LIMIT 1
+"""
+
+def _summary_filter(years: List[int], department: Optional[str]) -> tuple[str, list]:
+    """WHERE clause for the summary rows of a department, or the year totals."""
+    where_sql = f"year IN ({', '.join(['%s'] * len(years))})"
+    if department:
+        return f"{where_sql} AND NOT is_year_total AND department = %s", list(years) + [department]
+    return f"{where_sql} AND is_year_total", list(years)
+
+def _stats_sql(year: int, department: Optional[str]) -> tuple[str, list]:
+    """Totals for year and year - 1 (one summary row each, if any rows)."""
+    where_sql, params = _summary_filter([year, year - 1], department)
+    return f"""
+        SELECT
+            year,
+            employee_count as total_employees,
+            total_gross as total_payroll,
+            avg_total_gross as avg_salary,
+            overtime as total_overtime,
+            detail as total_detail
+        FROM {SUMMARY_VIEW}
+        WHERE {where_sql}
+    """, params
+
+def _median_sql(year: int, department: Optional[str]) -> tuple[str, list]:
+    """PERCENTILE_CONT median of total_gross, for when backend.distribution is not built."""
+    where_sql = "year = %s AND department_id = %s" if department else "year = %s"
+    return f"""
+        SELECT {money.dollars_sql("PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY total_gross)")} as median
+        FROM payroll_earnings
+        WHERE {where_sql}
+    """, [year, lookups.id_of('department', department)] if department else [year]
+
+def _stats_response(year: int, department: Optional[str], rows: List[Dict[str, Any]],
+                    median: Any, top_dept: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Stats payload from the _stats_sql rows, median and top department."""
+    by_year = {row['year']: row for row in rows}
+    current = by_year.get(year)
+    prior = by_year.get(year - 1)
+
+    if current:
+        stats = {key: current[key] for key in
+                 ['total_employees', 'total_payroll', 'avg_salary', 'total_overtime', 'total_detail']}
+    else:
+        # Same as aggregating no rows: a zero count and NULL sums
+        stats = {'total_employees': 0, 'total_payroll': None, 'avg_salary': None,
+                 'total_overtime': None, 'total_detail': None}
+    stats['median_salary'] = money.round_cents(median)
+
+    stats['prior_year_employees'] = prior['total_employees'] if prior else None
+    stats['prior_year_payroll'] = prior['total_payroll'] if prior else None
+    stats['prior_year_avg_salary'] = prior['avg_salary'] if prior else None
+    stats['prior_year_overtime'] = prior['total_overtime'] if prior else None
+
+    if department:
+        stats['top_department'] = department
+        stats['top_department_total'] = stats['total_payroll']
+    elif top_dept:
+        stats['top_department'] = top_dept['name']
+        stats['top_department_total'] = top_dept['total']
+    else:
+        stats['top_department'] = None
+        stats['top_department_total'] = 0
+
+    stats['year'] = year
+    return stats
 
 def get_departments(year: int = 2024) -> List[Dict[str, Any]]:
     """Get department aggregations."""
+    if engine.is_loaded():
+        return engine.get_departments(year)
+
     with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            sql = """
-                SELECT
-                    department as name,
-                    COUNT(*) as employee_count,
-                    SUM(total_gross) as total_earnings,
-                    ROUND(AVG(total_gross), 0) as avg_earnings,
-                    ROUND(AVG(overtime), 0) as avg_overtime,
-                    SUM(overtime) as total_overtime,
-                    SUM(detail) as total_detail
-                FROM payroll_earnings
-                WHERE year = %s AND department IS NOT NULL AND department != ''
-                GROUP BY department
-                ORDER BY total_earnings DESC
-            """
-            cur.execute(sql, (year,))
+        with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
+            cur.execute(DEPARTMENTS_SQL, (year,))
             return [dict(row) for row in cur.fetchall()]
 
 def get_stats(year: int = 2024, department: Optional[str] = None) -> Dict[str, Any]:
-    """Get summary statistics."""
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            # Build WHERE clause
-            where_sql = "year = %s"
-            params = [year]
+    """Get summary statistics, with the prior year for comparison."""
+    if engine.is_loaded():
+        return engine.get_stats(year, department)
 
-            if department:
-                where_sql += " AND department = %s"
-                params.append(department)
-
-            # Main stats
-            sql = f"""
-                SELECT
-                    COUNT(*) as total_employees,
-                    SUM(total_gross) as total_payroll,
-                    AVG(total_gross) as avg_salary,
-                    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY total_gross) as median_salary,
-                    SUM(overtime) as total_overtime,
-                    SUM(detail) as total_detail
-                FROM payroll_earnings
-                WHERE {where_sql}
-            """
-            cur.execute(sql, params)
-            stats = dict(cur.fetchone())
-
-            # Get prior year stats for comparison
-            prior_year = year - 1
-            prior_where_sql = "year = %s"
-            prior_params = [prior_year]
-
-            if department:
-                prior_where_sql += " AND department = %s"
-                prior_params.append(department)
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
+            cur.execute(*_stats_sql(year, department))
+            rows = cur.fetchall()
 
-            prior_sql = f"""
-                SELECT
-                    COUNT(*) as total_employees,
-                    SUM(total_gross) as total_payroll,
-                    AVG(total_gross) as avg_salary,
-                    SUM(overtime) as total_overtime
-                FROM payroll_earnings
-                WHERE {prior_where_sql}
-            """
-            cur.execute(prior_sql, prior_params)
-            prior_stats = cur.fetchone()
-
-            if prior_stats and prior_stats['total_employees']:
-                stats['prior_year_employees'] = prior_stats['total_employees']
-                stats['prior_year_payroll'] = prior_stats['total_payroll']
-                stats['prior_year_avg_salary'] = prior_stats['avg_salary']
-                stats['prior_year_overtime'] = prior_stats['total_overtime']
+            # The median is a lookup once distributions are built
+            if distribution.is_loaded():
+                median = distribution.median(year, department)
             else:
-                stats['prior_year_employees'] = None
-                stats['prior_year_payroll'] = None
-                stats['prior_year_avg_salary'] = None
-                stats['prior_year_overtime'] = None
+                cur.execute(*_median_sql(year, department))
+                median = cur.fetchone()['median']
 
-            # Top department (if not filtering by department)
+            top_dept = None
             if not department:
-                top_dept_sql = """
-                    SELECT
-                        department as name,
-                        SUM(total_gross) as total
-                    FROM payroll_earnings
-                    WHERE year = %s AND department IS NOT NULL AND department != ''
-                    GROUP BY department
-                    ORDER BY total DESC
-                    LIMIT 1
-                """
-                cur.execute(top_dept_sql, (year,))
+                cur.execute(TOP_DEPARTMENT_SQL, (year,))
                 top_dept = cur.fetchone()
 
-                if top_dept:
-                    stats['top_department'] = top_dept['name']
-                    stats['top_department_total'] = top_dept['total']
-                else:
-                    stats['top_department'] = None
-                    stats['top_department_total'] = 0
-            else:
-                stats['top_department'] = department
-                stats['top_department_total'] = stats['total_payroll']
-
-            stats['year'] = year
-            return stats
+    return _stats_response(year, department, rows, median, top_dept)
 
 def get_earnings_breakdown(year: int = 2024, department: Optional[str] = None) -> Dict[str, Any]:
     """Get earnings composition breakdown."""
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            where_sql = "year = %s"
-            params = [year]
+    if engine.is_loaded():
+        return _breakdown_response(year, engine.get_earnings_breakdown(year, department))
 
-            if department:
-                where_sql += " AND department = %s"
-                params.append(department)
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
+            cur.execute(*_breakdown_sql(year, department))
+            row = cur.fetchone()
+            # No rows: NULL sums, as SUM over nothing
+            return _breakdown_response(year, dict(row) if row else {col: None for col in BREAKDOWN_COLUMNS})
+
+def _breakdown_sql(year: int, department: Optional[str]) -> tuple[str, list]:
+    where_sql, params = _summary_filter([year], department)
+    return f"SELECT {', '.join(BREAKDOWN_COLUMNS)} FROM {SUMMARY_VIEW} WHERE {where_sql}", params
+
+def _breakdown_response(year: int, breakdown: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach percentages to per-component earnings sums."""
+    # Calculate total
+    total = sum(float(v) for v in breakdown.values() if v)
+
+    # Calculate percentages
+    percentages = {}
+    if total > 0:
+        for key, value in breakdown.items():
+            if value:
+                percentages[key] = round((float(value) / total) * 100, 1)
+            else:
+                percentages[key] = 0.0
+
+    return {
+        'year': year,
+        'breakdown': breakdown,
+        'percentages': percentages
+    }
+
+DASHBOARD_SQL = f"""
+    SELECT year, department, employee_count, total_gross, {', '.join(BREAKDOWN_COLUMNS)}{{median}}
+    FROM {SUMMARY_VIEW}
+    WHERE year IN (%s, %s) AND NOT is_year_total
+"""
+
+def _dashboard_sql(year: int, department: Optional[str]) -> tuple[str, list]:
+    """DASHBOARD_SQL, with the median as a column when backend.distribution is not built.
+
+    The median subquery is uncorrelated, so Postgres runs it once (an
+    InitPlan) within the same statement.
+    """
+    if distribution.is_loaded():
+        return DASHBOARD_SQL.format(median=""), [year, year - 1]
+    median_sql, median_params = _median_sql(year, department)
+    return DASHBOARD_SQL.format(median=f", ({median_sql}) AS median"), median_params + [year, year - 1]
+
+def get_dashboard(year: int = 2024, department: Optional[str] = None) -> Dict[str, Any]:
+    """Stats, prior-year comparison, department table and earnings breakdown.
+
+    Everything the dashboard needs for one year/department selection, from
+    one statement over the summary rows of the selected and prior year (see
+    _dashboard_sql for the median).
+    """
+    if engine.is_loaded():
+        stats = engine.get_stats(year, department)
+        breakdown = engine.get_earnings_breakdown(year, department)
+        if not stats['total_employees']:
+            # Same zero-filled shape as the SQL path below
+            for key in ['total_payroll', 'avg_salary', 'median_salary', 'total_overtime',
+                        'total_detail', 'top_department_total']:
+                stats[key] = Decimal(0)
+            breakdown = {col: Decimal(0) for col in BREAKDOWN_COLUMNS}
+        return {
+            'year': year,
+            'department': department,
+            'stats': stats,
+            'departments': engine.get_departments(year),
+            'breakdown': _breakdown_response(year, breakdown),
+        }
 
-            sql = f"""
-                SELECT
-                    SUM(regular) as regular,
-                    SUM(overtime) as overtime,
-                    SUM(detail) as detail,
-                    SUM(retro) as retro,
-                    SUM(other) as other,
-                    SUM(injured) as injured,
-                    SUM(quinn_education) as quinn_education
-                FROM payroll_earnings
-                WHERE {where_sql}
-            """
-            cur.execute(sql, params)
-            breakdown = dict(cur.fetchone())
-
-            # Calculate total
-            total = sum(float(v) for v in breakdown.values() if v)
-
-            # Calculate percentages
-            percentages = {}
-            if total > 0:
-                for key, value in breakdown.items():
-                    if value:
-                        percentages[key] = round((float(value) / total) * 100, 1)
-                    else:
-                        percentages[key] = 0.0
-
-            return {
-                'year': year,
-                'breakdown': breakdown,
-                'percentages': percentages
-            }
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
+            # Per-(year, department) summary rows; year totals are rolled up
+            # in _dashboard_response
+            cur.execute(*_dashboard_sql(year, department))
+            rows = cur.fetchall()
+    return _dashboard_response(year, department, rows)
+
+def _dashboard_response(year: int, department: Optional[str],
+                        rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Roll per-(year, department) sums up into the dashboard payload."""
+    sum_columns = ['employee_count', 'total_gross'] + BREAKDOWN_COLUMNS
+    groups = {}
+    departments = []
+    for row in rows:
+        key = (row['year'], None)
+        rollup = groups.setdefault(key, {col: 0 for col in sum_columns})
+        for col in sum_columns:
+            rollup[col] += row[col] or 0
+
+        groups[(row['year'], row['department'])] = row
+        if row['year'] == year and row['department']:
+            count = row['employee_count']
+            departments.append({
+                'name': row['department'],
+                'employee_count': count,
+                'total_earnings': row['total_gross'],
+                'avg_earnings': _round_avg(row['total_gross'], count),
+                'avg_overtime': _round_avg(row['overtime'], count),
+                'total_overtime': row['overtime'],
+                'total_detail': row['detail'],
+            })
+    departments.sort(key=lambda d: d['total_earnings'], reverse=True)
+
+    current = groups.get((year, department or None))
+    prior = groups.get((year - 1, department or None))
+
+    # A department with no rows this year reports zeros rather than NULLs
+    empty = {col: Decimal(0) for col in sum_columns}
+    empty['employee_count'] = 0
+    selected = current or empty
+
+    stats = {
+        'year': year,
+        'total_employees': selected['employee_count'],
+        'total_payroll': selected['total_gross'],
+        'avg_salary': selected['total_gross'] / selected['employee_count'] if current else Decimal(0),
+        'median_salary': _dashboard_median(year, department, rows) if current else 0,
+        'total_overtime': selected['overtime'],
+        'total_detail': selected['detail'],
+        'prior_year_employees': prior['employee_count'] if prior else None,
+        'prior_year_payroll': prior['total_gross'] if prior else None,
+        'prior_year_avg_salary': prior['total_gross'] / prior['employee_count'] if prior else None,
+        'prior_year_overtime': prior['overtime'] if prior else None,
+    }
+    if department:
+        stats['top_department'] = department
+        stats['top_department_total'] = stats['total_payroll']
+    elif departments:
+        stats['top_department'] = departments[0]['name']
+        stats['top_department_total'] = departments[0]['total_earnings']
+    else:
+        stats['top_department'] = None
+        stats['top_department_total'] = 0
+
+    breakdown = {col: selected[col] for col in BREAKDOWN_COLUMNS}
+
+    return {
+        'year': year,
+        'department': department,
+        'stats': stats,
+        'departments': departments,
+        'breakdown': _breakdown_response(year, breakdown),
+    }
+
+def _dashboard_median(year: int, department: Optional[str], rows: List[Dict[str, Any]]) -> Any:
+    # Every row carries the same median column when the SQL computed it
+    if rows and 'median' in rows[0]:
+        return money.round_cents(rows[0]['median'])
+    return money.round_cents(distribution.median(year, department))
+
+def _round_avg(total: Decimal, count: int) -> Decimal:
+    """ROUND(AVG(x), 0) from a sum and a count."""
+    return (total / count).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
 
 def get_available_years() -> List[int]:
     """Get list of available years in database."""
+    if engine.is_loaded():
+        return engine.get_available_years()
+
     with get_db_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("""
@@ -234,6 +615,150 @@ def get_available_years() -> List[int]:
             """)
             return [row[0] for row in cur.fetchall()]
 
+# Per-(year, department) counts and sums behind get_trends, one entry for
+# the current dataset version
+_trend_sums: Dict[str, List[Dict[str, Any]]] = {}
+# {(metric, department): {year: median}} for get_trends without
+# backend.distribution, one entry for the current dataset version
+_trend_medians: Dict[str, Dict[Tuple[str, Optional[str]], Dict[int, Any]]] = {}
+
+YEAR_DEPARTMENT_SUMS_SQL = f"""
+    SELECT year, department, employee_count, {", ".join(MONEY_COLUMNS)}
+    FROM {SUMMARY_VIEW}
+    WHERE NOT is_year_total
+"""
+
+def _trend_median_sql(metric: str, department: Optional[str]):
+    where_sql = "WHERE department_id = %s" if department else ""
+    return f"""
+        SELECT year, {money.dollars_sql(f"PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY {metric})")} as median
+        FROM payroll_earnings
+        {where_sql}
+        GROUP BY year
+    """, [lookups.id_of('department', department)] if department else []
+
+def _cache_trend_sums(version: str, rows: List[Dict[str, Any]]):
+    _trend_sums.clear()
+    _trend_sums[version] = rows
+
+def _cached_trend_medians(version: str, metric: str, department: Optional[str]) -> Optional[Dict[int, Any]]:
+    return _trend_medians.get(version, {}).get((metric, department))
+
+def _cache_trend_medians(version: str, metric: str, department: Optional[str], medians: Dict[int, Any]):
+    if version not in _trend_medians:
+        _trend_medians.clear()
+        _trend_medians[version] = {}
+    _trend_medians[version][(metric, department)] = medians
+
+def get_trends(department: Optional[str] = None, metric: str = 'total_gross') -> Dict[str, Any]:
+    """Headcount, total, mean, median and component sums of metric for every year.
+
+    One read of the summary view's (year, department) rows serves every
+    department and metric until the dataset version changes. Medians come
+    from backend.distribution; without it, one PERCENTILE_CONT query per
+    metric and department, cached for the dataset version like the sums.
+    """
+    if metric not in MONEY_COLUMNS:
+        raise ValueError(f"metric must be one of {', '.join(MONEY_COLUMNS)}")
+
+    version = cache.current_version()
+    rows = _trend_sums.get(version)
+    if rows is None:
+        if engine.is_loaded():
+            rows = engine.get_year_department_sums()
+        else:
+            with get_db_connection() as conn:
+                with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
+                    cur.execute(YEAR_DEPARTMENT_SUMS_SQL)
+                    rows = [dict(row) for row in cur.fetchall()]
+        _cache_trend_sums(version, rows)
+
+    medians = None
+    if not distribution.is_loaded():
+        medians = _cached_trend_medians(version, metric, department)
+        if medians is None:
+            with get_db_connection() as conn:
+                with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
+                    cur.execute(*_trend_median_sql(metric, department))
+                    medians = {row['year']: row['median'] for row in cur.fetchall()}
+            _cache_trend_medians(version, metric, department, medians)
+    return _trends_response(rows, department, metric, medians)
+
+# payroll_earnings.id is SERIAL (int4)
+MAX_ROW_ID = 2 ** 31 - 1
+
+def _history_filter(key: str) -> tuple[str, list]:
+    """WHERE clause for a person's rows.
+
+    A numeric key shorter than a person_key (which may be all digits) is the
+    id of any one of them; ids past int4 can't match any row.
+    """
+    if key.isdigit() and len(key) < PERSON_KEY_LENGTH and int(key) <= MAX_ROW_ID:
+        return "person_key = (SELECT person_key FROM payroll_earnings WHERE id = %s)", [int(key)]
+    return "person_key = %s", [key]
+
+def _history_sql(key: str) -> tuple[str, list]:
+    where_sql, params = _history_filter(key)
+    return f"""
+        SELECT {_employee_select('decimal')}, person_key
+        FROM {PAYROLL_NAMED}
+        WHERE {where_sql}
+        ORDER BY year, id
+    """, params
+
+def _history_response(rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not rows:
+        return None
+    return {
+        'person_key': rows[0]['person_key'],
+        'name': rows[-1]['name'],
+        'years': [{col: row[col] for col in EMPLOYEE_COLUMNS} for row in rows],
+    }
+
+def get_employee_history(key: str) -> Optional[Dict[str, Any]]:
+    """Every year's row for one person (backend.linkage), oldest first; None if unknown.
+
+    key is a person_key or the id of any of the person's rows. Always read
+    from Postgres, which holds the linkage, even with the memory engine.
+    """
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
+            cur.execute(*_history_sql(key))
+            return _history_response(cur.fetchall())
+
+def _trends_response(rows: List[Dict[str, Any]], department: Optional[str], metric: str,
+                     medians: Optional[Dict[int, Any]] = None) -> Dict[str, Any]:
+    """Roll (year, department) sums up per year for one department or all."""
+    years = {}
+    for row in rows:
+        if department and row['department'] != department:
+            continue
+        point = years.setdefault(row['year'], {
+            'employee_count': 0, 'components': {col: Decimal(0) for col in MONEY_COLUMNS}
+        })
+        point['employee_count'] += row['employee_count']
+        for col in MONEY_COLUMNS:
+            point['components'][col] += row[col] or 0
+
+    points = []
+    for year in sorted(years):
+        point = years[year]
+        count = point['employee_count']
+        total = point['components'][metric]
+        if medians is None:
+            median = distribution.percentile(distribution.get(year, department, metric), 0.5)
+        else:
+            median = medians.get(year)
+        points.append({
+            'year': year,
+            'employee_count': count,
+            'total': total,
+            'mean': (total / count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            'median': money.round_cents(median),
+            'components': point['components'],
+        })
+    return {'department': department, 'metric': metric, 'years': points}
+
 def get_health_check() -> Dict[str, Any]:
     """Health check with database stats."""
     try:
@@ -248,7 +773,8 @@ def get_health_check() -> Dict[str, Any]:
                     'status': 'healthy',
                     'database': 'connected',
                     'total_records': total,
-                    'years_available': years
+                    'years_available': years,
+                    'pool': get_pool_stats()
                 }
     except Exception as e:
         return {
@@ -0,0 +1,98 @@
+"""
+In-process prefix index for search typeahead.
+
+Each year gets a sorted list of normalized keys over its distinct names and
+titles. Every word start is indexed too, so "sergeant" finds "Police
+Sergeant" and "stanley" finds "Demesmin,Stanley". Lookups are a bisect plus
+a short scan, well under a millisecond.
+"""
+import re
+import threading
+from bisect import bisect_left
+from typing import List, Dict, Iterable
+
+from backend.database import get_db_connection
+from backend import engine
+
+_WORD_START = re.compile(r'(?<=[\s,/\-(])\S')
+
+_indexes: Dict[int, 'PrefixIndex'] = {}
+_build_lock = threading.Lock()
+
+
+class PrefixIndex:
+    """Sorted keys with parallel (kind, value) entries for prefix lookups."""
+
+    def __init__(self, names: Iterable[str], titles: Iterable[str]):
+        entries = []
+        for kind, values in (('name', names), ('title', titles)):
+            for value in values:
+                if not value:
+                    continue
+                key = value.lower()
+                entries.append((key, kind, value))
+                for match in _WORD_START.finditer(key):
+                    entries.append((key[match.start():], kind, value))
+
+        entries.sort()
+        self.keys = [key for key, _, _ in entries]
+        self.entries = [(kind, value) for _, kind, value in entries]
+
+    def lookup(self, prefix: str, limit: int = 10) -> List[Dict[str, str]]:
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            entry = self.entries[i]
+            if entry not in seen:
+                seen.add(entry)
+                results.append({'kind': entry[0], 'value': entry[1]})
+                if len(results) >= limit:
+                    break
+            i += 1
+        return results
+
+
+def _distinct_values(year: int):
+    """Distinct names and titles for a year, from the engine or the database."""
+    table = engine.get_table(year)
+    if table is not None:
+        return set(table.names), [t for t in table.titles if t]
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT DISTINCT name FROM payroll_earnings WHERE year = %s", (year,))
+            names = [row[0] for row in cur.fetchall()]
+            cur.execute("""
+                SELECT title FROM payroll_titles
+                WHERE title <> ''
+                  AND title_id IN (SELECT title_id FROM payroll_earnings WHERE year = %s)
+            """, (year,))
+            titles = [row[0] for row in cur.fetchall()]
+    return names, titles
+
+
+def get_index(year: int) -> PrefixIndex:
+    """Prefix index for a year, built on first use."""
+    index = _indexes.get(year)
+    if index is None:
+        with _build_lock:
+            index = _indexes.get(year)
+            if index is None:
+                index = PrefixIndex(*_distinct_values(year))
+                _indexes[year] = index
+    return index
+
+
+def clear():
+    """Drop built indexes (after the data is reloaded)."""
+    _indexes.clear()
+
+
+def get_suggestions(year: int, prefix: str, limit: int = 10) -> List[Dict[str, str]]:
+    """Names and titles in a year that start with (or have a word starting with) prefix."""
+    return get_index(year).lookup(prefix, limit)
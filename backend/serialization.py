@@ -0,0 +1,198 @@
+"""
+Fast JSON rendering for large employee lists.
+
+/api/employees is called with limit=30000, and validating an Employee model
+per row (eight Decimals each) then encoding it dominated the request. The
+fast path fetches money already rendered as text - the same strings pydantic
+emits for Decimal fields - and writes the rows to bytes with orjson. The
+output has the EmployeeListResponse schema.
+
+Clients that ask for it via Accept get the rows as columns instead: a
+columnar JSON document or an Arrow IPC stream, both with money in integer
+cents and department/title as codes into a dictionary. Each department name
+is sent once instead of once per row, and Arrow clients can read the
+buffers without parsing.
+"""
+import io
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import orjson
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: Arrow responses are offered only when installed
+    pa = None
+
+from backend.engine import MONEY_COLUMNS
+
+
+def employee_list_json(
+    data: List[Dict[str, Any]],
+    total: int,
+    limit: int,
+    offset: int,
+    year: int,
+    next_cursor: Optional[str] = None
+) -> bytes:
+    """EmployeeListResponse as JSON bytes. Rows must have money as text."""
+    return orjson.dumps({
+        'data': data,
+        'total': total,
+        'limit': limit,
+        'offset': offset,
+        'year': year,
+        'next_cursor': next_cursor,
+    })
+
+
+# Media types /api/employees and /api/export can negotiate via Accept
+JSON = 'application/json'
+COLUMNAR_JSON = 'application/vnd.payroll.columnar+json'
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+CSV = 'text/csv'
+
+EMPLOYEE_LIST_TYPES = [JSON, COLUMNAR_JSON] + ([ARROW_STREAM] if pa is not None else [])
+EXPORT_TYPES = [CSV, COLUMNAR_JSON] + ([ARROW_STREAM] if pa is not None else [])
+
+# Text columns sent as integer codes into a per-response dictionary
+DICTIONARY_COLUMNS = ['department', 'title']
+
+
+def negotiate(accept: Optional[str], offered: List[str]) -> str:
+    """Pick the offered media type the Accept header prefers.
+
+    Honors q-values and */* wildcards; anything unparseable or unmatched
+    falls back to the first offered type rather than a 406.
+    """
+    best, best_q = offered[0], 0.0
+    for part in (accept or '').split(','):
+        media_type, *params = [p.strip() for p in part.split(';')]
+        q = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q <= best_q:
+            continue
+        for candidate in offered:
+            if media_type in (candidate, '*/*', candidate.split('/')[0] + '/*'):
+                best, best_q = candidate, q
+                break
+    return best
+
+
+def employee_columns(columns: List[str], rows: List[Any]) -> Dict[str, Any]:
+    """Transpose rows (dicts or tuples in column order) into per-column lists.
+
+    department and title become integer codes into sorted dictionaries,
+    with None for NULL.
+    """
+    if rows and isinstance(rows[0], dict):
+        values = {col: [row[col] for row in rows] for col in columns}
+    else:
+        values = dict(zip(columns, map(list, zip(*rows)))) if rows else {col: [] for col in columns}
+
+    dictionaries = {}
+    for col in DICTIONARY_COLUMNS:
+        dictionary = sorted({v for v in values[col] if v is not None})
+        lookup = {v: i for i, v in enumerate(dictionary)}
+        values[col] = [lookup.get(v) for v in values[col]]
+        dictionaries[col] = dictionary
+    return {'columns': values, 'dictionaries': dictionaries}
+
+
+def employee_columnar_json(
+    columns: List[str],
+    rows: List[Any],
+    total: Optional[int] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    year: Optional[int] = None,
+    next_cursor: Optional[str] = None
+) -> bytes:
+    """Columnar employee list as JSON bytes. Rows must have money in cents."""
+    return orjson.dumps({
+        'format': 'columnar',
+        'total': total,
+        'limit': limit,
+        'offset': offset,
+        'year': year,
+        'next_cursor': next_cursor,
+        'length': len(rows),
+        'money_unit': 'cents',
+        **employee_columns(columns, rows),
+    })
+
+
+def _arrow_schema(columns: List[str], metadata: Optional[Dict[str, Any]] = None):
+    fields = []
+    for col in columns:
+        if col == 'id':
+            fields.append(pa.field(col, pa.int64()))
+        elif col == 'year':
+            fields.append(pa.field(col, pa.int32()))
+        elif col in DICTIONARY_COLUMNS:
+            fields.append(pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+        elif col in MONEY_COLUMNS:
+            fields.append(pa.field(col, pa.int64(), metadata={'unit': 'cents'}))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    meta = {k: '' if v is None else str(v) for k, v in (metadata or {}).items()}
+    return pa.schema(fields, metadata=meta)
+
+
+def _arrow_batch(schema, columns: List[str], rows: List[Any]):
+    shaped = employee_columns(columns, rows)
+    arrays = []
+    for field in schema:
+        values = shaped['columns'][field.name]
+        if field.name in DICTIONARY_COLUMNS:
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array(values, pa.int32()),
+                pa.array(shaped['dictionaries'][field.name], pa.string())
+            ))
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.record_batch(arrays, schema=schema)
+
+
+def employee_arrow(
+    columns: List[str],
+    rows: List[Any],
+    **metadata: Any
+) -> bytes:
+    """Employee list as an Arrow IPC stream. Rows must have money in cents.
+
+    Keyword arguments (total, next_cursor, ...) go in the schema metadata.
+    """
+    schema = _arrow_schema(columns, metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(_arrow_batch(schema, columns, rows))
+    return sink.getvalue().to_pybytes()
+
+
+def arrow_stream_chunks(columns: List[str], batches: Iterable[List[Any]]) -> Iterator[bytes]:
+    """Render an Arrow IPC stream one record batch at a time.
+
+    Each batch carries its own department/title dictionaries (IPC
+    dictionary replacement), so nothing is buffered across batches.
+    """
+    schema = _arrow_schema(columns)
+    buffer = io.BytesIO()
+    writer = pa.ipc.new_stream(buffer, schema)
+
+    def drain() -> bytes:
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return chunk
+
+    yield drain()
+    for rows in batches:
+        writer.write_batch(_arrow_batch(schema, columns, rows))
+        yield drain()
+    writer.close()
+    yield drain()
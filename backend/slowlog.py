@@ -0,0 +1,131 @@
+"""
+Slow-query log with sampled EXPLAIN capture.
+
+The timed cursors (backend.metrics) and the asyncpg helpers report every
+query that takes longer than SLOW_QUERY_MS during a request. Each one is
+logged to a ring buffer of the last SLOW_QUERY_LOG_SIZE entries. A sample
+of them (SLOW_QUERY_EXPLAIN_SAMPLE, at most SLOW_QUERY_EXPLAIN_PER_MINUTE)
+is then re-run under EXPLAIN (ANALYZE, BUFFERS) with the same parameters,
+on a background thread and a pooled connection, so the request that was
+slow does not also pay for the plan.
+
+Only SELECT / WITH statements are explained, inside a READ ONLY
+transaction that is rolled back. /api/debug/slow-queries reads the buffer.
+"""
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from backend.config import (
+    SLOW_QUERY_MS,
+    SLOW_QUERY_EXPLAIN_SAMPLE,
+    SLOW_QUERY_EXPLAIN_PER_MINUTE,
+    SLOW_QUERY_LOG_SIZE,
+)
+
+_READ_ONLY = re.compile(r'^\s*(select|with)\b', re.IGNORECASE)
+
+_entries: deque = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+_lock = threading.Lock()
+_explained_at: deque = deque()
+_counts = {'slow': 0, 'explained': 0, 'sampled_out': 0, 'rate_limited': 0, 'failed': 0}
+_next_id = 0
+
+# One worker: plans are captured one at a time, never in parallel with each other
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slowlog')
+
+
+def threshold() -> float:
+    """Slow-query threshold in seconds (0 = disabled)."""
+    return SLOW_QUERY_MS / 1000
+
+
+def observe(sql: str, params: Optional[Any], seconds: float, source: str = 'psycopg2'):
+    """Log a query that took `seconds`; explain it if sampled and within the rate limit."""
+    global _next_id
+    now = time.monotonic()
+    # Callers reuse and extend their params lists after execute
+    if isinstance(params, dict):
+        params = dict(params)
+    elif params is not None:
+        params = list(params)
+    with _lock:
+        _next_id += 1
+        entry = {
+            'id': _next_id,
+            'at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'duration_ms': round(seconds * 1000, 1),
+            'source': source,
+            'sql': ' '.join(sql.split()),
+            'params': [str(p) for p in (params.values() if isinstance(params, dict) else params)] if params else [],
+            'explain': None,
+            'explain_status': None,
+        }
+        _entries.append(entry)
+        _counts['slow'] += 1
+
+        while _explained_at and now - _explained_at[0] > 60:
+            _explained_at.popleft()
+        if not _READ_ONLY.match(sql):
+            entry['explain_status'] = 'skipped: not a SELECT'
+        elif random.random() >= SLOW_QUERY_EXPLAIN_SAMPLE:
+            entry['explain_status'] = 'skipped: sampled out'
+            _counts['sampled_out'] += 1
+        elif len(_explained_at) >= SLOW_QUERY_EXPLAIN_PER_MINUTE:
+            entry['explain_status'] = 'skipped: rate limited'
+            _counts['rate_limited'] += 1
+        else:
+            entry['explain_status'] = 'pending'
+            _explained_at.append(now)
+            _executor.submit(_explain, entry, sql, params)
+
+    print(f"[WARN] Slow query ({entry['duration_ms']:.0f} ms, {source}): {entry['sql'][:200]}")
+
+
+def _explain(entry: Dict[str, Any], sql: str, params: Optional[Any]):
+    import psycopg2.extensions
+    from backend.database import get_db_connection
+
+    try:
+        with get_db_connection() as conn:
+            # Plain cursor: the EXPLAIN itself must not be timed or logged
+            with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cur:
+                cur.execute("SET TRANSACTION READ ONLY")
+                cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, params)
+                plan = "\n".join(row[0] for row in cur.fetchall())
+            conn.rollback()
+        with _lock:
+            entry['explain'] = plan
+            entry['explain_status'] = 'done'
+            _counts['explained'] += 1
+    except Exception as e:
+        with _lock:
+            entry['explain_status'] = f'failed: {e}'.strip()
+            _counts['failed'] += 1
+
+
+def recent(limit: int = 20) -> List[Dict[str, Any]]:
+    """Newest entries first."""
+    with _lock:
+        return [dict(entry) for entry in list(_entries)[::-1][:limit]]
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        return {
+            'threshold_ms': SLOW_QUERY_MS,
+            'explain_sample': SLOW_QUERY_EXPLAIN_SAMPLE,
+            'explain_per_minute': SLOW_QUERY_EXPLAIN_PER_MINUTE,
+            'buffered': len(_entries),
+            **_counts,
+        }
+
+
+def clear():
+    with _lock:
+        _entries.clear()
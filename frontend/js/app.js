@@ -10,6 +10,7 @@ let currentEarningsType = '';
 let employeesData = [];
 let grid = null;
 let isFilteringFromChart = false; // Prevent circular filtering
+let departmentsLoaded = false;
 
 // Earnings type mapping for display and API
 const earningsTypeMap = {
@@ -22,6 +23,9 @@ const earningsTypeMap = {
     'Quinn Ed': 'quinn_education'
 };
 
+// Money columns (sent as integer cents in columnar responses)
+const MONEY_FIELDS = [...Object.values(earningsTypeMap), 'total_gross'];
+
 // Format currency (abbreviated with M/K, commas for billions)
 function formatCurrency(value) {
     if (value >= 1000000) {
@@ -71,7 +75,6 @@ document.addEventListener('DOMContentLoaded', async () => {
     // Register datalabels plugin globally
     Chart.register(ChartDataLabels);
 
-    await loadDepartments();
     setupEventListeners();
     await loadData();
 });
@@ -103,26 +106,20 @@ function setupEventListeners() {
     document.getElementById('export-btn').addEventListener('click', exportCSV);
 }
 
-// Load departments for dropdown
-async function loadDepartments() {
-    try {
-        const response = await fetch(`${API_BASE}/api/departments?year=${currentYear}`);
-        const data = await response.json();
-
-        const select = document.getElementById('department-filter');
-        select.innerHTML = '<option value="">All Departments</option>';
-
-        data.departments
-            .sort((a, b) => a.name.localeCompare(b.name))
-            .forEach(dept => {
-                const option = document.createElement('option');
-                option.value = dept.name;
-                option.textContent = dept.name;
-                select.appendChild(option);
-            });
-    } catch (error) {
-        console.error('Error loading departments:', error);
-    }
+// Fill the department dropdown (once, from the first dashboard response)
+function renderDepartmentOptions(departments) {
+    const select = document.getElementById('department-filter');
+    select.innerHTML = '<option value="">All Departments</option>';
+
+    [...departments]
+        .sort((a, b) => a.name.localeCompare(b.name))
+        .forEach(dept => {
+            const option = document.createElement('option');
+            option.value = dept.name;
+            option.textContent = dept.name;
+            select.appendChild(option);
+        });
+    departmentsLoaded = true;
 }
 
 // Load all data
@@ -130,11 +127,53 @@ async function loadData() {
     updateTitles();
     await Promise.all([
         loadEmployees(),
-        loadStats(),
-        loadCharts()
+        loadDashboard()
     ]);
 }
 
+// Load stats, department chart and earnings chart in one request
+async function loadDashboard() {
+    try {
+        let url = `${API_BASE}/api/dashboard?year=${currentYear}`;
+        if (currentDepartment) {
+            url += `&department=${encodeURIComponent(currentDepartment)}`;
+        }
+
+        const response = await fetch(url);
+        const data = await response.json();
+
+        if (!departmentsLoaded) {
+            renderDepartmentOptions(data.departments);
+        }
+        renderStats(data.stats);
+        renderDepartmentChart(data.departments);
+        renderEarningsChart(data.breakdown);
+    } catch (error) {
+        console.error('Error loading dashboard:', error);
+    }
+}
+
+// Rebuild row objects from a columnar /api/employees response
+function columnarToRows(payload) {
+    const { columns, dictionaries, length } = payload;
+    const rows = new Array(length);
+    for (let i = 0; i < length; i++) {
+        const row = {};
+        for (const [field, values] of Object.entries(columns)) {
+            const value = values[i];
+            if (field in dictionaries) {
+                row[field] = value === null ? null : dictionaries[field][value];
+            } else if (MONEY_FIELDS.includes(field)) {
+                row[field] = value === null ? null : value / 100;
+            } else {
+                row[field] = value;
+            }
+        }
+        rows[i] = row;
+    }
+    return rows;
+}
+
 // Load employees data
 async function loadEmployees() {
     try {
@@ -146,9 +185,11 @@ async function loadEmployees() {
             url += `&earnings_type=${encodeURIComponent(currentEarningsType)}`;
         }
 
-        const response = await fetch(url);
-        const data = await response.json();
-        employeesData = data.data;
+        // Columnar payload: each department/title is sent once, money as cents
+        const response = await fetch(url, {
+            headers: { 'Accept': 'application/vnd.payroll.columnar+json' }
+        });
+        employeesData = columnarToRows(await response.json());
 
         if (!grid) {
             initializeGrid();
@@ -282,17 +323,9 @@ function formatVariance(current, prior, isPositiveGood = false) {
     return { text: `${arrow} ${diffStr} (${Math.abs(pctChange)}%)`, className };
 }
 
-// Load stats
-async function loadStats() {
+// Render stats cards
+function renderStats(stats) {
     try {
-        let url = `${API_BASE}/api/stats?year=${currentYear}`;
-        if (currentDepartment) {
-            url += `&department=${encodeURIComponent(currentDepartment)}`;
-        }
-
-        const response = await fetch(url);
-        const stats = await response.json();
-
         document.getElementById('stat-employees').textContent =
             stats.total_employees.toLocaleString();
         document.getElementById('stat-payroll').textContent =
@@ -313,7 +346,7 @@ async function loadStats() {
         updateVarianceElement('stat-average-variance', avgVar);
         updateVarianceElement('stat-overtime-variance', overtimeVar);
     } catch (error) {
-        console.error('Error loading stats:', error);
+        console.error('Error rendering stats:', error);
     }
 }
 
@@ -328,21 +361,10 @@ function updateVarianceElement(elementId, variance) {
     }
 }
 
-// Load and render charts
-async function loadCharts() {
-    await Promise.all([
-        loadDepartmentChart(),
-        loadEarningsChart()
-    ]);
-}
-
 // Department bar chart with click handler
-async function loadDepartmentChart() {
+function renderDepartmentChart(departments) {
     try {
-        const response = await fetch(`${API_BASE}/api/departments?year=${currentYear}`);
-        const data = await response.json();
-
-        const top10 = data.departments.slice(0, 10);
+        const top10 = departments.slice(0, 10);
 
         const ctx = document.getElementById('dept-chart').getContext('2d');
 
@@ -456,21 +478,13 @@ async function loadDepartmentChart() {
             }
         });
     } catch (error) {
-        console.error('Error loading department chart:', error);
+        console.error('Error rendering department chart:', error);
     }
 }
 
 // Earnings composition bar chart
-async function loadEarningsChart() {
+function renderEarningsChart(data) {
     try {
-        let url = `${API_BASE}/api/earnings-breakdown?year=${currentYear}`;
-        if (currentDepartment) {
-            url += `&department=${encodeURIComponent(currentDepartment)}`;
-        }
-
-        const response = await fetch(url);
-        const data = await response.json();
-
         const ctx = document.getElementById('earnings-chart').getContext('2d');
 
         // Destroy existing chart if it exists
@@ -574,7 +588,7 @@ async function loadEarningsChart() {
             }
         });
     } catch (error) {
-        console.error('Error loading earnings chart:', error);
+        console.error('Error rendering earnings chart:', error);
     }
 }
 
@@ -6,7 +6,8 @@ import psycopg2
 from psycopg2.extras import execute_values
 import pandas as pd
 from pathlib import Path
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
+import sys
 
 import os
 
@@ -15,37 +16,30 @@ DATABASE_URL = os.environ.get("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is required")
 
-def create_table(conn):
-    """Create payroll_earnings table if it doesn't exist"""
-    create_sql = """
-    CREATE TABLE IF NOT EXISTS payroll_earnings (
-        id SERIAL PRIMARY KEY,
-        year INTEGER NOT NULL,
-        name VARCHAR(255) NOT NULL,
-        department VARCHAR(255),
-        title VARCHAR(255),
-        regular NUMERIC(12, 2) DEFAULT 0,
-        retro NUMERIC(12, 2) DEFAULT 0,
-        other NUMERIC(12, 2) DEFAULT 0,
-        overtime NUMERIC(12, 2) DEFAULT 0,
-        injured NUMERIC(12, 2) DEFAULT 0,
-        detail NUMERIC(12, 2) DEFAULT 0,
-        quinn_education NUMERIC(12, 2) DEFAULT 0,
-        total_gross NUMERIC(12, 2) NOT NULL,
-        zip_code VARCHAR(10),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        UNIQUE(year, name, department, title)
-    );
-
-    CREATE INDEX IF NOT EXISTS idx_payroll_year ON payroll_earnings(year);
-    CREATE INDEX IF NOT EXISTS idx_payroll_dept ON payroll_earnings(department);
-    CREATE INDEX IF NOT EXISTS idx_payroll_name ON payroll_earnings(name);
-    """
+# Department and title ids are allocated by backend.lookups (in name order),
+# so the schema and views come from backend.database too
+sys.path.insert(0, str(Path(__file__).parent))
+from backend import fingerprints
+from backend import lookups
+from backend import partitions
+from backend.database import (
+    bump_dataset_version,
+    create_schema_on,
+    get_money_storage,
+    refresh_summary,
+    MONEY_COLUMNS,
+)
 
+def create_table(conn):
+    """Create payroll_earnings if it doesn't exist; False if it can't be loaded"""
     with conn.cursor() as cur:
-        cur.execute(create_sql)
+        # Same schema as backend.database.create_schema, including
+        # MONEY_STORAGE and PARTITION_BY_YEAR for a new table
+        created = create_schema_on(cur)
         conn.commit()
-    print("OK Table created successfully")
+    if created:
+        print("OK Table created successfully")
+    return created
 
 def load_csv_file(filepath, year, conn):
     """Load a single CSV file with error handling for different encodings"""
@@ -169,10 +163,10 @@ def insert_data(df, conn):
     """Insert data using upsert to avoid duplicates"""
     insert_sql = """
     INSERT INTO payroll_earnings (
-        year, name, department, title, regular, retro, other, overtime,
-        injured, detail, quinn_education, total_gross, zip_code
+        year, name, department_id, title_id, regular, retro, other, overtime,
+        injured, detail, quinn_education, total_gross, zip_code, row_hash
     ) VALUES %s
-    ON CONFLICT (year, name, department, title) DO UPDATE SET
+    ON CONFLICT (year, name, department_id, title_id) DO UPDATE SET
         regular = EXCLUDED.regular,
         retro = EXCLUDED.retro,
         other = EXCLUDED.other,
@@ -181,30 +175,48 @@ def insert_data(df, conn):
         detail = EXCLUDED.detail,
         quinn_education = EXCLUDED.quinn_education,
         total_gross = EXCLUDED.total_gross,
-        zip_code = EXCLUDED.zip_code
+        zip_code = EXCLUDED.zip_code,
+        row_hash = EXCLUDED.row_hash
     """
 
+    # Parsed money is float dollars; its shortest repr is the exact 2-place
+    # amount, so cents go through Decimal rather than float arithmetic
+    df = df.copy()
+    for col in MONEY_COLUMNS:
+        df[col] = [int(Decimal(repr(float(value))).scaleb(2).to_integral_value(ROUND_HALF_UP))
+                   for value in df[col]]
+
+    # Content hashes are over the names, so take them before encoding
+    df = df.assign(row_hash=fingerprints.row_hashes(df, money_as_cents=True))
+
+    with conn.cursor() as cur:
+        # Department and title names -> ids, adding new names to the lookups
+        df = lookups.encode_frame(cur, df)
+        # A table created with MONEY_STORAGE=cents (or converted by
+        # scripts/migrate_money.py) stores integer cents
+        in_cents = get_money_storage(cur) == 'cents'
+        partitions.ensure_year_partition(cur, int(df['year'].iloc[0]))
+
+    def amount(cents):
+        return int(cents) if in_cents else Decimal(int(cents)).scaleb(-2)
+
     # Prepare data tuples
     records = []
     for _, row in df.iterrows():
         records.append((
             int(row['year']),
             row['name'],
-            row['department'] if pd.notna(row['department']) else None,
-            row['title'] if pd.notna(row['title']) else None,
-            float(row['regular']),
-            float(row['retro']),
-            float(row['other']),
-            float(row['overtime']),
-            float(row['injured']),
-            float(row['detail']),
-            float(row['quinn_education']),
-            float(row['total_gross']),
-            row['zip_code'] if pd.notna(row['zip_code']) else None
+            int(row['department_id']) if pd.notna(row['department_id']) else None,
+            int(row['title_id']) if pd.notna(row['title_id']) else None,
+            *(amount(row[col]) for col in MONEY_COLUMNS),
+            row['zip_code'] if pd.notna(row['zip_code']) else None,
+            int(row['row_hash'])
         ))
 
     with conn.cursor() as cur:
         execute_values(cur, insert_sql, records)
+        refresh_summary(cur)
+        bump_dataset_version(cur)
         conn.commit()
 
     print(f"  Inserted {len(records):,} records")
@@ -218,7 +230,9 @@ def main():
     print("OK Connected to Render PostgreSQL\n")
 
     # Create table
-    create_table(conn)
+    if not create_table(conn):
+        conn.close()
+        return
     print()
 
     # Data directory
@@ -260,7 +274,9 @@ def main():
         count = cur.fetchone()[0]
 
         cur.execute("SELECT SUM(total_gross) FROM payroll_earnings")
-        total_payroll = cur.fetchone()[0]
+        total_payroll = cur.fetchone()[0] or 0
+        if get_money_storage(cur) == 'cents':
+            total_payroll = Decimal(total_payroll).scaleb(-2)
 
     print("=" * 60)
     print(f"OK Data load complete!")
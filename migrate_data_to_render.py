@@ -2,8 +2,13 @@
 Migrate payroll data from local PostgreSQL to Render PostgreSQL
 """
 import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
 import psycopg2
-from psycopg2.extras import execute_values, RealDictCursor
+from psycopg2.extras import execute_values
 
 # Source: Local PostgreSQL - set via environment variable
 LOCAL_DB = os.environ.get("LOCAL_DATABASE_URL")
@@ -15,64 +20,80 @@ RENDER_DB = os.environ.get("RENDER_DATABASE_URL")
 if not RENDER_DB:
     raise ValueError("RENDER_DATABASE_URL environment variable is required")
 
+# The Render table stores department and title as lookup ids (allocated by
+# backend.lookups in name order), so the schema and encoding come from backend.
+# backend.config requires DATABASE_URL; point it at the target, which is the
+# database backend's settings (MONEY_STORAGE, ...) describe. Only the cursors
+# passed in here are used, never backend's own pool.
+os.environ["DATABASE_URL"] = RENDER_DB
+sys.path.insert(0, str(Path(__file__).parent))
+from backend import fingerprints
+from backend import linkage
+from backend import lookups
+from backend import partitions
+from backend.database import (
+    bump_dataset_version,
+    create_schema_on,
+    get_money_storage,
+    refresh_summary,
+    MONEY_COLUMNS,
+    PAYROLL_NAMED,
+)
+
 def create_table(conn):
-    """Create payroll_earnings table on Render"""
-    create_sql = """
-    CREATE TABLE IF NOT EXISTS payroll_earnings (
-        id SERIAL PRIMARY KEY,
-        year INTEGER NOT NULL,
-        name VARCHAR(255) NOT NULL,
-        department VARCHAR(255),
-        title VARCHAR(255),
-        regular NUMERIC(12, 2) DEFAULT 0,
-        retro NUMERIC(12, 2) DEFAULT 0,
-        other NUMERIC(12, 2) DEFAULT 0,
-        overtime NUMERIC(12, 2) DEFAULT 0,
-        injured NUMERIC(12, 2) DEFAULT 0,
-        detail NUMERIC(12, 2) DEFAULT 0,
-        quinn_education NUMERIC(12, 2) DEFAULT 0,
-        total_gross NUMERIC(12, 2) NOT NULL,
-        zip_code VARCHAR(10),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        UNIQUE(year, name, department, title)
-    );
-
-    CREATE INDEX IF NOT EXISTS idx_payroll_year ON payroll_earnings(year);
-    CREATE INDEX IF NOT EXISTS idx_payroll_dept ON payroll_earnings(department);
-    CREATE INDEX IF NOT EXISTS idx_payroll_name ON payroll_earnings(name);
-    """
+    """Create payroll_earnings, its lookup tables, indexes and views on Render.
 
+    Same schema as backend.database.create_schema (MONEY_STORAGE and
+    PARTITION_BY_YEAR apply to a new table). Returns False if an existing
+    table still stores department and title as text (convert it with
+    scripts/migrate_lookups.py first).
+    """
     with conn.cursor() as cur:
-        cur.execute(create_sql)
+        created = create_schema_on(cur)
+        money_storage = get_money_storage(cur)
         conn.commit()
-    print("OK Table created on Render")
-
-def copy_data(local_conn, render_conn):
-    """Copy all data from local to Render"""
-    print("\nFetching data from local database...")
+    if created:
+        print(f"OK Table created on Render (money stored as {money_storage})")
+    return created
 
-    with local_conn.cursor(cursor_factory=RealDictCursor) as cur:
+def fetch_records(conn):
+    """Every local row as a frame: names, not ids, money in integer cents,
+    and person_key (None before backend.linkage has run)."""
+    with conn.cursor() as cur:
+        # A local table from before scripts/migrate_lookups.py has the names inline
+        source = PAYROLL_NAMED if lookups.is_encoded(cur) else "payroll_earnings"
+        in_cents = get_money_storage(cur) == 'cents'
+        money = ", ".join(col if in_cents else f"ROUND({col} * 100)::bigint AS {col}" for col in MONEY_COLUMNS)
         cur.execute("""
-            SELECT year, name, department, title, regular, retro, other, overtime,
-                   injured, detail, quinn_education, total_gross, zip_code
-            FROM payroll_earnings
+            SELECT EXISTS (SELECT 1 FROM information_schema.columns
+                           WHERE table_name = 'payroll_earnings' AND column_name = 'person_key')
+        """)
+        person_key = "person_key" if cur.fetchone()[0] else "NULL AS person_key"
+        cur.execute(f"""
+            SELECT year, name, department, title, {money}, zip_code, {person_key}
+            FROM {source}
             ORDER BY year, name
         """)
-        records = cur.fetchall()
+        columns = [desc[0] for desc in cur.description]
+        return pd.DataFrame(cur.fetchall(), columns=columns)
+
+def copy_data(local_conn, render_conn):
+    """Copy all data from local to Render in one transaction"""
+    print("\nFetching data from local database...")
+    df = fetch_records(local_conn)
 
-    print(f"Found {len(records):,} records to migrate\n")
+    print(f"Found {len(df):,} records to migrate\n")
 
-    if len(records) == 0:
+    if len(df) == 0:
         print("No data to migrate!")
         return
 
-    # Insert in batches
     insert_sql = """
     INSERT INTO payroll_earnings (
-        year, name, department, title, regular, retro, other, overtime,
-        injured, detail, quinn_education, total_gross, zip_code
+        year, name, department_id, title_id, regular, retro, other, overtime,
+        injured, detail, quinn_education, total_gross, zip_code, row_hash, person_key
     ) VALUES %s
-    ON CONFLICT (year, name, department, title) DO UPDATE SET
+    ON CONFLICT (year, name, department_id, title_id) DO UPDATE SET
         regular = EXCLUDED.regular,
         retro = EXCLUDED.retro,
         other = EXCLUDED.other,
@@ -81,30 +102,52 @@ def copy_data(local_conn, render_conn):
         detail = EXCLUDED.detail,
         quinn_education = EXCLUDED.quinn_education,
         total_gross = EXCLUDED.total_gross,
-        zip_code = EXCLUDED.zip_code
+        zip_code = EXCLUDED.zip_code,
+        row_hash = EXCLUDED.row_hash,
+        person_key = EXCLUDED.person_key
     """
 
-    # Prepare tuples
-    values = []
-    for r in records:
-        values.append((
-            r['year'], r['name'], r['department'], r['title'],
-            r['regular'], r['retro'], r['other'], r['overtime'],
-            r['injured'], r['detail'], r['quinn_education'],
-            r['total_gross'], r['zip_code']
-        ))
-
-    # Insert in batches of 1000
-    batch_size = 1000
-    total = len(values)
-
-    print("Inserting data to Render...")
-    for i in range(0, total, batch_size):
-        batch = values[i:i + batch_size]
-        with render_conn.cursor() as cur:
-            execute_values(cur, insert_sql, batch)
-            render_conn.commit()
-        print(f"  Progress: {min(i + batch_size, total):,} / {total:,} records")
+    # Content hashes are over the names and cents, so take them before encoding
+    df = df.assign(row_hash=fingerprints.row_hashes(df, money_as_cents=True))
+
+    with render_conn.cursor() as cur:
+        cur.execute("SET LOCAL statement_timeout = 0")
+        # Department and title names -> Render's ids, adding new names to its lookups
+        df = lookups.encode_frame(cur, df)
+        in_cents = get_money_storage(cur) == 'cents'
+        for year in df['year'].unique():
+            partitions.ensure_year_partition(cur, int(year))
+
+        def amount(cents):
+            return int(cents) if in_cents else Decimal(int(cents)).scaleb(-2)
+
+        # Prepare tuples
+        values = []
+        for row in df.itertuples(index=False):
+            values.append((
+                int(row.year), row.name,
+                int(row.department_id) if pd.notna(row.department_id) else None,
+                int(row.title_id) if pd.notna(row.title_id) else None,
+                *(amount(getattr(row, col)) for col in MONEY_COLUMNS),
+                row.zip_code, int(row.row_hash), row.person_key
+            ))
+
+        # Insert in batches of 1000; readers see none of it until the commit
+        batch_size = 1000
+        total = len(values)
+
+        print("Inserting data to Render...")
+        for i in range(0, total, batch_size):
+            execute_values(cur, insert_sql, values[i:i + batch_size])
+            print(f"  Progress: {min(i + batch_size, total):,} / {total:,} records")
+
+        # Keys are copied, so history links keep working; re-linking would
+        # break ties by the new ids. Link here only if the local table never was
+        if df['person_key'].isna().any():
+            linkage.link_people(cur)
+        refresh_summary(cur)
+        bump_dataset_version(cur)
+        render_conn.commit()
 
     print("OK Data migration complete!\n")
 
@@ -118,7 +161,9 @@ def verify_data(conn):
         years = cur.fetchone()[0]
 
         cur.execute("SELECT SUM(total_gross) FROM payroll_earnings")
-        total = cur.fetchone()[0]
+        total = cur.fetchone()[0] or 0
+        if get_money_storage(cur) == 'cents':
+            total = Decimal(total).scaleb(-2)
 
         cur.execute("SELECT year, COUNT(*) as cnt FROM payroll_earnings GROUP BY year ORDER BY year")
         year_counts = cur.fetchall()
@@ -146,7 +191,10 @@ def main():
     print("  OK Render PostgreSQL\n")
 
     # Create table on Render
-    create_table(render_conn)
+    if not create_table(render_conn):
+        local_conn.close()
+        render_conn.close()
+        return
 
     # Copy data
     copy_data(local_conn, render_conn)
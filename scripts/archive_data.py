@@ -1,23 +1,32 @@
 """
 Archive existing payroll data to CSV before refreshing from Analyze Boston.
 
+Each year is also written as an Arrow IPC file (dictionary-encoded department
+and title, money in cents) that the loader and the memory engine can
+memory-map without parsing. manifest.txt records a sha256 for every file.
+
 Preserves data locally in case Boston drops older years from their rolling dataset.
 Run this BEFORE load_data.py to snapshot what's currently in the database.
 
 Usage:
     python scripts/archive_data.py              # Archive all years
     python scripts/archive_data.py --year 2020  # Archive specific year
+    python scripts/archive_data.py --format csv # Skip the Arrow files
 """
 import os
 import sys
 import csv
+import pandas as pd
 from pathlib import Path
 from datetime import datetime
 
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from backend.database import get_db_connection
+from backend.database import get_db_connection, PAYROLL_NAMED
+from backend import archive
+from backend import money
+from backend.engine import MONEY_COLUMNS
 
 # Archive directory (persisted in repo)
 ARCHIVE_DIR = Path(__file__).parent.parent / "data" / "archive"
@@ -34,16 +43,15 @@ def archive_year(year: int, force: bool = False) -> Path:
         print(f"[SKIP] Archive already exists: {output_path}")
         return output_path
 
+    money_sql = ", ".join(f"{money.decimal_sql(col)} AS {col}" for col in MONEY_COLUMNS)
     with get_db_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                """
-                SELECT year, name, department, title,
-                       regular, retro, other, overtime, injured, detail,
-                       quinn_education, total_gross, zip_code
-                FROM payroll_earnings
+                f"""
+                SELECT year, name, department, title, {money_sql}, zip_code
+                FROM {PAYROLL_NAMED}
                 WHERE year = %s
-                ORDER BY total_gross DESC
+                ORDER BY {PAYROLL_NAMED}.total_gross DESC
                 """,
                 (year,),
             )
@@ -67,7 +75,60 @@ def archive_year(year: int, force: bool = False) -> Path:
     return output_path
 
 
-def archive_all(force: bool = False):
+def archive_year_arrow(year: int, force: bool = False) -> Path:
+    """Export a single year's data as an Arrow IPC file. Returns the output path."""
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+
+    output_path = archive.arrow_path(year, ARCHIVE_DIR)
+
+    if output_path.exists() and not force:
+        print(f"[SKIP] Archive already exists: {output_path}")
+        return output_path
+
+    money_sql = ", ".join(f"{money.cents_sql(col)} AS {col}" for col in MONEY_COLUMNS)
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            # id order keeps the engine's id lookups a binary search
+            cur.execute(
+                f"""
+                SELECT id, year, name, department, title, {money_sql}, zip_code
+                FROM {PAYROLL_NAMED}
+                WHERE year = %s
+                ORDER BY id
+                """,
+                (year,),
+            )
+            columns = [desc[0] for desc in cur.description]
+            frame = pd.DataFrame(cur.fetchall(), columns=columns)
+
+    if frame.empty:
+        print(f"[WARN] No data found for year {year}")
+        return output_path
+
+    rows = archive.write_year(frame, output_path)
+    print(f"[OK] Archived {rows:,} records for {year} -> {output_path}")
+    return output_path
+
+
+def write_manifest(years=None):
+    """Write manifest.txt with size and sha256 of every archived file."""
+    if years is None:
+        years = sorted({int(p.stem.rsplit("_", 1)[-1]) for p in ARCHIVE_DIR.glob("boston_payroll_*.*")})
+    manifest_path = ARCHIVE_DIR / "manifest.txt"
+    with open(manifest_path, "w") as f:
+        f.write(f"Boston Payroll Data Archive\n")
+        f.write(f"Archived at: {datetime.now().isoformat()}\n")
+        f.write(f"Years: {years}\n")
+        f.write(f"\nFiles:\n")
+        for year in years:
+            for path in (ARCHIVE_DIR / f"boston_payroll_{year}.csv", archive.arrow_path(year, ARCHIVE_DIR)):
+                if path.exists():
+                    size_mb = path.stat().st_size / (1024 * 1024)
+                    f.write(f"  {path.name}  ({size_mb:.1f} MB)  sha256={archive.sha256(path)}\n")
+    return manifest_path
+
+
+def archive_all(force: bool = False, formats=("csv", "arrow")):
     """Archive every year currently in the database."""
     with get_db_connection() as conn:
         with conn.cursor() as cur:
@@ -85,20 +146,13 @@ def archive_all(force: bool = False):
     print("=" * 60)
 
     for year in years:
-        archive_year(year, force=force)
+        if "csv" in formats:
+            archive_year(year, force=force)
+        if "arrow" in formats:
+            archive_year_arrow(year, force=force)
 
     # Write a manifest with archive metadata
-    manifest_path = ARCHIVE_DIR / "manifest.txt"
-    with open(manifest_path, "w") as f:
-        f.write(f"Boston Payroll Data Archive\n")
-        f.write(f"Archived at: {datetime.now().isoformat()}\n")
-        f.write(f"Years: {years}\n")
-        f.write(f"\nFiles:\n")
-        for year in years:
-            csv_path = ARCHIVE_DIR / f"boston_payroll_{year}.csv"
-            if csv_path.exists():
-                size_mb = csv_path.stat().st_size / (1024 * 1024)
-                f.write(f"  boston_payroll_{year}.csv  ({size_mb:.1f} MB)\n")
+    manifest_path = write_manifest(years)
 
     print("=" * 60)
     print(f"[OK] Archive complete. Manifest: {manifest_path}")
@@ -111,10 +165,17 @@ if __name__ == "__main__":
     parser.add_argument("--year", type=int, help="Archive specific year")
     parser.add_argument("--force", action="store_true", help="Overwrite existing archives")
     parser.add_argument("--all", action="store_true", help="Archive all years")
+    parser.add_argument("--format", choices=["csv", "arrow", "both"], default="both",
+                        help="Archive format (default: both)")
 
     args = parser.parse_args()
+    formats = ("csv", "arrow") if args.format == "both" else (args.format,)
 
     if args.year:
-        archive_year(args.year, force=args.force)
+        if "csv" in formats:
+            archive_year(args.year, force=args.force)
+        if "arrow" in formats:
+            archive_year_arrow(args.year, force=args.force)
+        write_manifest()
     else:
-        archive_all(force=args.force)
+        archive_all(force=args.force, formats=formats)
@@ -0,0 +1,179 @@
+"""
+Load benchmark: sync (psycopg2 + threadpool) vs async (asyncpg) endpoints.
+
+Starts one uvicorn server per mode, each exposing the same read routes on
+top of backend.queries (sync def) or backend.async_queries (async def), and
+drives it with a fixed number of concurrent clients for a fixed duration.
+The response cache is not involved, so every request reaches the database.
+
+Usage:
+    python scripts/benchmark_load.py
+    python scripts/benchmark_load.py --concurrency 64 --duration 15
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import httpx
+from tabulate import tabulate
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Mix of dashboard-style reads against the default year
+PATHS = [
+    "/api/employees?year=2024&limit=50",
+    "/api/employees?year=2024&search=sergeant&sort_by=overtime",
+    "/api/dashboard?year=2024",
+    "/api/dashboard?year=2024&department=Boston%20Police%20Department",
+    "/api/stats?year=2023",
+    "/api/departments?year=2024",
+]
+
+
+def build_app(mode: str):
+    """FastAPI app with the read routes on the sync or async query layer."""
+    from fastapi import FastAPI, Query
+
+    app = FastAPI()
+
+    if mode == "sync":
+        from backend import queries
+
+        @app.get("/api/employees")
+        def employees(year: int = 2024, search: Optional[str] = None,
+                      sort_by: str = "total_gross", limit: int = Query(50)):
+            data, total, _ = queries.get_employees(year=year, search=search, sort_by=sort_by, limit=limit)
+            return {"data": data, "total": total}
+
+        @app.get("/api/dashboard")
+        def dashboard(year: int = 2024, department: Optional[str] = None):
+            return queries.get_dashboard(year, department)
+
+        @app.get("/api/stats")
+        def stats(year: int = 2024):
+            return queries.get_stats(year)
+
+        @app.get("/api/departments")
+        def departments(year: int = 2024):
+            return queries.get_departments(year)
+    else:
+        from backend import async_queries
+        from backend.async_database import init_async_pool
+
+        @app.on_event("startup")
+        async def startup():
+            await init_async_pool()
+
+        @app.get("/api/employees")
+        async def employees(year: int = 2024, search: Optional[str] = None,
+                            sort_by: str = "total_gross", limit: int = Query(50)):
+            data, total, _ = await async_queries.get_employees(
+                year=year, search=search, sort_by=sort_by, limit=limit
+            )
+            return {"data": data, "total": total}
+
+        @app.get("/api/dashboard")
+        async def dashboard(year: int = 2024, department: Optional[str] = None):
+            return await async_queries.get_dashboard(year, department)
+
+        @app.get("/api/stats")
+        async def stats(year: int = 2024):
+            return await async_queries.get_stats(year)
+
+        @app.get("/api/departments")
+        async def departments(year: int = 2024):
+            return await async_queries.get_departments(year)
+
+    return app
+
+
+def serve(mode: str, port: int):
+    import uvicorn
+    uvicorn.run(build_app(mode), host="127.0.0.1", port=port, log_level="warning")
+
+
+async def _drive(base_url: str, concurrency: int, duration: float):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(worker: int):
+        nonlocal errors
+        i = worker
+        async with httpx.AsyncClient(base_url=base_url, timeout=30) as http:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await http.get(PATHS[i % len(PATHS)])
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+                i += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(w) for w in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def _wait_ready(base_url: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(base_url + "/docs", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+def run(concurrency=32, duration=10.0, port=8801):
+    rows = []
+    for offset, mode in enumerate(["sync", "async"]):
+        server_port = port + offset
+        base_url = f"http://127.0.0.1:{server_port}"
+        server = subprocess.Popen(
+            [sys.executable, __file__, "--serve", mode, "--port", str(server_port)],
+            env={**os.environ, "PYTHONPATH": str(ROOT), "QUERY_ENGINE": "postgres"},
+            stderr=subprocess.DEVNULL,  # failed requests are counted, not logged
+        )
+        try:
+            _wait_ready(base_url)
+            asyncio.run(_drive(base_url, concurrency, 1.0))  # warm up pools
+            latencies, errors, elapsed = asyncio.run(_drive(base_url, concurrency, duration))
+        finally:
+            server.terminate()
+            server.wait()
+
+        latencies.sort()
+        rows.append([
+            mode, len(latencies), f"{len(latencies) / elapsed:.0f}",
+            f"{latencies[len(latencies) // 2] * 1000:.0f} ms",
+            f"{latencies[int(len(latencies) * 0.95)] * 1000:.0f} ms",
+            errors,
+        ])
+
+    print(f"{concurrency} concurrent clients, {duration:.0f}s per mode")
+    print(tabulate(rows, headers=["Mode", "Requests", "Req/s", "p50", "p95", "Errors"], tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async endpoints under load")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode")
+    parser.add_argument("--port", type=int, default=8801, help="First server port")
+    parser.add_argument("--serve", choices=["sync", "async"], help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve, args.port)
+    else:
+        run(concurrency=args.concurrency, duration=args.duration, port=args.port)
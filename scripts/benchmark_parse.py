@@ -0,0 +1,83 @@
+"""
+Benchmark parse_csv: original python-engine path vs the fast C-engine path.
+
+Parses every CSV in data/archive with both paths, checks the money columns
+agree to the cent, and reports timings, speedup and peak memory.
+
+Usage:
+    python scripts/benchmark_parse.py
+    python scripts/benchmark_parse.py --repeat 5 --chunksize 5000
+"""
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from tabulate import tabulate
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from load_data import parse_csv, iter_csv_chunks, NUMERIC_FIELDS
+
+ARCHIVE_DIR = Path(__file__).parent.parent / "data" / "archive"
+
+
+def _measure(fn, repeat):
+    """Best-of-N wall time and peak traced memory of one call."""
+    best = None
+    for _ in range(repeat):
+        with redirect_stdout(StringIO()):
+            start = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    with redirect_stdout(StringIO()):
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak / (1024 * 1024)
+
+
+def run(repeat=3, chunksize=5000):
+    rows = []
+    for csv_path in sorted(ARCHIVE_DIR.glob("boston_payroll_*.csv")):
+        year = int(csv_path.stem.rsplit("_", 1)[-1])
+        path = str(csv_path)
+
+        legacy, legacy_s, legacy_mb = _measure(lambda: parse_csv(path, year, fast=False), repeat)
+        fast, fast_s, fast_mb = _measure(lambda: parse_csv(path, year, fast=True), repeat)
+        _, chunked_s, chunked_mb = _measure(
+            lambda: sum(len(c) for c in iter_csv_chunks(path, year, chunksize=chunksize)), repeat
+        )
+
+        money_equal = all(
+            ((legacy[col] * 100).round() == (fast[col] * 100).round()).all()
+            for col in NUMERIC_FIELDS
+        )
+        rows.append([
+            year, len(fast),
+            f"{legacy_s * 1000:.0f} ms", f"{fast_s * 1000:.0f} ms", f"{legacy_s / fast_s:.1f}x",
+            f"{chunked_s * 1000:.0f} ms",
+            f"{legacy_mb:.0f} / {fast_mb:.0f} / {chunked_mb:.0f} MB",
+            "yes" if money_equal else "NO",
+        ])
+
+    print(tabulate(rows, headers=[
+        "Year", "Rows", "Legacy", "Fast", "Speedup", f"Chunked ({chunksize:,})",
+        "Peak mem (legacy/fast/chunked)", "Money equal",
+    ], tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark CSV parsing paths")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    parser.add_argument("--chunksize", type=int, default=5000, help="Rows per chunk for the chunked run")
+
+    args = parser.parse_args()
+    run(repeat=args.repeat, chunksize=args.chunksize)
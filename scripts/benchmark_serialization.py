@@ -0,0 +1,109 @@
+"""
+Benchmark /api/employees rendering: pydantic models vs the orjson fast path.
+
+Fetches a full year (limit=30000) both ways and reports fetch time,
+serialization time, peak memory and payload size, and checks that the two
+JSON documents are identical once parsed.
+
+    pydantic: Decimal rows -> EmployeeListResponse -> jsonable_encoder -> json.dumps
+              (what FastAPI does for a response_model)
+    orjson:   text-money rows -> backend.serialization.employee_list_json
+    columnar: cents rows -> backend.serialization.employee_columnar_json
+              (Accept: application/vnd.payroll.columnar+json; size only)
+
+Usage:
+    python scripts/benchmark_serialization.py
+    python scripts/benchmark_serialization.py --year 2023 --engine
+"""
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from tabulate import tabulate
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend import engine, queries
+from backend.models import EmployeeListResponse
+from backend.serialization import employee_list_json, employee_columnar_json
+
+LIMIT = 30000
+
+
+def _pydantic(year):
+    start = time.perf_counter()
+    data, total, next_cursor = queries.get_employees(year=year, limit=LIMIT)
+    fetched = time.perf_counter()
+    response = EmployeeListResponse(
+        data=data, total=total, limit=LIMIT, offset=0, year=year, next_cursor=next_cursor
+    )
+    body = json.dumps(jsonable_encoder(response)).encode('utf-8')
+    return body, fetched - start, time.perf_counter() - fetched
+
+
+def _orjson(year):
+    start = time.perf_counter()
+    data, total, next_cursor = queries.get_employees(year=year, limit=LIMIT, money_format='text')
+    fetched = time.perf_counter()
+    body = employee_list_json(data, total, LIMIT, 0, year, next_cursor)
+    return body, fetched - start, time.perf_counter() - fetched
+
+
+def _columnar(year):
+    start = time.perf_counter()
+    data, total, next_cursor = queries.get_employees(year=year, limit=LIMIT, money_format='cents')
+    fetched = time.perf_counter()
+    body = employee_columnar_json(queries.EMPLOYEE_COLUMNS, data, total, LIMIT, 0, year, next_cursor)
+    return body, fetched - start, time.perf_counter() - fetched
+
+
+def _measure(fn, year, repeat):
+    best = None
+    for _ in range(repeat):
+        body, fetch_s, serialize_s = fn(year)
+        if best is None or fetch_s + serialize_s < best[1] + best[2]:
+            best = (body, fetch_s, serialize_s)
+
+    tracemalloc.start()
+    fn(year)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best + (peak / (1024 * 1024),)
+
+
+def run(year=2024, repeat=3, use_engine=False):
+    if use_engine:
+        engine.load(sort_columns=['total_gross'])
+
+    results = {}
+    rows = []
+    for label, fn in [("pydantic", _pydantic), ("orjson", _orjson), ("columnar", _columnar)]:
+        body, fetch_s, serialize_s, peak_mb = _measure(fn, year, repeat)
+        results[label] = body
+        rows.append([
+            label, f"{fetch_s * 1000:.0f} ms", f"{serialize_s * 1000:.0f} ms",
+            f"{(fetch_s + serialize_s) * 1000:.0f} ms", f"{peak_mb:.0f} MB",
+            f"{len(body) / (1024 * 1024):.1f} MB",
+        ])
+
+    same = json.loads(results["pydantic"]) == json.loads(results["orjson"])
+    source = "memory engine" if use_engine else "postgres"
+    print(f"{year}, {len(json.loads(results['orjson'])['data']):,} rows from {source}")
+    print(tabulate(rows, headers=["Path", "Fetch", "Serialize", "Total", "Peak mem", "Payload"],
+                   tablefmt="grid"))
+    print(f"[{'OK' if same else 'ERROR'}] Responses {'identical' if same else 'differ'}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark employee list serialization")
+    parser.add_argument("--year", type=int, default=2024)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per path (best is kept)")
+    parser.add_argument("--engine", action="store_true", help="Serve rows from the in-memory engine")
+
+    args = parser.parse_args()
+    run(year=args.year, repeat=args.repeat, use_engine=args.engine)
@@ -0,0 +1,258 @@
+"""
+Index advisor for the /api/employees filter and sort matrix.
+
+Replays a representative get_employees workload through EXPLAIN (ANALYZE,
+BUFFERS, FORMAT JSON), using the same SQL as backend.queries. The workload
+covers every sort column and direction, with and without a department, each
+earnings_type filter, and the second page of each via its seek cursor, plus
+/api/employees/{key}/history by person_key and by row id. For
+each page it reports how the rows were read, whether a Sort node was
+needed, and the execution time; page COUNT(*) queries are reported the same
+way. It then lists how many of those queries read each secondary index on
+payroll_earnings, so indexes the workload never uses stand out.
+
+The indexes it checks for are backend.database.EMPLOYEE_PAGE_INDEXES. --apply
+creates the missing ones (CONCURRENTLY unless the table is partitioned),
+runs ANALYZE, and replays the workload again.
+
+Usage:
+    python scripts/index_advisor.py              # Report only
+    python scripts/index_advisor.py --apply      # Create missing indexes, re-run
+    python scripts/index_advisor.py --verbose    # Also print every plan
+"""
+import sys
+import json
+from pathlib import Path
+
+import psycopg2
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.config import DATABASE_URL
+from backend.database import get_db_connection, EMPLOYEE_PAGE_INDEXES, PAYROLL_NAMED
+from backend import partitions
+from backend.queries import (
+    VALID_SORT_COLUMNS,
+    VALID_EARNINGS_TYPES,
+    _employee_filters,
+    _employee_page_sql,
+    _seek_clause,
+    _history_sql,
+)
+
+PAGE_SIZE = 50
+SCAN_NODES = {'Seq Scan', 'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan', 'Bitmap Index Scan'}
+
+
+def _walk(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _walk(child)
+
+
+def summarize(plan):
+    """Access path, sort step and time of one EXPLAIN (FORMAT JSON) plan."""
+    nodes = list(_walk(plan['Plan']))
+    scans = []
+    indexes = set()
+    for node in nodes:
+        if node['Node Type'] in SCAN_NODES:
+            index = node.get('Index Name')
+            scans.append(f"{node['Node Type']}" + (f" {index}" if index else ""))
+            if index:
+                indexes.add(index)
+    return {
+        'scan': ", ".join(dict.fromkeys(scans)),
+        'indexes': indexes,
+        'sort': any(node['Node Type'] in ('Sort', 'Incremental Sort') for node in nodes),
+        'seq_scan': any(node['Node Type'] == 'Seq Scan' for node in nodes),
+        'ms': plan['Execution Time'],
+    }
+
+
+def _explain(cur, sql, params):
+    cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+    plan = cur.fetchone()[0]
+    return plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+
+
+def workload(cur):
+    """(filters, sort_by, sort_order) for the pages the dashboard asks for."""
+    cur.execute("SELECT MAX(year) FROM payroll_earnings")
+    year = cur.fetchone()[0]
+    cur.execute(f"""
+        SELECT department FROM {PAYROLL_NAMED}
+        WHERE year = %s AND department IS NOT NULL
+        GROUP BY department ORDER BY COUNT(*) DESC
+    """, [year])
+    departments = [row[0] for row in cur.fetchall()]
+    # The largest department and a mid-sized one
+    picks = [None] + [departments[i] for i in (0, min(10, len(departments) - 1)) if departments]
+
+    pages = []
+    for department in picks:
+        for sort_by in VALID_SORT_COLUMNS:
+            for sort_order in ('desc', 'asc'):
+                pages.append(((year, department, None, None), sort_by, sort_order))
+        for earnings_type in VALID_EARNINGS_TYPES:
+            pages.append(((year, department, None, earnings_type), 'total_gross', 'desc'))
+    return pages
+
+
+def _label(filters, sort_by, sort_order):
+    year, department, _, earnings_type = filters
+    parts = [str(year), (department or 'all')[:24]]
+    if earnings_type:
+        parts.append(f"{earnings_type}>0")
+    return f"{' / '.join(parts)}  {sort_by} {sort_order}"
+
+
+def replay(cur, verbose=False):
+    """EXPLAIN every page (first and second) and count of the workload; returns the rows."""
+    results = []
+    counts_seen = set()
+    for filters, sort_by, sort_order in workload(cur):
+        where_sql, params = _employee_filters(*filters)
+        if filters not in counts_seen:
+            counts_seen.add(filters)
+            plan = _explain(cur, f"SELECT COUNT(*) FROM payroll_earnings WHERE {where_sql}", params)
+            results.append(('count', _label(filters, '', '').rstrip(), summarize(plan)))
+
+        sql = _employee_page_sql(where_sql, sort_by, sort_order)
+        plan = _explain(cur, sql, params + [PAGE_SIZE + 1, 0])
+        results.append(('page 1', _label(filters, sort_by, sort_order), summarize(plan)))
+        if verbose:
+            print(json.dumps(plan['Plan'], indent=2))
+
+        # Second page through the seek cursor, as the frontend pages
+        cur.execute(sql, params + [PAGE_SIZE, 0])
+        rows = cur.fetchall()
+        if len(rows) == PAGE_SIZE:
+            columns = [desc[0] for desc in cur.description]
+            last = dict(zip(columns, rows[-1]))
+            seek_sql, seek_params = _seek_clause(sort_by, sort_order, last[sort_by], last['id'])
+            plan = _explain(cur, _employee_page_sql(f"{where_sql} AND {seek_sql}", sort_by, sort_order),
+                            params + seek_params + [PAGE_SIZE + 1, 0])
+            results.append(('page 2', _label(filters, sort_by, sort_order), summarize(plan)))
+
+    # Employee history, by person_key and by the id of one of the person's rows
+    cur.execute("SELECT id, person_key FROM payroll_earnings WHERE person_key IS NOT NULL LIMIT 1")
+    row = cur.fetchone()
+    if row:
+        for key in (row[1], str(row[0])):
+            results.append(('history', key, summarize(_explain(cur, *_history_sql(key)))))
+    return results
+
+
+def report(results):
+    print(f"\n{'Query':<8}{'Workload':<62}{'ms':>8}  {'Sort':<5} Access path")
+    for kind, label, summary in results:
+        print(f"{kind:<8}{label:<62}{summary['ms']:>8.2f}  {'yes' if summary['sort'] else '-':<5} "
+              f"{summary['scan']}")
+
+    pages = [s for kind, _, s in results if kind.startswith('page')]
+    sorted_pages = sum(s['sort'] for s in pages)
+    seq_scans = sum(s['seq_scan'] for _, _, s in results)
+    total_ms = sum(s['ms'] for _, _, s in results)
+    print(f"\n[OK] {len(results)} queries in {total_ms:.1f} ms: {sorted_pages}/{len(pages)} pages "
+          f"needed a sort, {seq_scans} sequential scans")
+    return sorted_pages, seq_scans
+
+
+def index_usage(cur, results):
+    """{secondary index on payroll_earnings: queries in results that read it}.
+
+    Partition indexes count under their parent index's name; the primary
+    and unique key indexes are left out.
+    """
+    cur.execute("""
+        SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = 'payroll_earnings'::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid)
+        ORDER BY c.relname
+    """)
+    usage = {row[0]: 0 for row in cur.fetchall()}
+    cur.execute("""
+        SELECT child.relname, parent.relname FROM pg_inherits h
+        JOIN pg_class child ON child.oid = h.inhrelid
+        JOIN pg_class parent ON parent.oid = h.inhparent
+        WHERE parent.relkind = 'I'
+    """)
+    parents = dict(cur.fetchall())
+    for _, _, summary in results:
+        for index in {parents.get(index, index) for index in summary['indexes']}:
+            if index in usage:
+                usage[index] += 1
+    return usage
+
+
+def report_usage(usage):
+    print(f"\n{'Index':<40}{'Queries':>8}")
+    for index, count in sorted(usage.items(), key=lambda item: (-item[1], item[0])):
+        print(f"{index:<40}{count:>8}")
+    unused = [index for index, count in usage.items() if not count]
+    if unused:
+        print(f"[WARN] Not read by this workload: {', '.join(unused)}")
+
+
+def missing_indexes(cur):
+    cur.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'payroll_earnings'")
+    existing = {row[0] for row in cur.fetchall()}
+    return {name: definition for name, definition in EMPLOYEE_PAGE_INDEXES.items() if name not in existing}
+
+
+def apply_indexes(missing):
+    """Create the missing page indexes; CONCURRENTLY needs autocommit and a plain table."""
+    conn = psycopg2.connect(DATABASE_URL)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET statement_timeout = 0")
+            concurrently = "" if partitions.is_partitioned(cur) else "CONCURRENTLY "
+            for name, definition in missing.items():
+                print(f"Creating {name} {definition}...")
+                cur.execute(f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON payroll_earnings {definition}")
+            cur.execute("ANALYZE payroll_earnings")
+    finally:
+        conn.close()
+    print(f"[OK] Created {len(missing)} indexes")
+
+
+def main(apply=False, verbose=False):
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            results = replay(cur, verbose)
+            usage = index_usage(cur, results)
+            missing = missing_indexes(cur)
+    report(results)
+    report_usage(usage)
+
+    if not missing:
+        print("[OK] All recommended page indexes exist")
+        return
+    print(f"\n[WARN] {len(missing)} recommended page indexes are missing:")
+    for name, definition in missing.items():
+        print(f"  {name} {definition}")
+    if not apply:
+        print("Run with --apply to create them")
+        return
+
+    apply_indexes(missing)
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            results = replay(cur, verbose)
+            usage = index_usage(cur, results)
+    report(results)
+    report_usage(usage)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Replay the get_employees workload and advise on indexes')
+    parser.add_argument('--apply', action='store_true', help='Create missing page indexes, then re-run')
+    parser.add_argument('--verbose', action='store_true', help='Print every page plan')
+    args = parser.parse_args()
+
+    main(apply=args.apply, verbose=args.verbose)
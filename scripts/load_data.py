@@ -1,14 +1,34 @@
+import io
 import os
 import sys
+import time
+import queue
+import threading
 import requests
+import numpy as np
 import pandas as pd
 import tempfile
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from backend.database import get_db_connection
+from backend.database import (
+    get_db_connection,
+    bump_dataset_version,
+    ensure_row_hash_column,
+    get_money_storage,
+    refresh_summary,
+    MONEY_COLUMNS,
+    MONEY_TYPES,
+)
+from backend import archive
+from backend import fingerprints
+from backend import linkage
+from backend import lookups
+from backend import money
+from backend import partitions
 
 # Resource IDs for each year
 RESOURCE_IDS = {
@@ -22,13 +42,13 @@ RESOURCE_IDS = {
 
 CSV_URL_TEMPLATE = "https://data.boston.gov/dataset/418983dc-7cae-42bb-88e4-d56f5adcf869/resource/{resource_id}/download"
 
-def download_csv(year, output_dir=None):
+def download_csv(year, output_dir=None, url_template=None):
     """Download data file for a specific year (CSV or XLSX)."""
     resource_id = RESOURCE_IDS.get(year)
     if not resource_id:
         raise ValueError(f"No resource ID for year {year}")
 
-    url = CSV_URL_TEMPLATE.format(resource_id=resource_id)
+    url = (url_template or CSV_URL_TEMPLATE).format(resource_id=resource_id)
 
     # Use system temp directory if not specified
     if output_dir is None:
@@ -52,68 +72,117 @@ def download_csv(year, output_dir=None):
 
     return str(output_path)
 
-def parse_csv(csv_path, year):
-    """Parse CSV or Excel file and transform to database-ready format."""
-    print(f"Parsing {csv_path}...")
-
-    df = None
+# Column mapping (CSV -> database)
+# Handle variations in column names across years
+COLUMN_MAP = {
+    'NAME': 'name',
+    'DEPARTMENT_NAME': 'department',
+    'TITLE': 'title',
+    'REGULAR': 'regular',
+    'RETRO': 'retro',
+    'OTHER': 'other',
+    'OVERTIME': 'overtime',
+    'INJURED': 'injured',
+    'DETAIL': 'detail',
+    'QUINN_EDUCATION': 'quinn_education',
+    'QUINN / EDUCATION INCENTIVE': 'quinn_education',
+    'QUINN_EDUCATION_INCENTIVE': 'quinn_education',
+    'TOTAL GROSS': 'total_gross',
+    'TOTAL_GROSS': 'total_gross',
+    'TOTAL_ GROSS': 'total_gross',  # 2022 has a space before GROSS
+    'TOTAL EARNINGS': 'total_gross',
+    'POSTAL': 'zip_code',
+}
 
-    # Check if it's an Excel file
-    if csv_path.endswith('.xlsx') or csv_path.endswith('.xls'):
+NUMERIC_FIELDS = ['regular', 'retro', 'other', 'overtime', 'injured',
+                  'detail', 'quinn_education', 'total_gross']
+
+def sniff_encoding(csv_path, sample_size=1 << 16):
+    """Pick a CSV encoding from a byte sample instead of trial full reads."""
+    with open(csv_path, 'rb') as f:
+        sample = f.read(sample_size)
+
+    if sample.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+
+    # Ignore a multi-byte character cut off at the end of the sample
+    if len(sample) == sample_size and b'\n' in sample:
+        sample = sample[:sample.rindex(b'\n')]
+    try:
+        sample.decode('utf-8')
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        pass
+
+    try:
+        sample.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin1'
+
+def money_to_cents(values):
+    """Vectorized money -> int64 cents. Unparseable values are 0.
+
+    Columns the C parser already read as numbers convert directly; text such
+    as '$1,234.56' is cleaned only for the cells that need it.
+    """
+    if not pd.api.types.is_numeric_dtype(values):
+        parsed = pd.to_numeric(values, errors='coerce')
+        dirty = parsed.isna() & values.notna()
+        if dirty.any():
+            cleaned = values[dirty].astype(str).str.replace(r'[$,\s]', '', regex=True)
+            parsed[dirty] = pd.to_numeric(cleaned, errors='coerce')
+        values = parsed
+    return (values.fillna(0) * 100).round().astype('int64')
+
+def _read_csv_legacy(csv_path):
+    # Try multiple encodings for CSV
+    encodings = ['utf-8-sig', 'latin1', 'cp1252', 'iso-8859-1']
+
+    for encoding in encodings:
         try:
-            df = pd.read_excel(csv_path, engine='openpyxl')
-            print(f"[OK] Successfully parsed Excel file")
+            df = pd.read_csv(csv_path, encoding=encoding, on_bad_lines='skip', engine='python')
+            print(f"[OK] Successfully parsed with encoding: {encoding}")
+            return df
+        except (UnicodeDecodeError, pd.errors.ParserError):
+            continue
         except Exception as e:
-            print(f"[ERROR] Failed to parse Excel: {e}")
-            raise
-    else:
-        # Try multiple encodings for CSV
-        encodings = ['utf-8-sig', 'latin1', 'cp1252', 'iso-8859-1']
-
-        for encoding in encodings:
-            try:
-                df = pd.read_csv(csv_path, encoding=encoding, on_bad_lines='skip', engine='python')
-                print(f"[OK] Successfully parsed with encoding: {encoding}")
-                break
-            except (UnicodeDecodeError, pd.errors.ParserError):
-                continue
-            except Exception as e:
-                print(f"[WARNING] Failed with {encoding}: {e}")
-                continue
-
-        if df is None:
-            raise ValueError(f"Could not parse file with any known encoding")
-
+            print(f"[WARNING] Failed with {encoding}: {e}")
+            continue
+
+    raise ValueError(f"Could not parse file with any known encoding")
+
+def _read_csv_fast(csv_path, chunksize=None):
+    """C-engine read: text columns as str (keeps ZIP leading zeros), money as numbers."""
+    encoding = sniff_encoding(csv_path)
+
+    def read(encoding):
+        header = pd.read_csv(csv_path, encoding=encoding, nrows=0).columns
+        text_columns = {
+            col: str for col in header
+            if COLUMN_MAP.get(col.strip(), col.strip()) not in NUMERIC_FIELDS
+        }
+        return pd.read_csv(
+            csv_path, encoding=encoding, dtype=text_columns, thousands=',',
+            engine='c', on_bad_lines='skip', chunksize=chunksize
+        )
+
+    try:
+        reader = read(encoding)
+    except UnicodeDecodeError:
+        # The sample looked like UTF-8 but the file is not; latin1 never fails
+        encoding = 'latin1'
+        reader = read(encoding)
+    print(f"[OK] Reading with encoding: {encoding}")
+    return reader
+
+def _transform(df, year, fast=True, money_as_cents=False):
+    """Map columns and clean values into the database layout."""
     # Strip whitespace from column names first
     df.columns = df.columns.str.strip()
 
-    # Column mapping (CSV -> database)
-    # Handle variations in column names across years
-    column_map = {
-        'NAME': 'name',
-        'DEPARTMENT_NAME': 'department',
-        'TITLE': 'title',
-        'REGULAR': 'regular',
-        'RETRO': 'retro',
-        'OTHER': 'other',
-        'OVERTIME': 'overtime',
-        'INJURED': 'injured',
-        'DETAIL': 'detail',
-        'QUINN_EDUCATION': 'quinn_education',
-        'QUINN / EDUCATION INCENTIVE': 'quinn_education',
-        'QUINN_EDUCATION_INCENTIVE': 'quinn_education',
-        'TOTAL GROSS': 'total_gross',
-        'TOTAL_GROSS': 'total_gross',
-        'TOTAL_ GROSS': 'total_gross',  # 2022 has a space before GROSS
-        'TOTAL EARNINGS': 'total_gross',
-        'POSTAL': 'zip_code',
-    }
-
     # Rename columns
-    df = df.rename(columns=column_map)
-
-    # Debug: show what columns we have after mapping
-    print(f"[DEBUG] Columns after mapping: {list(df.columns)}")
+    df = df.rename(columns=COLUMN_MAP)
 
     # Add year column
     df['year'] = year
@@ -129,10 +198,13 @@ def parse_csv(csv_path, year):
             df[field] = df[field].fillna('').astype(str).str.strip()
 
     # Clean numeric fields (remove commas, convert to float)
-    numeric_fields = ['regular', 'retro', 'other', 'overtime', 'injured',
-                      'detail', 'quinn_education', 'total_gross']
-    for field in numeric_fields:
-        if field in df.columns:
+    for field in NUMERIC_FIELDS:
+        if field not in df.columns:
+            continue
+        if fast:
+            cents = money_to_cents(df[field])
+            df[field] = cents if money_as_cents else cents / 100
+        else:
             # Remove commas and convert to numeric
             df[field] = pd.to_numeric(
                 df[field].astype(str).str.replace(',', '').str.replace('$', ''),
@@ -140,41 +212,100 @@ def parse_csv(csv_path, year):
             ).fillna(0)
 
     # Ensure all required columns exist (add missing ones with default values)
-    all_required_columns = ['year', 'name', 'department', 'title'] + numeric_fields + ['zip_code']
+    all_required_columns = ['year', 'name', 'department', 'title'] + NUMERIC_FIELDS + ['zip_code']
     for col in all_required_columns:
         if col not in df.columns:
-            if col in numeric_fields:
-                df[col] = 0.0
+            if col in NUMERIC_FIELDS:
+                df[col] = 0 if money_as_cents else 0.0
             else:
                 df[col] = ''
 
     # Select columns in the correct order
-    df = df[all_required_columns]
+    return df[all_required_columns]
+
+def parse_csv(csv_path, year, fast=True, money_as_cents=False):
+    """Parse CSV or Excel file and transform to database-ready format.
+
+    The fast path sniffs the encoding once, reads with the C engine with all
+    columns as text, and parses money straight to integer cents (returned as
+    exact 2-place dollars unless money_as_cents). fast=False is the original
+    python-engine path with full-file encoding retries.
+    """
+    print(f"Parsing {csv_path}...")
+
+    # Check if it's an Excel file
+    if csv_path.endswith('.xlsx') or csv_path.endswith('.xls'):
+        try:
+            df = pd.read_excel(csv_path, engine='openpyxl')
+            print(f"[OK] Successfully parsed Excel file")
+        except Exception as e:
+            print(f"[ERROR] Failed to parse Excel: {e}")
+            raise
+    elif fast:
+        df = _read_csv_fast(csv_path)
+    else:
+        df = _read_csv_legacy(csv_path)
+
+    df = _transform(df, year, fast=fast, money_as_cents=money_as_cents)
 
     print(f"[OK] Parsed {len(df)} records")
     return df
 
-def bulk_insert(df, year):
-    """Insert DataFrame into database using bulk insert."""
+def iter_csv_chunks(csv_path, year, chunksize=50000, money_as_cents=False):
+    """Parse a CSV in chunks so memory stays bounded on very large files."""
+    print(f"Parsing {csv_path} in chunks of {chunksize:,}...")
+    total = 0
+    for chunk in _read_csv_fast(csv_path, chunksize=chunksize):
+        df = _transform(chunk, year, money_as_cents=money_as_cents)
+        total += len(df)
+        yield df
+    print(f"[OK] Parsed {total} records")
+
+def _stored_money(cur, df, money_as_cents):
+    """df with money in the unit payroll_earnings stores (dollars or cents)."""
+    stored_in_cents = get_money_storage(cur) == 'cents'
+    if money_as_cents == stored_in_cents:
+        return df
+    df = df.copy()
+    for col in MONEY_COLUMNS:
+        df[col] = (df[col] * 100).round().astype('int64') if stored_in_cents else df[col] / 100
+    return df
+
+def bulk_insert(df, year, money_as_cents=False):
+    """Insert DataFrame into database using bulk insert.
+
+    Money in df is in dollars, or integer cents with money_as_cents; it is
+    converted if the table stores the other unit (see backend/money.py).
+    """
     print(f"Inserting {len(df)} records for year {year}...")
 
     with get_db_connection() as conn:
         with conn.cursor() as cur:
-            # Use executemany for bulk insert
-            records = df.to_dict('records')
+            # Loads can outlast the API's per-connection statement_timeout
+            cur.execute("SET LOCAL statement_timeout = 0")
+            ensure_row_hash_column(cur)
+            partitions.ensure_year_partition(cur, year)
+
+            # Use executemany for bulk insert (missing ids as None)
+            hashes = fingerprints.row_hashes(df, money_as_cents)
+            df = _stored_money(cur, df, money_as_cents)
+            encoded = lookups.encode_frame(cur, df)
+            encoded['row_hash'] = hashes
+            encoded = encoded.astype(object)
+            records = encoded.where(encoded.notna(), None).to_dict('records')
 
             insert_sql = """
                 INSERT INTO payroll_earnings (
-                    year, name, department, title,
+                    year, name, department_id, title_id,
                     regular, retro, other, overtime, injured, detail,
-                    quinn_education, total_gross, zip_code
+                    quinn_education, total_gross, zip_code, row_hash
                 ) VALUES (
-                    %(year)s, %(name)s, %(department)s, %(title)s,
+                    %(year)s, %(name)s, %(department_id)s, %(title_id)s,
                     %(regular)s, %(retro)s, %(other)s, %(overtime)s,
                     %(injured)s, %(detail)s, %(quinn_education)s,
-                    %(total_gross)s, %(zip_code)s
+                    %(total_gross)s, %(zip_code)s, %(row_hash)s
                 )
-                ON CONFLICT (year, name, department, title) DO UPDATE SET
+                ON CONFLICT (year, name, department_id, title_id) DO UPDATE SET
                     regular = EXCLUDED.regular,
                     retro = EXCLUDED.retro,
                     other = EXCLUDED.other,
@@ -183,52 +314,472 @@ def bulk_insert(df, year):
                     detail = EXCLUDED.detail,
                     quinn_education = EXCLUDED.quinn_education,
                     total_gross = EXCLUDED.total_gross,
-                    zip_code = EXCLUDED.zip_code
+                    zip_code = EXCLUDED.zip_code,
+                    row_hash = EXCLUDED.row_hash
             """
 
             cur.executemany(insert_sql, records)
+            refresh_summary(cur)
+            bump_dataset_version(cur)
             print(f"[OK] Inserted {len(records)} records for {year}")
 
-def load_year(year):
+STAGING_TABLE = "payroll_earnings_staging"
+
+# Department and title are staged and stored as ids (backend.lookups);
+# row_hash is computed from the frame (backend.fingerprints)
+DATA_COLUMNS = [
+    'year', 'name', 'department_id', 'title_id',
+    'regular', 'retro', 'other', 'overtime', 'injured', 'detail',
+    'quinn_education', 'total_gross', 'zip_code', 'row_hash',
+]
+KEY_COLUMNS = ['year', 'name', 'department_id', 'title_id']
+VALUE_COLUMNS = [col for col in DATA_COLUMNS if col not in KEY_COLUMNS]
+CONTENT_COLUMNS = [col for col in VALUE_COLUMNS if col != 'row_hash']
+TEXT_COLUMNS = ['name', 'zip_code']
+
+def _csv_buffer(df, first_row_num):
+    # row_num keeps file order so the last duplicate wins, as with executemany
+    staged = df[DATA_COLUMNS].copy()
+    staged.insert(0, 'row_num', range(first_row_num, first_row_num + len(staged)))
+    buffer = io.StringIO()
+    staged.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    return buffer
+
+def _stage(cur, frames, money_as_cents=False, stored_hashes=None):
+    """Encode and COPY frames into the (emptied) staging table, with their row hashes.
+
+    Money is staged in the unit payroll_earnings stores, so the merge
+    compares and copies it as is. Rows whose hash is in stored_hashes (those
+    already in payroll_earnings) are left out, unless an earlier frame staged
+    the same key: the last duplicate must still win.
+    Returns the distinct key count of the frames and all their row hashes.
+    """
+    columns_sql = ", ".join(DATA_COLUMNS)
+    money_type = MONEY_TYPES[get_money_storage(cur)]
+    cur.execute(f"""
+        CREATE UNLOGGED TABLE IF NOT EXISTS {STAGING_TABLE} (
+            row_num INTEGER,
+            year INTEGER,
+            name VARCHAR(255),
+            department_id SMALLINT,
+            title_id INTEGER,
+            regular {money_type},
+            retro {money_type},
+            other {money_type},
+            overtime {money_type},
+            injured {money_type},
+            detail {money_type},
+            quinn_education {money_type},
+            total_gross {money_type},
+            zip_code VARCHAR(10),
+            row_hash BIGINT
+        )
+    """)
+    # Staging tables created before row_hash existed
+    cur.execute(f"ALTER TABLE {STAGING_TABLE} ADD COLUMN IF NOT EXISTS row_hash BIGINT")
+    cur.execute(f"TRUNCATE {STAGING_TABLE}")
+
+    # FORCE_NOT_NULL keeps empty text as '' (CSV would read it as NULL)
+    copy_sql = f"""COPY {STAGING_TABLE} (row_num, {columns_sql})
+        FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL ({", ".join(TEXT_COLUMNS)}))"""
+    staged_rows = 0
+    keys, hashes, staged_keys = [], [], np.empty(0, dtype=np.int64)
+    for df in frames:
+        key_hashes = fingerprints.key_hashes(df)
+        # Last duplicate within the frame wins
+        last = ~pd.Series(key_hashes).duplicated(keep='last').to_numpy()
+        df, key_hashes = df[last], key_hashes[last]
+        df = df.assign(row_hash=fingerprints.row_hashes(df, money_as_cents))
+        keys.append(key_hashes)
+        hashes.append(df['row_hash'].to_numpy())
+
+        if stored_hashes is not None:
+            write = ~np.isin(df['row_hash'].to_numpy(), stored_hashes) | np.isin(key_hashes, staged_keys)
+            df, key_hashes = df[write], key_hashes[write]
+        staged_keys = np.concatenate([staged_keys, key_hashes])
+        if df.empty:
+            continue
+        df = _stored_money(cur, df, money_as_cents)
+        cur.copy_expert(copy_sql, _csv_buffer(lookups.encode_frame(cur, df), staged_rows))
+        staged_rows += len(df)
+
+    if not keys:
+        return 0, np.empty(0, dtype=np.int64)
+    return len(np.unique(np.concatenate(keys))), np.concatenate(hashes)
+
+def copy_merge(frames, year, money_as_cents=False):
+    """Stream the DataFrame into a staging table with COPY, then merge.
+
+    Each row is fingerprinted (backend.fingerprints) and only rows whose
+    hash is not already stored for the year, i.e. new or changed ones, go to
+    an UNLOGGED staging table in one COPY FROM STDIN; they are merged into
+    payroll_earnings with a single INSERT ... SELECT ... ON CONFLICT. Rows of
+    the year missing from the source are then deleted, so an identical
+    republished file writes nothing. Assumes one loader at a time, since the
+    staging table is shared. frames may also be an iterator of chunks (see
+    iter_csv_chunks); each is copied as it arrives and merged once at the
+    end. Money is in dollars, or integer cents with money_as_cents.
+    Returns counts of rows inserted, updated, unchanged and removed, and
+    of updated rows per changed column.
+    """
+    if isinstance(frames, pd.DataFrame):
+        print(f"Copying {len(frames)} records for year {year}...")
+        frames = [frames]
+    else:
+        print(f"Copying records for year {year}...")
+
+    columns_sql = ", ".join(DATA_COLUMNS)
+    key_sql = ", ".join(KEY_COLUMNS)
+    update_sql = ",\n".join(f"{col} = EXCLUDED.{col}" for col in VALUE_COLUMNS)
+    current_sql = ", ".join(f"payroll_earnings.{col}" for col in VALUE_COLUMNS)
+    excluded_sql = ", ".join(f"EXCLUDED.{col}" for col in VALUE_COLUMNS)
+    staged_sql = ", ".join(f"s.{col}" for col in CONTENT_COLUMNS)
+    live_sql = ", ".join(f"p.{col}" for col in CONTENT_COLUMNS)
+    latest_sql = f"""
+        SELECT DISTINCT ON ({key_sql}) *
+        FROM {STAGING_TABLE}
+        ORDER BY {key_sql}, row_num DESC
+    """
+    # The unique key treats NULL ids as distinct, so match keys NULL-safely
+    same_key_sql = """p.year = s.year AND p.name = s.name
+        AND p.department_id IS NOT DISTINCT FROM s.department_id
+        AND p.title_id IS NOT DISTINCT FROM s.title_id"""
+    null_key_sql = "(s.department_id IS NULL OR s.title_id IS NULL)"
+    column_counts_sql = ",\n".join(
+        f"COUNT(*) FILTER (WHERE p.id IS NOT NULL AND p.{col} IS DISTINCT FROM s.{col})"
+        for col in CONTENT_COLUMNS
+    )
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            # Loads can outlast the API's per-connection statement_timeout
+            cur.execute("SET LOCAL statement_timeout = 0")
+            ensure_row_hash_column(cur)
+            partitions.ensure_year_partition(cur, year)
+            cur.execute("SELECT row_hash FROM payroll_earnings WHERE year = %s AND row_hash IS NOT NULL",
+                        [year])
+            stored_hashes = np.array([row[0] for row in cur.fetchall()], dtype=np.int64)
+            distinct_rows, hashes = _stage(cur, frames, money_as_cents, stored_hashes)
+
+            # Staged rows are new, changed, or stored before row_hash existed
+            cur.execute(f"""
+                SELECT
+                    COUNT(*) FILTER (WHERE p.id IS NULL),
+                    COUNT(*) FILTER (WHERE p.id IS NOT NULL AND ({staged_sql}) IS DISTINCT FROM ({live_sql})),
+                    COUNT(*) FILTER (WHERE p.id IS NOT NULL AND ({staged_sql}) IS NOT DISTINCT FROM ({live_sql})),
+                    {column_counts_sql}
+                FROM ({latest_sql}) s
+                LEFT JOIN payroll_earnings p ON p.year = %s AND {same_key_sql}
+            """, [year])
+            inserted, updated, fingerprinted, *column_counts = cur.fetchone()
+
+            # ON CONFLICT never fires for a key with a NULL id, so those rows
+            # are updated here and left out of the INSERT
+            cur.execute(f"""
+                UPDATE payroll_earnings p SET
+                    {", ".join(f"{col} = s.{col}" for col in VALUE_COLUMNS)}
+                FROM ({latest_sql}) s
+                WHERE p.year = %s AND {null_key_sql} AND {same_key_sql}
+                  AND ({", ".join(f"p.{col}" for col in VALUE_COLUMNS)})
+                      IS DISTINCT FROM ({", ".join(f"s.{col}" for col in VALUE_COLUMNS)})
+            """, [year])
+            cur.execute(f"""
+                INSERT INTO payroll_earnings ({columns_sql})
+                SELECT {columns_sql}
+                FROM ({latest_sql}) s
+                WHERE NOT ({null_key_sql} AND EXISTS (
+                    SELECT 1 FROM payroll_earnings p WHERE p.year = %s AND {same_key_sql}
+                ))
+                ON CONFLICT ({key_sql}) DO UPDATE SET
+                    {update_sql}
+                WHERE ({current_sql}) IS DISTINCT FROM ({excluded_sql})
+            """, [year])
+            cur.execute(f"TRUNCATE {STAGING_TABLE}")
+
+            # Every row in the source now has its hash stored; an empty
+            # source (a failed export) is not taken to mean the year is gone
+            removed = 0
+            if distinct_rows:
+                cur.execute("""
+                    DELETE FROM payroll_earnings p
+                    WHERE p.year = %s
+                      AND NOT EXISTS (SELECT 1 FROM unnest(%s::bigint[]) h(row_hash)
+                                      WHERE h.row_hash = p.row_hash)
+                """, [year, hashes.tolist()])
+                removed = cur.rowcount
+            if inserted or updated or removed:
+                refresh_summary(cur)
+                bump_dataset_version(cur)
+
+    result = {
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': distinct_rows - inserted - updated,
+        'removed': removed,
+        'changed_columns': {col: count for col, count in zip(CONTENT_COLUMNS, column_counts) if count},
+    }
+    print(f"[OK] Merged {year}: {result['inserted']:,} inserted, {result['updated']:,} updated, "
+          f"{result['unchanged']:,} unchanged, {result['removed']:,} removed")
+    if fingerprinted:
+        print(f"     Stored the row hash of {fingerprinted:,} unchanged rows")
+    if result['changed_columns']:
+        print("     Changed: " + ", ".join(
+            f"{col} {count:,}" for col, count in sorted(result['changed_columns'].items(),
+                                                         key=lambda item: -item[1])))
+    return result
+
+def copy_swap(frames, year, money_as_cents=False):
+    """Replace a whole year by building its partition aside and swapping it in.
+
+    Needs a year-partitioned payroll_earnings (see backend/partitions.py).
+    The frames are staged as in copy_merge, deduplicated into a standalone
+    payroll_earnings_<year>_load table and indexed while readers keep using
+    the live partition; the old partition is then detached and dropped and
+    the new one attached, in the same transaction; rows missing from the
+    source disappear. Rows that match a live row keep its id, person_key and
+    created_at; if nothing changed no swap happens.
+    money_as_cents is as for copy_merge.
+    Returns counts of rows inserted, updated, unchanged and removed.
+    """
+    if isinstance(frames, pd.DataFrame):
+        print(f"Copying {len(frames)} records for year {year}...")
+        frames = [frames]
+    else:
+        print(f"Copying records for year {year}...")
+
+    columns_sql = ", ".join(DATA_COLUMNS)
+    staged_sql = ", ".join(f"s.{col}" for col in DATA_COLUMNS)
+    key_sql = ", ".join(KEY_COLUMNS)
+    new_values_sql = ", ".join(f"n.{col}" for col in VALUE_COLUMNS)
+    live_values_sql = ", ".join(f"p.{col}" for col in VALUE_COLUMNS)
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            # Loads can outlast the API's per-connection statement_timeout
+            cur.execute("SET LOCAL statement_timeout = 0")
+            if not partitions.is_partitioned(cur):
+                raise RuntimeError("--method swap needs payroll_earnings partitioned by year "
+                                   "(run scripts/migrate_partitions.py)")
+            ensure_row_hash_column(cur)
+            distinct_rows, _ = _stage(cur, frames, money_as_cents)
+
+            table = partitions.create_load_table(cur, year)
+            cur.execute(f"""
+                INSERT INTO {table} (id, {columns_sql}, person_key, created_at)
+                SELECT
+                    COALESCE(p.id, nextval(pg_get_serial_sequence('payroll_earnings', 'id'))),
+                    {staged_sql}, p.person_key, COALESCE(p.created_at, CURRENT_TIMESTAMP)
+                FROM (
+                    SELECT DISTINCT ON ({key_sql}) *
+                    FROM {STAGING_TABLE}
+                    ORDER BY {key_sql}, row_num DESC
+                ) s
+                LEFT JOIN payroll_earnings p
+                    ON p.year = %s AND p.year = s.year AND p.name = s.name
+                    AND p.department_id IS NOT DISTINCT FROM s.department_id
+                    AND p.title_id IS NOT DISTINCT FROM s.title_id
+            """, [year])
+            cur.execute(f"TRUNCATE {STAGING_TABLE}")
+
+            cur.execute(f"""
+                SELECT
+                    COUNT(*) FILTER (WHERE p.id IS NULL),
+                    COUNT(*) FILTER (WHERE p.id IS NOT NULL
+                                     AND ({new_values_sql}) IS DISTINCT FROM ({live_values_sql}))
+                FROM {table} n
+                LEFT JOIN payroll_earnings p ON p.year = %s AND p.id = n.id
+            """, [year])
+            inserted, updated = cur.fetchone()
+            cur.execute("SELECT COUNT(*) FROM payroll_earnings WHERE year = %s", [year])
+            removed = cur.fetchone()[0] - (distinct_rows - inserted)
+
+            if inserted or updated or removed:
+                partitions.index_like_parent(cur, table, year)
+                partitions.swap_in(cur, table, year)
+                refresh_summary(cur)
+                bump_dataset_version(cur)
+            else:
+                cur.execute(f"DROP TABLE {table}")
+
+    result = {
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': distinct_rows - inserted - updated,
+        'removed': removed,
+    }
+    print(f"[OK] Swapped {year}: {result['inserted']:,} inserted, {result['updated']:,} updated, "
+          f"{result['unchanged']:,} unchanged, {result['removed']:,} removed")
+    return result
+
+WRITERS = {'copy': copy_merge, 'swap': copy_swap, 'upsert': bulk_insert}
+
+def load_year(year, method='copy', url_template=None, chunksize=None):
     """Download, parse, and load data for a specific year."""
     print(f"\n{'='*60}")
     print(f"Loading data for year {year}")
     print(f"{'='*60}")
 
     # Download CSV
-    csv_path = download_csv(year)
-
-    # Parse CSV
-    df = parse_csv(csv_path, year)
+    csv_path = download_csv(year, url_template=url_template)
 
-    # Insert into database
-    bulk_insert(df, year)
+    # Parse CSV straight into the stored money unit and insert into database
+    cents = money.in_cents()
+    if chunksize and method != 'upsert' and not csv_path.endswith('.xlsx'):
+        chunks = iter_csv_chunks(csv_path, year, chunksize=chunksize, money_as_cents=cents)
+        WRITERS[method](chunks, year, money_as_cents=cents)
+    else:
+        WRITERS[method](parse_csv(csv_path, year, money_as_cents=cents), year, money_as_cents=cents)
 
     # Cleanup temp file
     Path(csv_path).unlink()
     print(f"[OK] Cleaned up temp file")
 
-def load_all_years():
+def load_year_from_archive(year, method='copy'):
+    """Load a year from its memory-mapped Arrow archive file (no download or parse)."""
+    print(f"\n{'='*60}")
+    print(f"Loading data for year {year} from archive")
+    print(f"{'='*60}")
+
+    if not archive.arrow_path(year).exists():
+        print(f"[ERROR] No Arrow archive for {year}; run scripts/archive_data.py first")
+        return
+
+    # Checksum is verified against manifest.txt before mapping; the archive
+    # holds cents, so a cents table takes them as they are
+    cents = money.in_cents()
+    df = archive.to_frame(archive.read_year(year, verify=True), money_as_cents=cents)
+    WRITERS[method](df, year, money_as_cents=cents)
+
+def load_all_years(method='copy', url_template=None, chunksize=None):
     """Load data for all years (2020-2024)."""
     for year in sorted(RESOURCE_IDS.keys()):
         try:
-            load_year(year)
+            load_year(year, method=method, url_template=url_template, chunksize=chunksize)
         except Exception as e:
             print(f"[ERROR] Error loading year {year}: {e}")
             raise
 
+def _timed_download(year, url_template):
+    start = time.perf_counter()
+    path = download_csv(year, url_template=url_template)
+    return path, time.perf_counter() - start
+
+def _timed_parse(path, year, money_as_cents):
+    # Runs in a worker process; parse_csv is CPU-bound pandas work
+    start = time.perf_counter()
+    df = parse_csv(path, year, money_as_cents=money_as_cents)
+    return df, time.perf_counter() - start
+
+def load_all_years_pipelined(workers=4, method='copy', url_template=None):
+    """Load every year with overlapping download, parse and write stages.
+
+    Downloads run concurrently in threads, parse_csv runs in a process pool,
+    and parsed frames go through a bounded queue to a single database writer
+    thread. Wall-clock time approaches that of the slowest single year.
+    Returns per-stage timings as {stage: {year: seconds}}.
+    """
+    years = sorted(RESOURCE_IDS.keys())
+    timings = {'download': {}, 'parse': {}, 'write': {}}
+    cents = money.in_cents()
+    frames = queue.Queue(maxsize=workers)
+    writer_errors = []
+
+    def writer():
+        while True:
+            item = frames.get()
+            if item is None:
+                return
+            year, df, path = item
+            if writer_errors:
+                continue  # drain so producers never block on a dead writer
+            try:
+                start = time.perf_counter()
+                WRITERS[method](df, year, money_as_cents=cents)
+                timings['write'][year] = time.perf_counter() - start
+                Path(path).unlink()
+            except Exception as e:
+                print(f"[ERROR] Error writing year {year}: {e}")
+                writer_errors.append(e)
+
+    print(f"Loading {len(years)} years with {workers} workers: {years}")
+    started = time.perf_counter()
+    writer_thread = threading.Thread(target=writer, name="payroll-writer")
+    writer_thread.start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as downloads, \
+                ProcessPoolExecutor(max_workers=workers) as parsers:
+            download_futures = {
+                downloads.submit(_timed_download, year, url_template): year
+                for year in years
+            }
+            parse_futures = {}
+            for future in as_completed(download_futures):
+                year = download_futures[future]
+                path, elapsed = future.result()
+                timings['download'][year] = elapsed
+                parse_futures[parsers.submit(_timed_parse, path, year, cents)] = (year, path)
+
+            for future in as_completed(parse_futures):
+                year, path = parse_futures[future]
+                df, elapsed = future.result()
+                timings['parse'][year] = elapsed
+                frames.put((year, df, path))  # blocks while the writer is behind
+    finally:
+        frames.put(None)
+        writer_thread.join()
+
+    if writer_errors:
+        raise writer_errors[0]
+
+    total = time.perf_counter() - started
+    print(f"\n{'='*60}")
+    print(f"{'Year':<8}{'Download':>12}{'Parse':>12}{'Write':>12}")
+    for year in years:
+        print(f"{year:<8}"
+              f"{timings['download'].get(year, 0):>11.2f}s"
+              f"{timings['parse'].get(year, 0):>11.2f}s"
+              f"{timings['write'].get(year, 0):>11.2f}s")
+    print(f"[OK] Loaded {len(years)} years in {total:.2f}s wall clock")
+    return timings
+
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description='Load Boston payroll data')
     parser.add_argument('--year', type=int, help='Load specific year')
     parser.add_argument('--all', action='store_true', help='Load all years')
+    parser.add_argument('--method', choices=['copy', 'swap', 'upsert'], default='copy',
+                        help='copy: merge new and changed rows, delete missing ones (default); '
+                             'swap: replace the whole year partition (partitioned table only); '
+                             'upsert: row-by-row INSERT ... ON CONFLICT')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='With --all, download and parse years in parallel (pipelined)')
+    parser.add_argument('--source-url', default=os.getenv('PAYROLL_SOURCE_URL'),
+                        help='Download URL template with {resource_id} '
+                             '(e.g. a local stand-in for data.boston.gov)')
+    parser.add_argument('--chunksize', type=int,
+                        help='Parse and COPY the CSV in chunks of this many rows (bounded memory)')
+    parser.add_argument('--from-archive', action='store_true',
+                        help='Load from data/archive/*.arrow instead of downloading')
 
     args = parser.parse_args()
 
-    if args.year:
-        load_year(args.year)
+    if args.from_archive and args.year:
+        load_year_from_archive(args.year, method=args.method)
+    elif args.from_archive and args.all:
+        for year in archive.archived_years():
+            load_year_from_archive(year, method=args.method)
+    elif args.year:
+        load_year(args.year, method=args.method, url_template=args.source_url, chunksize=args.chunksize)
+    elif args.all and args.workers > 1:
+        load_all_years_pipelined(workers=args.workers, method=args.method, url_template=args.source_url)
     elif args.all:
-        load_all_years()
+        load_all_years(method=args.method, url_template=args.source_url, chunksize=args.chunksize)
     else:
         print("Usage: python scripts/load_data.py --year 2024  OR  --all")
+        sys.exit(1)
+
+    # Re-link people across years once the new rows are in
+    linkage.link()
@@ -0,0 +1,142 @@
+"""
+Convert payroll_earnings to dictionary-encoded department and title.
+
+1. Fill the payroll_departments and payroll_titles lookup tables with every distinct name,
+   ids in name order (backend.lookups).
+2. Drop the secondary indexes, add department_id and title_id, set them
+   from the names, and drop the department and title text columns (with
+   the unique key); then rebuild the key and indexes on the ids.
+3. Rebuild the payroll_earnings_named and payroll_dept_year_summary views.
+4. VACUUM FULL the table, so the space of the dropped columns is returned.
+
+Steps 1-3 run in one transaction, holding payroll_earnings exclusively
+(under a minute for the city's data); step 4 rewrites the table, also
+exclusively. Works on the plain and the year-partitioned layout.
+
+Usage:
+    python scripts/migrate_lookups.py
+    python scripts/migrate_lookups.py --no-vacuum
+"""
+import sys
+import time
+from pathlib import Path
+
+import psycopg2
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.config import DATABASE_URL
+from backend.database import (
+    get_db_connection,
+    bump_dataset_version,
+    create_lookup_tables,
+    create_payroll_table,
+    create_named_view,
+    get_money_storage,
+    refresh_summary,
+    PAYROLL_NAMED,
+    SUMMARY_VIEW,
+)
+from backend import lookups
+from backend import partitions
+
+TABLE = "payroll_earnings"
+UNIQUE_KEY = "payroll_earnings_year_name_department_id_title_id_key"
+STAGING_TABLE = "payroll_earnings_staging"
+
+
+def _size(cur):
+    cur.execute(f"SELECT pg_size_pretty(pg_total_relation_size('{TABLE}'))")
+    return cur.fetchone()[0]
+
+
+def encode():
+    """Steps 1-3; returns False if the table was already encoded."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SET LOCAL statement_timeout = 0")
+            if lookups.is_encoded(cur):
+                print("[OK] payroll_earnings already stores department_id and title_id")
+                return False
+            cur.execute(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+            # Partition sizes are not summed into the parent's
+            print(f"Size before: {_size(cur)}" + (" (parent only)" if partitions.is_partitioned(cur) else ""))
+
+            create_lookup_tables(cur)
+            for column, table in lookups.LOOKUPS.items():
+                cur.execute(f"SELECT DISTINCT {column} FROM {TABLE} WHERE {column} IS NOT NULL")
+                ids = lookups.lookup_ids(cur, column, [row[0] for row in cur.fetchall()])
+                cur.execute(f"ANALYZE {table}")
+                print(f"[OK] {table}: {len(ids):,} names")
+
+            # Every row is rewritten below; the indexes are rebuilt afterwards
+            # rather than updated row by row
+            cur.execute("""
+                SELECT i.indexrelid::regclass::text FROM pg_index i
+                WHERE i.indrelid = %s::regclass
+                  AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+            """, [TABLE])
+            for (index,) in cur.fetchall():
+                cur.execute(f"DROP INDEX {index}")
+
+            cur.execute(f"""
+                ALTER TABLE {TABLE}
+                    ADD COLUMN department_id SMALLINT REFERENCES payroll_departments ON UPDATE CASCADE,
+                    ADD COLUMN title_id INTEGER REFERENCES payroll_titles ON UPDATE CASCADE
+            """)
+            cur.execute(f"""
+                UPDATE {TABLE} p SET
+                    department_id = (SELECT department_id FROM payroll_departments d WHERE d.department = p.department),
+                    title_id = (SELECT title_id FROM payroll_titles t WHERE t.title = p.title)
+            """)
+            print(f"[OK] Encoded {cur.rowcount:,} rows")
+
+            # Views first: they depend on the text columns
+            cur.execute(f"DROP MATERIALIZED VIEW IF EXISTS {SUMMARY_VIEW}")
+            cur.execute(f"DROP VIEW IF EXISTS {PAYROLL_NAMED}")
+            cur.execute(f"ALTER TABLE {TABLE} DROP COLUMN department, DROP COLUMN title")
+            cur.execute(f"""
+                ALTER TABLE {TABLE} ADD CONSTRAINT {UNIQUE_KEY}
+                UNIQUE (year, name, department_id, title_id)
+            """)
+            create_payroll_table(cur, partitioned=partitions.is_partitioned(cur),
+                                 money_storage=get_money_storage(cur))
+            # Loaders recreate it with the id columns
+            cur.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+
+            create_named_view(cur)
+            refresh_summary(cur)
+            bump_dataset_version(cur)
+    print("[OK] payroll_earnings now stores department_id and title_id")
+    return True
+
+
+def vacuum():
+    """Rewrite the table (and its partitions) so dropped columns take no space."""
+    start = time.perf_counter()
+    conn = psycopg2.connect(DATABASE_URL)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET statement_timeout = 0")
+            cur.execute(f"VACUUM FULL ANALYZE {TABLE}")
+            print(f"[OK] Rewrote {TABLE} in {time.perf_counter() - start:.2f}s, size now {_size(cur)}")
+    finally:
+        conn.close()
+
+
+def migrate(run_vacuum=True):
+    if encode() and run_vacuum:
+        vacuum()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Dictionary-encode department and title')
+    parser.add_argument('--no-vacuum', action='store_true',
+                        help='Skip the VACUUM FULL that reclaims the dropped columns')
+    args = parser.parse_args()
+
+    migrate(run_vacuum=not args.no_vacuum)
@@ -0,0 +1,81 @@
+"""
+Convert payroll_earnings money between DECIMAL(12,2) dollars and BIGINT cents.
+
+The eight earnings columns are rewritten in one ALTER TABLE (the table and
+the indexes on them are rebuilt once), and the payroll_earnings_named and
+payroll_dept_year_summary views, which depend on them, are recreated. Runs in
+one transaction holding payroll_earnings exclusively (seconds for the city's
+data); works on the plain and the year-partitioned layout. The API picks up
+the new layout with the dataset version (see backend/money.py).
+
+Usage:
+    python scripts/migrate_money.py              # to BIGINT cents
+    python scripts/migrate_money.py --to decimal # back to DECIMAL(12,2)
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import (
+    get_db_connection,
+    bump_dataset_version,
+    create_named_view,
+    create_summary,
+    get_money_storage,
+    MONEY_COLUMNS,
+    MONEY_TYPES,
+    PAYROLL_NAMED,
+    SUMMARY_VIEW,
+)
+
+TABLE = "payroll_earnings"
+STAGING_TABLE = "payroll_earnings_staging"
+
+# New column value from the old one, by target layout
+CONVERSIONS = {
+    'cents': "ROUND({col} * 100)::bigint",
+    'decimal': "({col} * 0.01)::numeric(12,2)",
+}
+
+
+def migrate(to='cents'):
+    start = time.perf_counter()
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SET LOCAL statement_timeout = 0")
+            cur.execute(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+            if get_money_storage(cur) == to:
+                print(f"[OK] {TABLE} already stores money as {to}")
+                return False
+
+            # Both views select the money columns
+            cur.execute(f"DROP MATERIALIZED VIEW IF EXISTS {SUMMARY_VIEW}")
+            cur.execute(f"DROP VIEW IF EXISTS {PAYROLL_NAMED}")
+            alter_sql = ",\n".join(
+                f"ALTER COLUMN {col} TYPE {MONEY_TYPES[to]} USING {CONVERSIONS[to].format(col=col)}"
+                for col in MONEY_COLUMNS
+            )
+            cur.execute(f"ALTER TABLE {TABLE} {alter_sql}")
+            # Loaders recreate it with the new money type
+            cur.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+
+            create_named_view(cur)
+            create_summary(cur)
+            cur.execute(f"ANALYZE {TABLE}")
+            bump_dataset_version(cur)
+    print(f"[OK] {TABLE} now stores money as {to} ({time.perf_counter() - start:.2f}s)")
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Convert payroll_earnings money storage')
+    parser.add_argument('--to', choices=list(MONEY_TYPES), default='cents',
+                        help='cents: BIGINT cents (default); decimal: DECIMAL(12,2) dollars')
+    args = parser.parse_args()
+
+    migrate(to=args.to)
@@ -0,0 +1,178 @@
+"""
+Convert payroll_earnings to the year-partitioned layout, online.
+
+1. Create payroll_earnings_partitioned (PARTITION BY LIST (year)) with the
+   same columns and indexes, sharing payroll_earnings_id_seq so ids are kept.
+2. Copy each year into its payroll_earnings_<year> partition, one
+   transaction per year, while the API keeps reading (and loaders writing)
+   the old table.
+3. Swap: lock the old table against writes (reads continue), re-copy any
+   year whose rows changed since step 2, move the id sequence, rename the
+   tables and indexes, and drop the old table (--keep-old renames it to
+   payroll_earnings_unpartitioned instead). The payroll_earnings_named and
+   payroll_dept_year_summary views are rebuilt on the new table in the same
+   transaction.
+
+Readers wait only for the renames in step 3. A run that is interrupted can
+be restarted; years already copied and unchanged are skipped.
+
+Usage:
+    python scripts/migrate_partitions.py
+    python scripts/migrate_partitions.py --keep-old
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import (
+    get_db_connection,
+    bump_dataset_version,
+    create_payroll_table,
+    create_summary,
+    create_named_view,
+    get_money_storage,
+    PERSON_KEY_COLUMN_SQL,
+    ROW_HASH_COLUMN_SQL,
+    PAYROLL_NAMED,
+    SUMMARY_VIEW,
+)
+from backend import partitions
+from backend import lookups
+
+OLD = "payroll_earnings"
+NEW = "payroll_earnings_partitioned"
+KEPT = "payroll_earnings_unpartitioned"
+SEQUENCE = "payroll_earnings_id_seq"
+
+COLUMNS = [
+    'id', 'year', 'name', 'department_id', 'title_id',
+    'regular', 'retro', 'other', 'overtime', 'injured', 'detail',
+    'quinn_education', 'total_gross', 'zip_code', 'person_key', 'row_hash', 'created_at',
+]
+
+
+def _fingerprints(cur, table):
+    """{year: (rows, hash of every row)} for table."""
+    columns_sql = ", ".join(COLUMNS)
+    cur.execute(f"""
+        SELECT year, COUNT(*), SUM(hashtextextended(ROW({columns_sql})::text, 0))
+        FROM {table}
+        GROUP BY year
+    """)
+    return {year: (count, digest) for year, count, digest in cur.fetchall()}
+
+
+def _copy_year(cur, year):
+    """(Re)fill year's partition of the new table from the old table."""
+    partition = partitions.ensure_year_partition(cur, year, parent=NEW)
+    columns_sql = ", ".join(COLUMNS)
+    cur.execute(f"TRUNCATE {partition}")
+    cur.execute(f"INSERT INTO {partition} ({columns_sql}) SELECT {columns_sql} FROM {OLD} WHERE year = %s",
+                [year])
+    rows = cur.rowcount
+    cur.execute(f"ANALYZE {partition}")
+    return rows
+
+
+def _rename_indexes(cur, table, rename):
+    cur.execute("""
+        SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass
+    """, [table])
+    for (index,) in cur.fetchall():
+        if rename(index) != index:
+            cur.execute(f"ALTER INDEX {index} RENAME TO {rename(index)}")
+
+
+def create_new_table():
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            create_payroll_table(cur, NEW, partitioned=True, index_suffix='_new',
+                                 money_storage=get_money_storage(cur, OLD))
+            # Share the old id sequence so existing ids and new ones never collide
+            cur.execute(f"ALTER TABLE {NEW} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+            cur.execute(f"DROP SEQUENCE IF EXISTS {NEW}_id_seq")
+    print(f"[OK] Created {NEW}")
+
+
+def copy_years():
+    """Copy every year that differs between the tables, one transaction each."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            old, new = _fingerprints(cur, OLD), _fingerprints(cur, NEW)
+
+    for year in sorted(old):
+        if new.get(year) == old[year]:
+            print(f"[OK] {year} already copied")
+            continue
+        start = time.perf_counter()
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SET LOCAL statement_timeout = 0")
+                rows = _copy_year(cur, year)
+        print(f"[OK] Copied {year}: {rows:,} rows in {time.perf_counter() - start:.2f}s")
+
+
+def swap(keep_old=False):
+    """Catch up on writes made during the copy and put the new table in place."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SET LOCAL statement_timeout = 0")
+            # Blocks loaders, not readers, until the renames below
+            cur.execute(f"LOCK TABLE {OLD} IN SHARE ROW EXCLUSIVE MODE")
+
+            old, new = _fingerprints(cur, OLD), _fingerprints(cur, NEW)
+            for year in sorted(set(old) | set(new)):
+                if old.get(year) != new.get(year):
+                    rows = _copy_year(cur, year)
+                    print(f"[OK] Re-copied {year} (changed during the copy): {rows:,} rows")
+
+            cur.execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {NEW}.id")
+            # The views depend on the old table; rebuilt on the new one below
+            cur.execute(f"DROP MATERIALIZED VIEW IF EXISTS {SUMMARY_VIEW}")
+            cur.execute(f"DROP VIEW IF EXISTS {PAYROLL_NAMED}")
+            if keep_old:
+                cur.execute(f"ALTER TABLE {OLD} RENAME TO {KEPT}")
+                _rename_indexes(cur, KEPT, lambda name: f"{name}_old")
+            else:
+                cur.execute(f"DROP TABLE {OLD}")
+
+            cur.execute(f"ALTER TABLE {NEW} RENAME TO {OLD}")
+            _rename_indexes(cur, OLD, lambda name: name.replace(NEW, OLD).removesuffix('_new'))
+            create_named_view(cur)
+            create_summary(cur)
+            bump_dataset_version(cur)
+
+    print(f"[OK] payroll_earnings is now partitioned by year"
+          + (f" (old table kept as {KEPT})" if keep_old else ""))
+
+
+def migrate(keep_old=False):
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            if partitions.is_partitioned(cur):
+                print("[OK] payroll_earnings is already partitioned")
+                return
+            if not lookups.is_encoded(cur):
+                print("[ERROR] Run scripts/migrate_lookups.py first")
+                return
+            cur.execute(PERSON_KEY_COLUMN_SQL)
+            cur.execute(ROW_HASH_COLUMN_SQL)
+
+    create_new_table()
+    copy_years()
+    swap(keep_old=keep_old)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Partition payroll_earnings by year')
+    parser.add_argument('--keep-old', action='store_true',
+                        help=f'Keep the unpartitioned table as {KEPT} instead of dropping it')
+    args = parser.parse_args()
+
+    migrate(keep_old=args.keep_old)
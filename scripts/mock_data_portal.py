@@ -0,0 +1,57 @@
+"""
+Local stand-in for the data.boston.gov download endpoint.
+
+Serves the archived CSVs in data/archive by resource ID so the loader can be
+exercised end to end without network access.
+
+Usage:
+    python scripts/mock_data_portal.py --port 8765
+    python scripts/load_data.py --all --workers 6 \
+        --source-url "http://localhost:8765/resource/{resource_id}/download"
+"""
+import sys
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from load_data import RESOURCE_IDS
+
+ARCHIVE_DIR = Path(__file__).parent.parent / "data" / "archive"
+
+YEARS_BY_RESOURCE = {resource_id: year for year, resource_id in RESOURCE_IDS.items()}
+
+
+class PortalHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        # /resource/<resource_id>/download
+        parts = self.path.strip("/").split("/")
+        year = YEARS_BY_RESOURCE.get(parts[-2]) if len(parts) >= 2 else None
+        path = ARCHIVE_DIR / f"boston_payroll_{year}.csv"
+
+        if year is None or not path.exists():
+            self.send_error(404, "Unknown resource")
+            return
+
+        body = path.read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(port=8765):
+    server = ThreadingHTTPServer(("127.0.0.1", port), PortalHandler)
+    print(f"[OK] Serving {ARCHIVE_DIR} on http://127.0.0.1:{port}/resource/{{resource_id}}/download")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stand-in for data.boston.gov downloads")
+    parser.add_argument("--port", type=int, default=8765)
+
+    args = parser.parse_args()
+    serve(args.port)
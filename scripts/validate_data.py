@@ -5,7 +5,8 @@ from tabulate import tabulate
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from backend.database import get_db_connection
+from backend.database import get_db_connection, PAYROLL_NAMED, PAYROLL_INDEXES, EMPLOYEE_PAGE_INDEXES
+from backend import money
 
 def validate_record_counts():
     """Verify record counts by year."""
@@ -48,9 +49,9 @@ def validate_no_duplicates():
 
     with get_db_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("""
+            cur.execute(f"""
                 SELECT year, name, department, title, COUNT(*) as count
-                FROM payroll_earnings
+                FROM {PAYROLL_NAMED}
                 GROUP BY year, name, department, title
                 HAVING COUNT(*) > 1
                 LIMIT 10
@@ -74,9 +75,9 @@ def validate_departments():
 
     with get_db_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("""
+            cur.execute(f"""
                 SELECT department, COUNT(*) as employees
-                FROM payroll_earnings
+                FROM {PAYROLL_NAMED}
                 WHERE year = 2024
                 GROUP BY department
                 ORDER BY employees DESC
@@ -102,11 +103,11 @@ def validate_earnings_totals():
 
     with get_db_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("""
+            cur.execute(f"""
                 SELECT
                     year,
-                    SUM(total_gross)::numeric(15,2) as total_earnings,
-                    AVG(total_gross)::numeric(10,2) as avg_earnings
+                    ({money.dollars_sql('SUM(total_gross)')})::numeric(15,2) as total_earnings,
+                    ({money.dollars_sql('AVG(total_gross)')})::numeric(10,2) as avg_earnings
                 FROM payroll_earnings
                 GROUP BY year
                 ORDER BY year
@@ -130,13 +131,7 @@ def validate_indexes():
     print("VALIDATION: Index Check")
     print("="*60)
 
-    expected_indexes = [
-        'idx_payroll_year',
-        'idx_payroll_department',
-        'idx_payroll_total_gross',
-        'idx_payroll_name_search',
-        'idx_payroll_year_dept',
-    ]
+    expected_indexes = list(PAYROLL_INDEXES) + list(EMPLOYEE_PAGE_INDEXES)
 
     with get_db_connection() as conn:
         with conn.cursor() as cur: